@@ -6,10 +6,12 @@ import subprocess
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, g, flash
 from config import Config
 from database import get_tenant_db_session, _tenant_engines # Corrected import
-from app.models import User, UserAuthDetails, AttendanceRecord, AttendanceType, ReferralRecord, ReferralType, MembershipType, DuesRecord, DuesType
+from app.models import User, UserAuthDetails, AttendanceRecord, AttendanceType, ReferralRecord, ReferralType, MembershipType, DuesRecord, DuesType, DuesSchedule
 from sqlalchemy import MetaData, Table, inspect, text
 from sqlalchemy.orm import relationship, joinedload
 from datetime import datetime
+from app.members.directory import get_member_directory
+from app.members.updates import ConcurrentUpdateError, apply_changes, commit_changes
 
 # Set up logging for debugging admin operations
 logging.basicConfig(level=logging.INFO)
@@ -71,7 +73,9 @@ def get_table_and_model(table_name, tenant_id):
         'dues_record': DuesRecord,
         'dues_records': DuesRecord,
         'dues_type': DuesType,
-        'dues_types': DuesType
+        'dues_types': DuesType,
+        'dues_schedule': DuesSchedule,
+        'dues_schedules': DuesSchedule
     }
 
     return table_model_mapping.get(table_name)
@@ -137,8 +141,7 @@ def admin_panel(selected_tenant_id):
 
             # Get users list for foreign key dropdowns
             if table_name in ['attendance_records', 'referral_records', 'user_auth_details', 'dues_records']:
-                users = s.query(User).order_by(User.first_name, User.last_name).all()
-                users_list = [(user.id, f"{user.first_name or ''} {user.last_name or ''}".strip() or user.email) for user in users]
+                users_list = get_member_directory(s, tenant_id_to_manage).choices()
 
 
             if table_name:
@@ -160,7 +163,7 @@ def admin_panel(selected_tenant_id):
 
                         if action == 'add':
                             # Skip auto-managed and system fields
-                            skip_fields = ['action', 'id', 'tenant_to_manage', 'table_name']
+                            skip_fields = ['action', 'id', 'tenant_to_manage', 'table_name', 'created_at', 'updated_at', 'change_xid', 'version_id']
 
                             new_row_data = {}
                             for key, value in request.form.items():
@@ -199,26 +202,33 @@ def admin_panel(selected_tenant_id):
                                 if row:
                                     logger.info(f"Found record to update: {row}")
                                     # Only skip system fields, preserve important date fields
-                                    skip_fields = ['action', 'id', 'tenant_to_manage', 'table_name', 'password_hash']
+                                    # Change timestamps are maintained by the models and change_xid by the database (delta sync relies on them)
+                                    # version_id is the optimistic concurrency check, not a value to write
+                                    skip_fields = ['action', 'id', 'tenant_to_manage', 'table_name', 'password_hash', 'created_at', 'updated_at', 'change_xid', 'version_id']
 
+                                    values = {}
                                     for key, value in request.form.items():
                                         if key not in skip_fields:
-                                            logger.info(f"Setting {key} = {value}")
                                             # Convert data types based on model column types
                                             converted_value = _convert_form_value(model, key, value)
                                             logger.info(f"Converted {key}: '{value}' -> {converted_value}")
-                                            setattr(row, key, converted_value)
-
-                                    # Auto-update timestamp for membership types
-                                    if table_name == 'membership_types':
-                                        row.updated_at = datetime.utcnow()
-
-                                    s.commit()
-                                    flash("Row updated successfully.", "success")
-                                    logger.info(f"Successfully updated {table_name} ID {row_id}")
+                                            values[key] = converted_value
+
+                                    changed = apply_changes(row, values, expected_version=request.form.get('version_id'))
+                                    if changed:
+                                        logger.info(f"Changed fields for {table_name} ID {row_id}: {sorted(changed)}")
+                                        commit_changes(s, row)
+                                        flash("Row updated successfully.", "success")
+                                        logger.info(f"Successfully updated {table_name} ID {row_id}")
+                                    else:
+                                        flash("No changes to save.", "info")
                                 else:
                                     flash("Row not found.", "danger")
                                     logger.warning(f"Record not found for {table_name} ID {row_id}")
+                            except ConcurrentUpdateError:
+                                s.rollback()
+                                flash("This row was changed by someone else since the page was loaded. Reload it and try again.", "warning")
+                                logger.warning(f"Concurrent update rejected for {table_name} ID {row_id}")
                             except Exception as e:
                                 s.rollback()
                                 error_msg = f"Error updating {table_name} record: {str(e)}"
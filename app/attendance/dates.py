@@ -0,0 +1,86 @@
+# app/attendance/dates.py
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from app.models import AttendanceRecord
+from app.change_events import LOCAL_CACHE_TTL_SECONDS
+from .events import on_attendance_changed
+
+_indexes = {}  # tenant_id -> (expires_at, EventDateIndex)
+_indexes_lock = threading.Lock()
+
+
+class EventDates:
+    """Sorted distinct event dates answering membership and neighbour lookups with bisect."""
+
+    def __init__(self, dates):
+        self.dates = dates
+
+    def __contains__(self, day):
+        position = bisect_left(self.dates, day)
+        return position < len(self.dates) and self.dates[position] == day
+
+    def most_recent(self):
+        return self.dates[-1] if self.dates else None
+
+    def previous(self, day):
+        """Latest date strictly before day, or None."""
+        position = bisect_left(self.dates, day)
+        return self.dates[position - 1] if position else None
+
+    def next(self, day):
+        """Earliest date strictly after day, or None."""
+        position = bisect_right(self.dates, day)
+        return self.dates[position] if position < len(self.dates) else None
+
+
+class EventDateIndex:
+    """
+    A tenant's attendance event dates: every date with any record, plus per-member dates
+    loaded on first use. Each is one DISTINCT query; lookups after that touch no database.
+    """
+
+    def __init__(self, dates):
+        self.all = EventDates(dates)
+        self.iso_dates = [day.strftime('%Y-%m-%d') for day in dates]
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    def for_user(self, s, user_id):
+        with self._lock:
+            dates = self._by_user.get(user_id)
+        if dates is None:
+            dates = EventDates([row[0] for row in s.query(AttendanceRecord.event_date).filter(
+                AttendanceRecord.user_id == user_id
+            ).distinct().order_by(AttendanceRecord.event_date)])
+            with self._lock:
+                self._by_user[user_id] = dates
+        return dates
+
+
+def get_event_date_index(s, tenant_id):
+    """Return the cached event date index for tenant_id, building it on a miss."""
+    now = time.monotonic()
+    with _indexes_lock:
+        cached = _indexes.get(tenant_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    index = EventDateIndex([row[0] for row in s.query(AttendanceRecord.event_date).distinct().order_by(
+        AttendanceRecord.event_date
+    )])
+
+    with _indexes_lock:
+        _indexes[tenant_id] = (now + LOCAL_CACHE_TTL_SECONDS, index)
+    return index
+
+
+@on_attendance_changed
+def invalidate_event_date_index(tenant_id=None):
+    """Drop the index for one tenant, or for all tenants when tenant_id is None."""
+    with _indexes_lock:
+        if tenant_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(tenant_id, None)
@@ -0,0 +1,11 @@
+# app/attendance/events.py
+
+from app.change_events import ModelChangeNotifier
+from app.models import AttendanceRecord
+
+# Writes to attendance records make cached attendance data (event date indexes) stale
+attendance_changed = ModelChangeNotifier('attendance', (AttendanceRecord,))
+
+on_attendance_changed = attendance_changed.listen
+notify_attendance_changed = attendance_changed.notify
+mark_attendance_changed = attendance_changed.mark
@@ -0,0 +1,161 @@
+# app/attendance/matrix.py
+
+from datetime import date
+from sqlalchemy import func
+from app.models import User, AttendanceRecord, ATTENDANCE_STATUSES, ATTENDANCE_STATUS_CODES, ATTENDANCE_STATUS_LETTERS
+
+DEFAULT_TRAILING_MEETINGS = 6
+# Cell value for a member with no record on a meeting date; counted as missed
+NO_RECORD = 0
+NO_RECORD_MARK = '.'
+# Cell value for a meeting held before the member joined; left out of every figure
+BEFORE_JOINING = max(ATTENDANCE_STATUS_LETTERS) + 1
+BEFORE_JOINING_MARK = ' '
+# Status kept when one member has several meetings on a date (no attendance type chosen): best first
+MERGE_ORDER = tuple(ATTENDANCE_STATUS_CODES[letter] for letter in ('P', 'L', 'E', 'A'))
+
+
+class SeasonMatrix:
+    """
+    Dense member x meeting-date grid of status codes (NO_RECORD where a member has no record,
+    BEFORE_JOINING for meetings before they joined) with per-member figures computed over
+    whole columns at once, counting only meetings held since the member joined:
+      attendance_rate - present or late / meetings not excused
+      longest_absence_streak - most consecutive meetings absent or without a record
+      trailing_rate - attendance_rate over the last trailing meetings only
+    Rates are None for a member excused from (or not yet joined for) every meeting counted.
+    """
+
+    def __init__(self, member_ids, names, dates, grid, trailing):
+        self.member_ids = member_ids
+        self.names = names
+        self.dates = dates
+        self.grid = grid
+        self.trailing = trailing
+        self.attendance_rate, self.longest_absence_streak, self.trailing_rate = _member_figures(grid, trailing)
+
+    def status_rows(self):
+        """One string per member with a status letter (or NO_RECORD_MARK/BEFORE_JOINING_MARK) per meeting date."""
+        import numpy as np
+
+        marks = np.full(BEFORE_JOINING + 1, NO_RECORD_MARK)
+        marks[list(ATTENDANCE_STATUS_LETTERS)] = list(ATTENDANCE_STATUS_LETTERS.values())
+        marks[BEFORE_JOINING] = BEFORE_JOINING_MARK
+        return [''.join(row) for row in marks[self.grid]]
+
+    def to_json(self):
+        return {
+            'dates': [day.isoformat() for day in self.dates],
+            'trailing_meetings': self.trailing,
+            'legend': {NO_RECORD_MARK: 'No record', BEFORE_JOINING_MARK: 'Before joining',
+                       **{letter: name for _, letter, name in ATTENDANCE_STATUSES}},
+            'members': [{
+                'user_id': member_id,
+                'name': name,
+                'attendance_rate': rate,
+                'longest_absence_streak': streak,
+                'trailing_rate': trailing_rate,
+                'statuses': statuses,
+            } for member_id, name, rate, streak, trailing_rate, statuses in self._member_rows()],
+        }
+
+    def csv_rows(self):
+        yield ['Member', 'Attendance Rate', 'Longest Absence Streak', f'Last {self.trailing} Meetings Rate',
+               *[day.isoformat() for day in self.dates]]
+        for _, name, rate, streak, trailing_rate, statuses in self._member_rows():
+            yield [name, _percent(rate), streak, _percent(trailing_rate), *statuses]
+
+    def _member_rows(self):
+        return zip(self.member_ids, self.names, _rounded(self.attendance_rate),
+                   self.longest_absence_streak.tolist(), _rounded(self.trailing_rate), self.status_rows())
+
+
+def _rounded(rates):
+    return [None if rate != rate else round(rate, 3) for rate in rates.tolist()]  # NaN -> None
+
+
+def _percent(rate):
+    return '' if rate is None else f"{rate * 100:.0f}%"
+
+
+def _member_figures(grid, trailing):
+    import numpy as np
+
+    attended = (grid == ATTENDANCE_STATUS_CODES['P']) | (grid == ATTENDANCE_STATUS_CODES['L'])
+    counted = (grid != ATTENDANCE_STATUS_CODES['E']) & (grid != BEFORE_JOINING)
+    missed = counted & ~attended
+
+    def rate(attended, counted):
+        held = counted.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(held > 0, attended.sum(axis=1) / held, np.nan)
+
+    # Run lengths of missed meetings: the running count of misses minus its value at the last meeting not missed
+    misses = np.cumsum(missed, axis=1)
+    at_last_reset = np.maximum.accumulate(np.where(missed, 0, misses), axis=1)
+    runs = misses - at_last_reset
+    longest = runs.max(axis=1) if runs.shape[1] else np.zeros(len(grid), dtype=int)
+
+    return rate(attended, counted), longest, rate(attended[:, -trailing:], counted[:, -trailing:])
+
+
+def _joined_ordinal(created_at, first_record_date):
+    """Ordinal of the earlier of the account creation and first record dates; 0 when both are unknown."""
+    days = [day for day in (created_at and created_at.date(), first_record_date) if day]
+    return min(days).toordinal() if days else 0
+
+
+def season_matrix(s, start_date, end_date, attendance_type_id=None, trailing=DEFAULT_TRAILING_MEETINGS):
+    """
+    Build the SeasonMatrix of every active member over the meeting dates between start_date
+    and end_date (inclusive): one query for the members and when each joined, one for the
+    (user_id, event_date, status_code) tuples. Meeting dates are the dates with any record.
+    A member joined at their first attendance record of any type or their account creation,
+    whichever is earlier. Without attendance_type_id a member with several meetings on one
+    date shows the best status there, in MERGE_ORDER. Raises ImportError without numpy.
+    """
+    import numpy as np
+
+    first_record = s.query(func.min(AttendanceRecord.event_date)).filter(
+        AttendanceRecord.user_id == User.id
+    ).scalar_subquery()  # one index probe per member on the (user_id, event_date, ...) unique key
+    members = s.query(User.id, User.first_name, User.last_name, User.created_at, first_record).filter(
+        User.is_active == True
+    ).all()
+    members.sort(key=lambda member: f"{member[1]} {member[2]}".lower())
+
+    query = s.query(AttendanceRecord.user_id, AttendanceRecord.event_date, AttendanceRecord.status_code).join(
+        User, AttendanceRecord.user_id == User.id
+    ).filter(
+        User.is_active == True, AttendanceRecord.event_date >= start_date, AttendanceRecord.event_date <= end_date
+    )
+    if attendance_type_id:
+        query = query.filter(AttendanceRecord.attendance_type_id == attendance_type_id)
+    rows = query.all()
+
+    member_ids = np.array([member[0] for member in members], dtype=np.int64)
+    user_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    ordinals = np.fromiter((row[1].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+    codes = np.fromiter((row[2] for row in rows), dtype=np.int64, count=len(rows))
+
+    # Merge on rank in MERGE_ORDER, then map the best rank back to its status code
+    rank_of = np.zeros(BEFORE_JOINING, dtype=np.int8)
+    rank_of[list(MERGE_ORDER)] = np.arange(len(MERGE_ORDER))
+    by_member = np.argsort(member_ids)
+    member_index = by_member[np.searchsorted(member_ids, user_ids, sorter=by_member)]
+    day_ordinals, day_index = np.unique(ordinals, return_inverse=True)
+    ranks = np.full((len(member_ids), len(day_ordinals)), len(MERGE_ORDER), dtype=np.int8)
+    np.minimum.at(ranks, (member_index, day_index), rank_of[codes])
+    grid = np.array(MERGE_ORDER + (NO_RECORD,), dtype=np.int8)[ranks]
+
+    joined = np.array([_joined_ordinal(created_at, first_day) for _, _, _, created_at, first_day in members],
+                      dtype=np.int64)
+    grid[(day_ordinals[np.newaxis, :] < joined[:, np.newaxis]) & (grid == NO_RECORD)] = BEFORE_JOINING
+
+    return SeasonMatrix(
+        member_ids.tolist(),
+        [f"{first_name} {last_name}" for _, first_name, last_name, _, _ in members],
+        [date.fromordinal(int(ordinal)) for ordinal in day_ordinals],
+        grid,
+        trailing
+    )
@@ -0,0 +1,140 @@
+# app/attendance/rollup.py
+
+import logging
+from datetime import timedelta
+from sqlalchemy import Date, and_, cast, exists, func, literal_column, or_, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import AttendanceRecord, AttendanceMonthlyCount
+from app.monthly_rollups import MonthlyRollupTracker, lock_months, lock_whole_rollup, month_start, next_month
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding the event months whose rollup rows must be recomputed before commit
+ROLLUP_MONTHS_KEY = 'attendance_rollup_months'
+ROLLUP_KEY_COLUMNS = ('month', 'user_id', 'attendance_type_id', 'status_code')
+
+
+def _rollup_source(months=None):
+    """attendance_record counted by event month, member, attendance type and status, optionally for some months only."""
+    month = cast(func.date_trunc('month', AttendanceRecord.event_date), Date)
+    source = select(
+        month, AttendanceRecord.user_id, AttendanceRecord.attendance_type_id, AttendanceRecord.status_code,
+        func.count(), func.now()
+    ).group_by(month, AttendanceRecord.user_id, AttendanceRecord.attendance_type_id, AttendanceRecord.status_code)
+    if months:
+        source = source.where(or_(*[
+            and_(AttendanceRecord.event_date >= first, AttendanceRecord.event_date < next_month(first))
+            for first in months
+        ]))
+    return source
+
+
+def _insert_rollup(months=None):
+    stmt = pg_insert(AttendanceMonthlyCount).from_select(
+        list(ROLLUP_KEY_COLUMNS) + ['record_count', 'updated_at'], _rollup_source(months)
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=list(ROLLUP_KEY_COLUMNS),
+        set_={'record_count': stmt.excluded.record_count, 'updated_at': stmt.excluded.updated_at}
+    )
+
+
+def _rollup_built(s):
+    return s.query(exists().select_from(AttendanceMonthlyCount)).scalar()
+
+
+def refresh_rollup_months(s, months):
+    """
+    Recompute the rollup rows of the given months inside the caller's transaction. Each month
+    is one range scan of ix_attendance_record_date_status_user, however many records changed;
+    the months are locked first so concurrent saves into a month recount one after the other.
+    While the rollup is still empty (never built) the whole rollup is built instead, so a
+    non-empty rollup always covers every month.
+    """
+    months = sorted(set(months))
+    if not months or s.get_bind().dialect.name != 'postgresql':
+        return
+    if not _rollup_built(s):
+        rebuild_rollup(s)
+        return
+    lock_months(s, AttendanceMonthlyCount.__tablename__, months)
+    s.execute(_insert_rollup(months))
+    # Rows for member, type and status combinations that no longer have any records that month
+    rollup = AttendanceMonthlyCount.__table__
+    s.execute(rollup.delete().where(
+        rollup.c.month.in_(months),
+        ~exists().where(
+            AttendanceRecord.user_id == rollup.c.user_id,
+            AttendanceRecord.attendance_type_id == rollup.c.attendance_type_id,
+            AttendanceRecord.status_code == rollup.c.status_code,
+            AttendanceRecord.event_date >= rollup.c.month,
+            AttendanceRecord.event_date < rollup.c.month + literal_column("interval '1 month'")
+        )
+    ))
+
+
+def rebuild_rollup(s):
+    """Replace the whole rollup from attendance_record. Returns the number of rows written."""
+    lock_whole_rollup(s, AttendanceMonthlyCount.__tablename__)
+    s.execute(AttendanceMonthlyCount.__table__.delete())
+    s.execute(_insert_rollup())
+    _rollup_months.forget(s)
+    return s.query(func.count()).select_from(AttendanceMonthlyCount).scalar()
+
+
+_rollup_months = MonthlyRollupTracker(ROLLUP_MONTHS_KEY, AttendanceRecord, 'event_date', refresh_rollup_months)
+mark_rollup_months = _rollup_months.mark
+
+
+def status_counts(s, start_date=None, end_date=None, member_filter=None):
+    """
+    Subquery of (user_id, status_code, record_count) rows covering event dates from start_date
+    to end_date inclusive (either may be None). Whole months come from the rollup, the partial
+    months at either end from attendance_record; sum record_count per member and status.
+    The rollup is only maintained on PostgreSQL, so elsewhere, and while it has never been
+    built (see rebuild_attendance_rollup.py), every row is counted raw.
+    """
+    def raw(first=None, after=None):
+        query = select(
+            AttendanceRecord.user_id, AttendanceRecord.status_code, func.count().label('record_count')
+        ).group_by(AttendanceRecord.user_id, AttendanceRecord.status_code)
+        if first:
+            query = query.where(AttendanceRecord.event_date >= first)
+        if after:
+            query = query.where(AttendanceRecord.event_date < after)
+        if member_filter:
+            query = query.where(AttendanceRecord.user_id == member_filter)
+        return query
+
+    def rolled_up(first=None, after=None):
+        query = select(
+            AttendanceMonthlyCount.user_id, AttendanceMonthlyCount.status_code,
+            func.sum(AttendanceMonthlyCount.record_count).label('record_count')
+        ).group_by(AttendanceMonthlyCount.user_id, AttendanceMonthlyCount.status_code)
+        if first:
+            query = query.where(AttendanceMonthlyCount.month >= first)
+        if after:
+            query = query.where(AttendanceMonthlyCount.month < after)
+        if member_filter:
+            query = query.where(AttendanceMonthlyCount.user_id == member_filter)
+        return query
+
+    after_end = end_date + timedelta(days=1) if end_date else None
+    if s.get_bind().dialect.name != 'postgresql':
+        return raw(start_date, after_end).subquery()
+    if not _rollup_built(s):
+        logger.warning("attendance_monthly_count is empty; counting attendance from attendance_record")
+        return raw(start_date, after_end).subquery()
+
+    # Whole months lie in [first_full, end_full)
+    first_full = start_date if not start_date or start_date.day == 1 else next_month(start_date)
+    end_full = month_start(after_end) if after_end else None
+    if first_full and end_full and first_full >= end_full:
+        return raw(start_date, after_end).subquery()
+
+    parts = [rolled_up(first_full, end_full)]
+    if start_date and start_date < first_full:
+        parts.append(raw(start_date, first_full))
+    if after_end and end_full < after_end:
+        parts.append(raw(end_full, after_end))
+    return union_all(*parts).subquery()
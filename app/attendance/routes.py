@@ -1,24 +1,38 @@
 import logging
-from flask import Blueprint, request, render_template, redirect, url_for, session, flash, g, Response
+from flask import Blueprint, request, render_template, redirect, url_for, session, flash, g, Response, jsonify
 from config import Config
 from database import get_tenant_db_session
-from app.models import User, AttendanceRecord, AttendanceType
+from app.models import User, AttendanceRecord, AttendanceType, AttendanceRule, ATTENDANCE_STATUSES, ATTENDANCE_STATUS_CODES, ATTENDANCE_STATUS_LETTERS, attendance_status_code
 from sqlalchemy.orm import joinedload
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from sqlalchemy import func
-from io import StringIO, BytesIO
-import csv
+from io import BytesIO
+from app.members.directory import get_member_directory
+from .dates import get_event_date_index
+from .matrix import DEFAULT_TRAILING_MEETINGS, season_matrix
+from .rollup import status_counts
+from .rules import open_alerts, recompute_rules
+from .saving import matrix_state, parse_changes, submitted_statuses, upsert_attendance
+from app.utils import STREAM_BATCH_SIZE, csv_download
+from app.pdf_jobs import pdf_job_id, pdf_job_response, pdf_job_status_response, pdf_stylesheet, send_pdf_job, start_pdf_job
 from . import attendance_bp
 
 logger = logging.getLogger(__name__)
 
+# PALE report count columns and the status code counted in each
+PALE_STATUS_CODES = (
+    ('present_count', ATTENDANCE_STATUS_CODES['P']),
+    ('absent_count', ATTENDANCE_STATUS_CODES['A']),
+    ('late_count', ATTENDANCE_STATUS_CODES['L']),
+    ('excused_count', ATTENDANCE_STATUS_CODES['E']),
+)
+
+# Background PDF reports this blueprint renders, and so the only jobs its poll and download routes serve
+PALE_PDF_REPORTS = ('pale_report', 'pale_detail')
+
 
 @attendance_bp.route('/<tenant_id>/history', methods=['GET', 'POST'])
 def attendance_history(tenant_id):
-    import logging
-    from sqlalchemy import func
-    logger = logging.getLogger(__name__)
-
     try:
         logger.info(f"Starting attendance_history for tenant: {tenant_id}")
 
@@ -45,8 +59,6 @@ def attendance_history(tenant_id):
                     flash("Invalid date format.", "danger")
 
         with get_tenant_db_session(tenant_id) as s:
-            logger.info("Database session opened successfully")
-
             current_user = s.query(User).options(joinedload(User.membership_type)).filter_by(id=session['user_id']).first()
             if not current_user:
                 logger.error("Current user not found")
@@ -56,242 +68,75 @@ def attendance_history(tenant_id):
             # Check if user has permission to see all users or just their own
             user_permissions = session.get('user_permissions', {})
             can_view_all = user_permissions.get('can_edit_attendance', False)
-            logger.info(f"User permissions: {user_permissions}, can_view_all: {can_view_all}")
 
-            if can_view_all:
-                # For privileged users, only show users who have attendance records for this date
-                users_with_records = s.query(AttendanceRecord.user_id).filter(
-                    AttendanceRecord.event_date == selected_date
-                ).distinct().subquery()
-
-                all_users = s.query(User).options(joinedload(User.membership_type)).join(
-                    users_with_records, User.id == users_with_records.c.user_id
-                ).order_by(User.first_name, User.last_name).all()
-                page_title = f"Attendance History - {len(all_users)} Members"
-            else:
-                # Show only current user for regular members (only if they have a record for this date)
-                has_record = s.query(AttendanceRecord).filter(
-                    AttendanceRecord.event_date == selected_date,
-                    AttendanceRecord.user_id == current_user.id
-                ).first() is not None
+            # Event dates come from the cached index, so navigation costs no queries
+            date_index = get_event_date_index(s, tenant_id)
+            event_dates = date_index.all if can_view_all else date_index.for_user(s, current_user.id)
 
-                all_users = [current_user] if current_user and has_record else []
-                page_title = "My Attendance History"
+            # Initial page load with no records on the selected date: jump to the most recent date with records
+            if request.method == 'GET' and not navigation_action and selected_date not in event_dates:
+                most_recent_date = event_dates.most_recent()
+                if most_recent_date:
+                    selected_date = most_recent_date
+                    logger.info(f"No records found for today, jumping to most recent date: {selected_date}")
 
-            logger.info(f"Retrieved {len(all_users)} users")
+            # Handle navigation actions (next/prev date with records); no message when there is no further history
+            if navigation_action == 'next':
+                selected_date = event_dates.next(selected_date) or selected_date
+            elif navigation_action == 'prev':
+                selected_date = event_dates.previous(selected_date) or selected_date
 
-            # If this is a GET request (initial page load) and no navigation action,
-            # check if there are records for the selected date. If not, jump to most recent date with records.
-            if request.method == 'GET' and not navigation_action:
-                # Check if there are any records for the selected date
-                if can_view_all:
-                    records_exist = s.query(AttendanceRecord).filter(
-                        AttendanceRecord.event_date == selected_date
-                    ).first()
-                else:
-                    records_exist = s.query(AttendanceRecord).filter(
-                        AttendanceRecord.event_date == selected_date,
-                        AttendanceRecord.user_id == current_user.id
-                    ).first()
-
-                # If no records exist for selected date, jump to most recent date with records
-                if not records_exist:
-                    if can_view_all:
-                        # Find most recent date with any attendance records
-                        most_recent_date = s.query(AttendanceRecord.event_date).order_by(
-                            AttendanceRecord.event_date.desc()
-                        ).first()
-                    else:
-                        # Find most recent date with attendance records for current user
-                        most_recent_date = s.query(AttendanceRecord.event_date).filter(
-                            AttendanceRecord.user_id == current_user.id
-                        ).order_by(AttendanceRecord.event_date.desc()).first()
-
-                    if most_recent_date:
-                        selected_date = most_recent_date[0]
-                        logger.info(f"No records found for today, jumping to most recent date: {selected_date}")
-                        # Re-check if user has records for the new date (for non-privileged users)
-                        if not can_view_all:
-                            has_record = s.query(AttendanceRecord).filter(
-                                AttendanceRecord.event_date == selected_date,
-                                AttendanceRecord.user_id == current_user.id
-                            ).first() is not None
-                            if not has_record:
-                                all_users = []
-
-            # Check for available navigation dates before handling navigation actions
-            has_prev_records = False
-            has_next_records = False
+            has_prev_records = event_dates.previous(selected_date) is not None
+            has_next_records = event_dates.next(selected_date) is not None
+
+            # The one data query: the selected date's records with their members and attendance types
+            attendance_records = s.query(AttendanceRecord).options(
+                joinedload(AttendanceRecord.attendance_type),
+                joinedload(AttendanceRecord.user).joinedload(User.membership_type)
+            ).filter(AttendanceRecord.event_date == selected_date).all()
 
             if can_view_all:
-                # Privileged users: Check for any attendance records before/after current date
-                prev_check = s.query(AttendanceRecord.event_date).filter(
-                    AttendanceRecord.event_date < selected_date
-                ).first()
-                next_check = s.query(AttendanceRecord.event_date).filter(
-                    AttendanceRecord.event_date > selected_date
-                ).first()
+                # Privileged users see every member with a record for this date
+                members = {record.user_id: record.user for record in attendance_records}
+                all_users = sorted(members.values(), key=lambda user: (
+                    user.first_name is None, (user.first_name or '').lower(),
+                    user.last_name is None, (user.last_name or '').lower()
+                ))
+                page_title = f"Attendance History - {len(all_users)} Members"
             else:
-                # Non-privileged users: Check for attendance records for current user only
-                prev_check = s.query(AttendanceRecord.event_date).filter(
-                    AttendanceRecord.event_date < selected_date,
-                    AttendanceRecord.user_id == current_user.id
-                ).first()
-                next_check = s.query(AttendanceRecord.event_date).filter(
-                    AttendanceRecord.event_date > selected_date,
-                    AttendanceRecord.user_id == current_user.id
-                ).first()
-
-            has_prev_records = prev_check is not None
-            has_next_records = next_check is not None
-
-            # Handle navigation actions (next/prev day)
-            if navigation_action:
-                if navigation_action == 'next':
-                    if can_view_all:
-                        # Privileged users: Find next date with any attendance records
-                        next_date = s.query(AttendanceRecord.event_date).filter(
-                            AttendanceRecord.event_date > selected_date
-                        ).order_by(AttendanceRecord.event_date.asc()).first()
-                    else:
-                        # Non-privileged users: Find next date with attendance records for current user only
-                        next_date = s.query(AttendanceRecord.event_date).filter(
-                            AttendanceRecord.event_date > selected_date,
-                            AttendanceRecord.user_id == current_user.id
-                        ).order_by(AttendanceRecord.event_date.asc()).first()
-
-                    if next_date:
-                        selected_date = next_date[0]
-                        # Update user list for the new date (for non-privileged users)
-                        if not can_view_all:
-                            has_record = s.query(AttendanceRecord).filter(
-                                AttendanceRecord.event_date == selected_date,
-                                AttendanceRecord.user_id == current_user.id
-                            ).first() is not None
-                            all_users = [current_user] if current_user and has_record else []
-                        # Re-check navigation availability after moving
-                        has_prev_records = True  # We just moved from a previous date
-                        if can_view_all:
-                            next_check = s.query(AttendanceRecord.event_date).filter(
-                                AttendanceRecord.event_date > selected_date
-                            ).first()
-                        else:
-                            next_check = s.query(AttendanceRecord.event_date).filter(
-                                AttendanceRecord.event_date > selected_date,
-                                AttendanceRecord.user_id == current_user.id
-                            ).first()
-                        has_next_records = next_check is not None
-                    # No flash message for no further history
-
-                elif navigation_action == 'prev':
-                    if can_view_all:
-                        # Privileged users: Find previous date with any attendance records
-                        prev_date = s.query(AttendanceRecord.event_date).filter(
-                            AttendanceRecord.event_date < selected_date
-                        ).order_by(AttendanceRecord.event_date.desc()).first()
-                    else:
-                        # Non-privileged users: Find previous date with attendance records for current user only
-                        prev_date = s.query(AttendanceRecord.event_date).filter(
-                            AttendanceRecord.event_date < selected_date,
-                            AttendanceRecord.user_id == current_user.id
-                        ).order_by(AttendanceRecord.event_date.desc()).first()
-
-                    if prev_date:
-                        selected_date = prev_date[0]
-                        # Update user list for the new date (for non-privileged users)
-                        if not can_view_all:
-                            has_record = s.query(AttendanceRecord).filter(
-                                AttendanceRecord.event_date == selected_date,
-                                AttendanceRecord.user_id == current_user.id
-                            ).first() is not None
-                            all_users = [current_user] if current_user and has_record else []
-                        # Re-check navigation availability after moving
-                        has_next_records = True  # We just moved from a next date
-                        if can_view_all:
-                            prev_check = s.query(AttendanceRecord.event_date).filter(
-                                AttendanceRecord.event_date < selected_date
-                            ).first()
-                        else:
-                            prev_check = s.query(AttendanceRecord.event_date).filter(
-                                AttendanceRecord.event_date < selected_date,
-                                AttendanceRecord.user_id == current_user.id
-                            ).first()
-                        has_prev_records = prev_check is not None
-                    # No flash message for no further history
-
-            # Get attendance records for the selected date with attendance types
-            # Handle case where attendance_type_id column doesn't exist yet
-            try:
-                attendance_records = s.query(AttendanceRecord).options(
-                    joinedload(AttendanceRecord.attendance_type)
-                ).filter(
-                    AttendanceRecord.event_date == selected_date
-                ).all()
-            except Exception as e:
-                # Fallback to basic query without attendance_type join if column doesn't exist
-                logger.warning(f"AttendanceType join failed, using fallback query: {e}")
-                attendance_records = s.query(AttendanceRecord).filter(
-                    AttendanceRecord.event_date == selected_date
-                ).all()
-
-            # Filter out records with empty meeting types
-            filtered_records = []
-            for record in attendance_records:
-                meeting_type = ""
-                try:
-                    if hasattr(record, 'attendance_type') and record.attendance_type:
-                        meeting_type = record.attendance_type.type or ""
-                    elif hasattr(record, 'event_name') and record.event_name:
-                        meeting_type = record.event_name or ""
-                except Exception:
-                    pass
-
-                # Only include records with non-empty meeting types
-                if meeting_type.strip():
-                    filtered_records.append(record)
+                # Regular members see only themselves, and only if they have a record for this date
+                all_users = [current_user] if selected_date in event_dates else []
+                page_title = "My Attendance History"
 
-            attendance_records = filtered_records
+            # Only include records with non-empty meeting types
+            attendance_records = [record for record in attendance_records
+                                  if record.attendance_type and (record.attendance_type.type or '').strip()]
 
             logger.info(f"Found {len(attendance_records)} attendance records for {selected_date}")
 
-            # Get all dates with attendance records for calendar highlighting
-            attendance_dates = s.query(func.distinct(AttendanceRecord.event_date)).all()
-            attendance_dates_list = [date_tuple[0].strftime('%Y-%m-%d') for date_tuple in attendance_dates]
-
             # Create attendance dictionary and attendance types dictionary
             existing_attendance = {}
             attendance_types_dict = {}  # Maps user_id to their attendance type
             default_attendance_type = "Meeting"  # Default for template compatibility
 
             for record in attendance_records:
-                existing_attendance[record.user_id] = record.status
-                # Handle attendance type safely - may not exist if column doesn't exist yet
-                try:
-                    if hasattr(record, 'attendance_type') and record.attendance_type:
-                        attendance_types_dict[record.user_id] = record.attendance_type.type
-                        default_attendance_type = record.attendance_type.type  # Keep last one as fallback
-                    elif hasattr(record, 'event_name') and record.event_name:
-                        # Fallback to event_name for legacy records
-                        attendance_types_dict[record.user_id] = record.event_name
-                        default_attendance_type = record.event_name
-                except Exception:
-                    # If there's any issue accessing attendance_type, skip it
-                    pass
-
-        logger.info("Rendering attendance_history.html template")
-        return render_template('attendance_history.html',
-                             tenant_id=tenant_id,
-                             tenant_display_name=tenant_display_name,
-                             all_users=all_users,
-                             existing_attendance=existing_attendance,
-                             selected_date=selected_date.strftime('%Y-%m-%d'),
-                             attendance_type=default_attendance_type,  # Keep for compatibility
-                             attendance_types_dict=attendance_types_dict,  # Individual attendance types per user
-                             attendance_dates=attendance_dates_list,  # For calendar highlighting
-                             can_view_all=can_view_all,
-                             page_title=page_title,
-                             has_prev_records=has_prev_records,
-                             has_next_records=has_next_records)
+                existing_attendance[record.user_id] = ATTENDANCE_STATUS_LETTERS[record.status_code]
+                attendance_types_dict[record.user_id] = record.attendance_type.type
+                default_attendance_type = record.attendance_type.type  # Keep last one as fallback
+
+            return render_template('attendance_history.html',
+                                 tenant_id=tenant_id,
+                                 tenant_display_name=tenant_display_name,
+                                 all_users=all_users,
+                                 existing_attendance=existing_attendance,
+                                 selected_date=selected_date.strftime('%Y-%m-%d'),
+                                 attendance_type=default_attendance_type,  # Keep for compatibility
+                                 attendance_types_dict=attendance_types_dict,  # Individual attendance types per user
+                                 attendance_dates=date_index.iso_dates,  # For calendar highlighting
+                                 can_view_all=can_view_all,
+                                 page_title=page_title,
+                                 has_prev_records=has_prev_records,
+                                 has_next_records=has_next_records)
 
     except Exception as e:
         logger.error(f"Error in attendance_history: {str(e)}")
@@ -315,6 +160,190 @@ def attendance_create(tenant_id):
     return _attendance_view(tenant_id)
 
 
+@attendance_bp.route('/<tenant_id>/matrix_state')
+def attendance_matrix_state(tenant_id):
+    """JSON {user_id: status} saved for one meeting (event_date, attendance_type_id); the matrix page diffs edits against it."""
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+    if not session.get('user_permissions', {}).get('can_edit_attendance', False):
+        return jsonify({'success': False, 'message': 'No permission to edit attendance'}), 403
+
+    try:
+        event_date = datetime.strptime(request.args.get('event_date', ''), '%Y-%m-%d').date()
+        attendance_type_id = int(request.args.get('attendance_type_id', ''))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'event_date (YYYY-MM-DD) and attendance_type_id are required'}), 400
+
+    with get_tenant_db_session(tenant_id) as s:
+        return jsonify({'success': True, 'statuses': matrix_state(s, event_date, attendance_type_id)})
+
+
+@attendance_bp.route('/<tenant_id>/save', methods=['POST'])
+def attendance_save(tenant_id):
+    """
+    Save only the matrix cells that changed. Body: {"changes": [{"user_id", "attendance_type_id",
+    "event_date", "status"}, ...]}; the page batches rapid edits into one request.
+    """
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        return jsonify({'success': False, 'message': 'Not logged in'}), 401
+    if not session.get('user_permissions', {}).get('can_edit_attendance', False):
+        return jsonify({'success': False, 'message': 'No permission to edit attendance'}), 403
+
+    payload = request.get_json(silent=True) or {}
+    try:
+        cells = parse_changes(payload.get('changes', []))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    try:
+        with get_tenant_db_session(tenant_id) as s:
+            try:
+                created, updated, unchanged = upsert_attendance(s, cells)
+            except ValueError as e:
+                # Unknown attendance type; checked before any row is written
+                return jsonify({'success': False, 'message': str(e)}), 400
+            s.commit()
+    except Exception as e:
+        logger.error(f"Error saving attendance changes for {tenant_id}: {str(e)}")
+        return jsonify({'success': False, 'message': 'Failed to save attendance'}), 500
+
+    return jsonify({'success': True, 'created': created, 'updated': updated, 'unchanged': unchanged})
+
+
+@attendance_bp.route('/<tenant_id>/heatmap')
+def attendance_heatmap(tenant_id):
+    """
+    Member x meeting-date attendance grid with attendance rate, longest absence streak and the
+    rate over the last `trailing` meetings per member. Query args: start and end (YYYY-MM-DD,
+    default the last year), attendance_type_id, trailing, format (html, json or csv).
+    """
+    output_format = request.args.get('format', 'html')
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        if output_format != 'html':
+            return jsonify({'error': 'Not logged in'}), 401
+        flash("You must be logged in to view this page.", "danger")
+        return redirect(url_for('auth.login', tenant_id=tenant_id))
+    if not session.get('user_permissions', {}).get('can_edit_attendance', False):
+        if output_format != 'html':
+            return jsonify({'error': 'Permission denied'}), 403
+        flash("You do not have permission to view the attendance heatmap.", "danger")
+        return redirect(url_for('attendance.attendance_history', tenant_id=tenant_id))
+
+    try:
+        end_date = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else date.today()
+        start_date = (datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start')
+                      else end_date - timedelta(days=365))
+        attendance_type_id = int(request.args['attendance_type_id']) if request.args.get('attendance_type_id') else None
+        trailing = int(request.args.get('trailing') or DEFAULT_TRAILING_MEETINGS)
+        if start_date > end_date or trailing < 1:
+            raise ValueError
+    except ValueError:
+        if output_format != 'html':
+            return jsonify({'error': 'Invalid start, end (use YYYY-MM-DD), attendance_type_id or trailing'}), 400
+        flash("Invalid heatmap filter.", "danger")
+        return redirect(url_for('attendance.attendance_heatmap', tenant_id=tenant_id))
+
+    tenant_display_name = Config.TENANT_DISPLAY_NAMES.get(tenant_id, tenant_id.capitalize())
+
+    with get_tenant_db_session(tenant_id) as s:
+        try:
+            matrix = season_matrix(s, start_date, end_date, attendance_type_id, trailing)
+        except ImportError:
+            if output_format != 'html':
+                return jsonify({'error': 'The attendance heatmap requires the numpy library'}), 500
+            flash("The attendance heatmap requires the numpy library. Please install it first.", "danger")
+            return redirect(url_for('attendance.attendance_history', tenant_id=tenant_id))
+
+        if output_format == 'json':
+            return jsonify({'start': start_date.isoformat(), 'end': end_date.isoformat(), **matrix.to_json()})
+        if output_format == 'csv':
+            return csv_download(matrix.csv_rows(), f'attendance_heatmap_{start_date:%Y%m%d}_{end_date:%Y%m%d}.csv')
+
+        attendance_types = s.query(AttendanceType).filter_by(is_active=True).order_by(AttendanceType.sort_order, AttendanceType.type).all()
+        return render_template('attendance_heatmap.html',
+                               tenant_id=tenant_id,
+                               tenant_display_name=tenant_display_name,
+                               heatmap=matrix.to_json(),
+                               attendance_types=attendance_types,
+                               attendance_type_id=attendance_type_id,
+                               start_date=start_date,
+                               end_date=end_date,
+                               trailing=trailing)
+
+
+@attendance_bp.route('/<tenant_id>/rules', methods=['GET', 'POST'])
+def attendance_rules(tenant_id):
+    """
+    Configure the tenant's attendance rules (e.g. more than 3 absences in 6 months) and list
+    the open alerts they raised. A rule added, toggled or deleted is re-evaluated for every
+    member at once; saving attendance re-evaluates only the members whose records changed.
+    """
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        flash("You must be logged in to view this page.", "danger")
+        return redirect(url_for('auth.login', tenant_id=tenant_id))
+    if not session.get('user_permissions', {}).get('can_edit_attendance', False):
+        flash("You do not have permission to manage attendance rules.", "danger")
+        return redirect(url_for('attendance.attendance_history', tenant_id=tenant_id))
+
+    tenant_display_name = Config.TENANT_DISPLAY_NAMES.get(tenant_id, tenant_id.capitalize())
+
+    with get_tenant_db_session(tenant_id) as s:
+        if request.method == 'POST':
+            action = request.form.get('action')
+            try:
+                if action == 'add':
+                    name = request.form.get('name', '').strip()
+                    max_count = int(request.form.get('max_count', ''))
+                    window_months = int(request.form.get('window_months', ''))
+                    attendance_type_id = int(request.form['attendance_type_id']) if request.form.get('attendance_type_id') else None
+                    if not name or max_count < 0 or window_months < 1:
+                        raise ValueError
+                    rule = AttendanceRule(name=name, status_code=attendance_status_code(request.form.get('status', '')),
+                                          max_count=max_count, window_months=window_months,
+                                          attendance_type_id=attendance_type_id)
+                    s.add(rule)
+                    s.flush()
+                    opened, _ = recompute_rules(s, rule_ids=[rule.id])
+                    s.commit()
+                    flash(f"Rule '{rule.name}' added; {opened} member(s) currently break it.", "success")
+                elif action in ('toggle', 'delete'):
+                    rule = s.get(AttendanceRule, int(request.form.get('rule_id', '')))
+                    if not rule:
+                        flash("Rule not found.", "danger")
+                    elif action == 'toggle':
+                        rule.is_active = not rule.is_active
+                        rule.updated_at = datetime.utcnow()
+                        s.flush()
+                        opened, resolved = recompute_rules(s, rule_ids=[rule.id])
+                        s.commit()
+                        flash(f"Rule '{rule.name}' {'enabled' if rule.is_active else 'disabled'}; "
+                              f"{opened} alert(s) opened, {resolved} resolved.", "success")
+                    else:
+                        name = rule.name
+                        s.delete(rule)
+                        s.commit()
+                        flash(f"Rule '{name}' deleted.", "success")
+            except ValueError:
+                s.rollback()
+                flash("Invalid rule: give a name, a status, a maximum of 0 or more and a window of at least one month.", "danger")
+            except Exception as e:
+                s.rollback()
+                logger.error(f"Error updating attendance rules for tenant {tenant_id}: {str(e)}")
+                flash("An error occurred while updating the attendance rules.", "danger")
+            return redirect(url_for('attendance.attendance_rules', tenant_id=tenant_id))
+
+        rules = s.query(AttendanceRule).options(joinedload(AttendanceRule.attendance_type)).order_by(AttendanceRule.name).all()
+        attendance_types = s.query(AttendanceType).filter_by(is_active=True).order_by(AttendanceType.sort_order, AttendanceType.type).all()
+        return render_template('attendance_rules.html',
+                               tenant_id=tenant_id,
+                               tenant_display_name=tenant_display_name,
+                               rules=rules,
+                               alerts=open_alerts(s),
+                               statuses=ATTENDANCE_STATUSES,
+                               status_letters=ATTENDANCE_STATUS_LETTERS,
+                               attendance_types=attendance_types)
+
+
 def _attendance_view(tenant_id, editable=True):
     """Common attendance view logic"""
     tenant_display_name = Config.TENANT_DISPLAY_NAMES.get(tenant_id, tenant_id.capitalize())
@@ -357,15 +386,13 @@ def _attendance_view(tenant_id, editable=True):
                     return redirect(url_for('attendance.attendance_create', tenant_id=tenant_id))
 
                 # Process attendance only for selected users (those with checkboxes checked)
-                records_created = 0
-                for user in all_users:
-                    # Check if this user was selected via checkbox
-                    user_selected = request.form.get(f'select_{user.id}') == 'on'
-                    attendance_value = request.form.get(f'attendance_{user.id}')
-
-                    # Only process if user is selected AND has attendance value
-                    if user_selected and attendance_value:
-                        if use_legacy_mode:
+                statuses = submitted_statuses(request.form)
+
+                if use_legacy_mode:
+                    records_created = 0
+                    for user in all_users:
+                        attendance_value = statuses.get(user.id)
+                        if attendance_value:
                             # Legacy mode: use event_name field (before migration)
                             existing_record = s.query(AttendanceRecord).filter_by(
                                 user_id=user.id,
@@ -374,7 +401,7 @@ def _attendance_view(tenant_id, editable=True):
 
                             if existing_record:
                                 # Update existing record
-                                existing_record.status = attendance_value
+                                existing_record.status_code = attendance_status_code(attendance_value)
                                 existing_record.updated_at = datetime.utcnow()
                             else:
                                 # Create new record with event_name
@@ -382,39 +409,26 @@ def _attendance_view(tenant_id, editable=True):
                                     user_id=user.id,
                                     event_name='Meeting',  # Default event name
                                     event_date=parsed_date,
-                                    status=attendance_value,
+                                    status_code=attendance_status_code(attendance_value),
                                     created_at=datetime.utcnow(),
                                     updated_at=datetime.utcnow()
                                 )
                                 s.add(new_record)
                                 records_created += 1
-                        else:
-                            # New mode: use attendance_type_id
-                            existing_record = s.query(AttendanceRecord).filter_by(
-                                user_id=user.id,
-                                event_date=parsed_date,
-                                attendance_type_id=attendance_type_id
-                            ).first()
 
-                            if existing_record:
-                                # Update existing record
-                                existing_record.status = attendance_value
-                                existing_record.updated_at = datetime.utcnow()
-                            else:
-                                # Create new record
-                                new_record = AttendanceRecord(
-                                    user_id=user.id,
-                                    attendance_type_id=attendance_type_id,
-                                    event_date=parsed_date,
-                                    status=attendance_value,
-                                    created_at=datetime.utcnow(),
-                                    updated_at=datetime.utcnow()
-                                )
-                                s.add(new_record)
-                                records_created += 1
-
-                s.commit()
-                flash(f"Attendance saved successfully! {records_created} new records created.", "success")
+                    s.commit()
+                    flash(f"Attendance saved successfully! {records_created} new records created.", "success")
+                else:
+                    # New mode: one INSERT ... ON CONFLICT DO UPDATE for the whole matrix
+                    created, updated, unchanged = upsert_attendance(s, [{
+                        'user_id': user_id,
+                        'attendance_type_id': int(attendance_type_id),
+                        'event_date': parsed_date.date(),
+                        'status': attendance_value,
+                    } for user_id, attendance_value in statuses.items()])
+                    s.commit()
+                    flash(f"Attendance saved successfully! {created} new records created, {updated} updated, "
+                          f"{unchanged} unchanged.", "success")
 
             except Exception as e:
                 s.rollback()
@@ -433,7 +447,7 @@ def _attendance_view(tenant_id, editable=True):
             ).all()
 
             for record in today_records:
-                existing_attendance[record.user_id] = record.status
+                existing_attendance[record.user_id] = ATTENDANCE_STATUS_LETTERS[record.status_code]
 
         return render_template('attendance_matrix.html',
                              tenant_id=tenant_id,
@@ -493,9 +507,7 @@ def pale_report_filter(tenant_id):
        with get_tenant_db_session(tenant_id) as db_session:
            try:
                # Get all active members for the filter dropdown with proper error handling
-               all_members = db_session.query(User).filter_by(is_active=True).order_by(
-                   User.last_name, User.first_name
-               ).all()
+               all_members = get_member_directory(db_session, tenant_id).entries(active_only=True)
 
                # Log successful data retrieval
                logger.info(f"PALE report filter loaded successfully for tenant: {tenant_id}")
@@ -694,19 +706,20 @@ def pale_report(tenant_id):
 
            # Generate appropriate report based on type
            if report_type == 'detail':
-               # Detail report shows every attendance record
-               detail_data = generate_pale_detail(s, start_date, end_date, member_filter)
+               # Detail report shows every attendance record; the CSV is streamed from the database
                if report_format == 'csv':
-                   return generate_pale_detail_csv(detail_data, tenant_display_name, current_user, start_date, end_date)
-               else:
-                   return generate_pale_detail_pdf(detail_data, tenant_display_name, current_user, start_date, end_date)
-           else:
+                   return generate_pale_detail_csv(tenant_id, tenant_display_name, start_date, end_date, member_filter)
+           elif report_format == 'csv':
                # Summary report shows totals by member
                attendance_summary = generate_pale_summary(s, start_date, end_date, member_filter)
-               if report_format == 'csv':
-                   return generate_pale_csv_report(attendance_summary, tenant_display_name, current_user, start_date, end_date)
-               else:
-                   return generate_pale_pdf_report(attendance_summary, tenant_display_name, current_user, start_date, end_date)
+               return generate_pale_csv_report(attendance_summary, tenant_display_name, current_user, start_date, end_date)
+
+           # PDFs are rendered on the background pool and cached until the attendance data changes
+           report_name = 'pale_detail' if report_type == 'detail' else 'pale_report'
+           params = {'start_date': start_date, 'end_date': end_date, 'member_filter': member_filter}
+           job_id = pdf_job_id(tenant_id, report_name, params, pale_report_version(s, start_date, end_date, member_filter))
+           start_pdf_job(tenant_id, job_id, render_pale_pdf, tenant_id, report_type, tenant_display_name, start_date, end_date, member_filter)
+           return pdf_job_response(tenant_id, job_id, 'attendance', tenant_display_name)
 
    except Exception as e:
        logger.error(f"Error in pale_report: {str(e)}")
@@ -714,98 +727,73 @@ def pale_report(tenant_id):
        return redirect(url_for('attendance.attendance_history', tenant_id=tenant_id))
 
 
-def generate_pale_summary(db_session, start_date, end_date, member_filter):
-   """Generate PALE attendance summary data"""
-   try:
-       logger.info(f"Generating PALE summary - start_date: {start_date}, end_date: {end_date}, member_filter: {member_filter}")
-       
-       # Get all active members (or specific member if filtered)
-       if member_filter:
-           members = db_session.query(User).filter_by(id=member_filter, is_active=True).all()
-       else:
-           members = db_session.query(User).filter_by(is_active=True).order_by(User.last_name, User.first_name).all()
-
-       logger.info(f"Found {len(members)} active members")
-
-       # Initialize member summary with all members set to zero counts
-       member_summary = {}
-       for member in members:
-           member_summary[member.id] = {
-               'member': member,
-               'counts': {'P': 0, 'A': 0, 'L': 0, 'E': 0}
-           }
+@attendance_bp.route('/<tenant_id>/pdf_jobs/<job_id>')
+def pdf_job(tenant_id, job_id):
+   """Poll URL for a background PALE PDF"""
+   if 'user_id' not in session or session['tenant_id'] != tenant_id:
+       return jsonify({'error': 'Not logged in'}), 401
+   if not session.get('user_permissions', {}).get('can_edit_attendance', False):
+       return jsonify({'error': 'Permission denied'}), 403
+   return pdf_job_status_response(tenant_id, job_id, 'attendance', PALE_PDF_REPORTS)
 
-       # Query attendance records with filters
-       query = db_session.query(AttendanceRecord).join(User)
 
-       # Apply date range filter to event_date
-       if start_date:
-           query = query.filter(AttendanceRecord.event_date >= start_date)
-       if end_date:
-           query = query.filter(AttendanceRecord.event_date <= end_date)
+@attendance_bp.route('/<tenant_id>/pdf_jobs/<job_id>/download')
+def pdf_job_download(tenant_id, job_id):
+   if 'user_id' not in session or session['tenant_id'] != tenant_id:
+       flash("You must be logged in to view this page.", "danger")
+       return redirect(url_for('auth.login', tenant_id=tenant_id))
+   if not session.get('user_permissions', {}).get('can_edit_attendance', False):
+       flash("You do not have permission to view attendance reports.", "danger")
+       return redirect(url_for('attendance.attendance_history', tenant_id=tenant_id))
 
-       # Apply member filter if provided
-       if member_filter:
-           query = query.filter(AttendanceRecord.user_id == member_filter)
-       else:
-           # Only get records for active members
-           query = query.filter(User.is_active == True)
-
-       attendance_records = query.all()
-       logger.info(f"Found {len(attendance_records)} attendance records in date range")
-
-       # Aggregate attendance records into the member summary
-       for record in attendance_records:
-           member_id = record.user_id
-           logger.info(f"Processing record: user_id={member_id}, status='{record.status}', date={record.event_date}")
-           
-           if member_id in member_summary:
-               # Map attendance status to P/A/L/E codes (case-insensitive)
-               status = record.status.upper().strip()
-               logger.info(f"Status after upper/strip: '{status}'")
-               
-               if status == 'PRESENT' or status == 'P':
-                   member_summary[member_id]['counts']['P'] += 1
-                   logger.info(f"Incremented P for user {member_id}")
-               elif status == 'ABSENT' or status == 'A':
-                   member_summary[member_id]['counts']['A'] += 1
-                   logger.info(f"Incremented A for user {member_id}")
-               elif status == 'LATE' or status == 'L':
-                   member_summary[member_id]['counts']['L'] += 1
-                   logger.info(f"Incremented L for user {member_id}")
-               elif status == 'EXCUSED' or status == 'E':
-                   member_summary[member_id]['counts']['E'] += 1
-                   logger.info(f"Incremented E for user {member_id}")
-               else:
-                   logger.warning(f"Unknown status '{status}' for record id {record.id}")
-           else:
-               logger.warning(f"Member {member_id} not in member_summary")
-
-       # Convert to list format for reporting
-       summary_data = []
-       for member_id, data in member_summary.items():
-           member = data['member']
-           counts = data['counts']
+   response = send_pdf_job(tenant_id, job_id, PALE_PDF_REPORTS)
+   if response is None:
+       flash("This report is no longer available. Please generate it again.", "warning")
+       return redirect(url_for('attendance.pale_report_filter', tenant_id=tenant_id))
+   return response
+
+
+def pale_counts_query(db_session, start_date, end_date, member_filter):
+   """
+   One row per active member (or the filtered member): id, names, company, phones and
+   P/A/L/E counts. Whole months are read from the monthly rollup and only the partial months
+   at the ends of the range from attendance_record (see rollup.status_counts); the per-member
+   totals are LEFT JOINed to the members, so members without records get zeros.
+   """
+   source = status_counts(db_session, start_date, end_date, member_filter)
+   counts = db_session.query(
+       source.c.user_id.label('user_id'),
+       *[func.sum(source.c.record_count).filter(source.c.status_code == code).label(label)
+         for label, code in PALE_STATUS_CODES]
+   ).group_by(source.c.user_id).subquery()
+
+   query = db_session.query(
+       User.id, User.first_name, User.last_name, User.company, User.cell_phone, User.company_phone,
+       *[func.coalesce(counts.c[label], 0).label(label) for label, _ in PALE_STATUS_CODES]
+   ).outerjoin(counts, counts.c.user_id == User.id).filter(User.is_active == True)
+   if member_filter:
+       query = query.filter(User.id == member_filter)
+   return query
 
-           # Get all phone numbers
-           phone_numbers = []
-           if hasattr(member, 'cell_phone') and member.cell_phone:
-               phone_numbers.append(member.cell_phone)
-           if hasattr(member, 'company_phone') and member.company_phone:
-               phone_numbers.append(member.company_phone)
 
+def generate_pale_summary(db_session, start_date, end_date, member_filter):
+   """Generate PALE attendance summary data"""
+   try:
+       summary_data = []
+       for row in pale_counts_query(db_session, start_date, end_date, member_filter):
            summary_data.append({
-               'member_name': f"{member.first_name} {member.last_name}",
-               'company': getattr(member, 'company', ''),
-               'phone_numbers': ', '.join(phone_numbers),
-               'present_count': counts['P'],
-               'absent_count': counts['A'],
-               'late_count': counts['L'],
-               'excused_count': counts['E']
+               'member_name': f"{row.first_name} {row.last_name}",
+               'company': row.company,
+               'phone_numbers': ', '.join(phone for phone in (row.cell_phone, row.company_phone) if phone),
+               'present_count': row.present_count,
+               'absent_count': row.absent_count,
+               'late_count': row.late_count,
+               'excused_count': row.excused_count
            })
 
        # Sort by member name
        summary_data.sort(key=lambda x: x['member_name'])
+       logger.info(f"PALE summary for {len(summary_data)} members - start_date: {start_date}, end_date: {end_date}, member_filter: {member_filter}")
 
        return summary_data
 
@@ -816,228 +804,226 @@ def generate_pale_summary(db_session, start_date, end_date, member_filter):
 
 def generate_pale_csv_report(summary_data, tenant_name, current_user, start_date, end_date):
    """Generate CSV report for PALE attendance summary"""
-   output = StringIO()
-   writer = csv.writer(output)
+   def rows():
+      # Write headers
+      yield [tenant_name]
+      yield ['PALE Attendance Report']
+      if start_date or end_date:
+          date_range = ''
+          if start_date:
+              date_range += f'From {start_date}'
+          if end_date:
+              date_range += f' To {end_date}'
+          yield [date_range]
+      yield [f'{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}']
+      yield []  # Empty row
+
+      # Write column headers
+      yield ['Member Name', 'Company', 'Phone Numbers', 'P', 'A', 'L', 'E']
+
+      # Write data rows
+      for record in summary_data:
+          yield [
+              record['member_name'],
+              record['company'],
+              record['phone_numbers'],
+              record['present_count'],
+              record['absent_count'],
+              record['late_count'],
+              record['excused_count']
+          ]
+
+      # Write summary
+      yield []  # Empty row
+      total_present = sum(r['present_count'] for r in summary_data)
+      total_absent = sum(r['absent_count'] for r in summary_data)
+      total_late = sum(r['late_count'] for r in summary_data)
+      total_excused = sum(r['excused_count'] for r in summary_data)
+      total_records = len(summary_data)
+
+      yield [f'Totals: {total_records} members, P: {total_present}, A: {total_absent}, L: {total_late}, E: {total_excused}']
+
+   return csv_download(rows(), f'pale_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
+
+
+def render_pale_pdf(tenant_id, report_type, tenant_name, start_date, end_date, member_filter):
+   """Load and render a PALE PDF; runs on the background PDF pool with its own session"""
+   with get_tenant_db_session(tenant_id) as s:
+       if report_type == 'detail':
+           detail_data = generate_pale_detail(s, start_date, end_date, member_filter)
+           return generate_pale_detail_pdf(detail_data, tenant_name, start_date, end_date)
+       attendance_summary = generate_pale_summary(s, start_date, end_date, member_filter)
+       return generate_pale_pdf_report(attendance_summary, tenant_name, start_date, end_date)
+
+
+def generate_pale_pdf_report(summary_data, tenant_name, start_date, end_date):
+   """Render the PALE attendance summary PDF and return its bytes (raises ImportError without reportlab)"""
+   from reportlab.lib.pagesizes import letter
+   from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+   from reportlab.lib import colors
+
+   buffer = BytesIO()
+   doc = SimpleDocTemplate(
+       buffer,
+       pagesize=letter,
+       topMargin=0.75*72,
+       bottomMargin=0.75*72,
+       leftMargin=0.75*72,
+       rightMargin=0.75*72
+   )
+   styles = pdf_stylesheet()
+   story = []
 
-   # Write headers
-   writer.writerow([tenant_name])
-   writer.writerow(['PALE Attendance Report'])
+   # Title
+   title = Paragraph(f"<para align='center'>{tenant_name}</para>", styles['Heading1'])
+   story.append(title)
+   story.append(Spacer(1, 1))
+
+   # Report title
+   report_title = Paragraph("<para align='center'>PALE Attendance Report</para>", styles['Heading2'])
+   story.append(report_title)
+   story.append(Spacer(1, 1))
+
+   # Date range if provided
    if start_date or end_date:
-       date_range = ''
+       date_range_text = ''
        if start_date:
-           date_range += f'From {start_date}'
+           date_range_text += f'From {start_date}'
        if end_date:
-           date_range += f' To {end_date}'
-       writer.writerow([date_range])
-   writer.writerow([f'{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'])
-   writer.writerow([])  # Empty row
+           date_range_text += f' To {end_date}'
+       date_range = Paragraph(f"<para align='center'>{date_range_text}</para>", styles['Normal'])
+       story.append(date_range)
+       story.append(Spacer(1, 1))
 
-   # Write column headers
-   writer.writerow(['Member Name', 'Company', 'Phone Numbers', 'P', 'A', 'L', 'E'])
+   # Generation info
+   gen_info = Paragraph(f"<para align='center'>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</para>", styles['Normal'])
+   story.append(gen_info)
+   story.append(Spacer(1, 3))
+
+   # Table data
+   data = [['Member Name', 'Company', 'Phone Numbers', 'P', 'A', 'L', 'E']]
 
-   # Write data rows
    for record in summary_data:
-       writer.writerow([
+       data.append([
            record['member_name'],
            record['company'],
            record['phone_numbers'],
-           record['present_count'],
-           record['absent_count'],
-           record['late_count'],
-           record['excused_count']
+           str(record['present_count']),
+           str(record['absent_count']),
+           str(record['late_count']),
+           str(record['excused_count'])
        ])
 
-   # Write summary
-   writer.writerow([])  # Empty row
+   # Summary row
    total_present = sum(r['present_count'] for r in summary_data)
    total_absent = sum(r['absent_count'] for r in summary_data)
    total_late = sum(r['late_count'] for r in summary_data)
    total_excused = sum(r['excused_count'] for r in summary_data)
-   total_records = len(summary_data)
-
-   writer.writerow([f'Totals: {total_records} members, P: {total_present}, A: {total_absent}, L: {total_late}, E: {total_excused}'])
-
-   # Prepare response
-   output.seek(0)
-   response = Response(
-       output.getvalue(),
-       mimetype='text/csv',
-       headers={'Content-disposition': f'attachment; filename=pale_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'}
+   total_members = len(summary_data)
+
+   data.append([
+       f'Totals: {total_members} members',
+       '',
+       '',
+       str(total_present),
+       str(total_absent),
+       str(total_late),
+       str(total_excused)
+   ])
+
+   # Create table
+   table = Table(data)
+   table.setStyle(TableStyle([
+       ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+       ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Left align Member Name column
+       ('ALIGN', (1, 0), (1, -1), 'LEFT'),  # Left align Company column
+       ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+       ('FONTSIZE', (0, 0), (-1, 0), 14),
+       ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+       ('FONTSIZE', (0, 1), (-1, -2), 12),
+       ('BOTTOMPADDING', (0, 1), (-1, -2), 8),
+       ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+       ('FONTSIZE', (0, -1), (-1, -1), 12),
+       ('BOTTOMPADDING', (0, -1), (-1, -1), 8)
+   ]))
+
+   story.append(table)
+
+   # Build PDF
+   doc.build(story)
+   return buffer.getvalue()
+
+
+def _filter_pale_records(query, start_date, end_date, member_filter):
+   # Apply date range filter to event_date
+   if start_date:
+       query = query.filter(AttendanceRecord.event_date >= start_date)
+   if end_date:
+       query = query.filter(AttendanceRecord.event_date <= end_date)
+
+   # Apply member filter if provided
+   if member_filter:
+       query = query.filter(AttendanceRecord.user_id == member_filter)
+   else:
+       # Only get records for active members
+       query = query.filter(User.is_active == True)
+   return query
+
+
+def pale_detail_query(db_session, start_date, end_date, member_filter):
+   """Column-only query behind the PALE detail report, ordered by event date, then member name"""
+   query = db_session.query(
+       User.first_name,
+       User.last_name,
+       User.company,
+       User.cell_phone,
+       User.company_phone,
+       AttendanceRecord.event_date,
+       AttendanceRecord.status_code
+   ).select_from(AttendanceRecord).join(User, AttendanceRecord.user_id == User.id)
+   return _filter_pale_records(query, start_date, end_date, member_filter).order_by(
+       AttendanceRecord.event_date, User.last_name, User.first_name
    )
-   return response
 
 
-def generate_pale_pdf_report(summary_data, tenant_name, current_user, start_date, end_date):
-   """Generate PDF report for PALE attendance summary"""
-   try:
-       from reportlab.lib.pagesizes import letter
-       from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-       from reportlab.lib.styles import getSampleStyleSheet
-       from reportlab.lib import colors
-
-       buffer = BytesIO()
-       doc = SimpleDocTemplate(
-           buffer,
-           pagesize=letter,
-           topMargin=0.75*72,
-           bottomMargin=0.75*72,
-           leftMargin=0.75*72,
-           rightMargin=0.75*72
-       )
-       styles = getSampleStyleSheet()
-       story = []
-
-       # Title
-       title = Paragraph(f"<para align='center'>{tenant_name}</para>", styles['Heading1'])
-       story.append(title)
-       story.append(Spacer(1, 1))
-
-       # Report title
-       report_title = Paragraph("<para align='center'>PALE Attendance Report</para>", styles['Heading2'])
-       story.append(report_title)
-       story.append(Spacer(1, 1))
-
-       # Date range if provided
-       if start_date or end_date:
-           date_range_text = ''
-           if start_date:
-               date_range_text += f'From {start_date}'
-           if end_date:
-               date_range_text += f' To {end_date}'
-           date_range = Paragraph(f"<para align='center'>{date_range_text}</para>", styles['Normal'])
-           story.append(date_range)
-           story.append(Spacer(1, 1))
-
-       # Generation info
-       gen_info = Paragraph(f"<para align='center'>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</para>", styles['Normal'])
-       story.append(gen_info)
-       story.append(Spacer(1, 3))
-
-       # Table data
-       data = [['Member Name', 'Company', 'Phone Numbers', 'P', 'A', 'L', 'E']]
-
-       for record in summary_data:
-           data.append([
-               record['member_name'],
-               record['company'],
-               record['phone_numbers'],
-               str(record['present_count']),
-               str(record['absent_count']),
-               str(record['late_count']),
-               str(record['excused_count'])
-           ])
-
-       # Summary row
-       total_present = sum(r['present_count'] for r in summary_data)
-       total_absent = sum(r['absent_count'] for r in summary_data)
-       total_late = sum(r['late_count'] for r in summary_data)
-       total_excused = sum(r['excused_count'] for r in summary_data)
-       total_members = len(summary_data)
-
-       data.append([
-           f'Totals: {total_members} members',
-           '',
-           '',
-           str(total_present),
-           str(total_absent),
-           str(total_late),
-           str(total_excused)
-       ])
-
-       # Create table
-       table = Table(data)
-       table.setStyle(TableStyle([
-           ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-           ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Left align Member Name column
-           ('ALIGN', (1, 0), (1, -1), 'LEFT'),  # Left align Company column
-           ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-           ('FONTSIZE', (0, 0), (-1, 0), 14),
-           ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-           ('FONTSIZE', (0, 1), (-1, -2), 12),
-           ('BOTTOMPADDING', (0, 1), (-1, -2), 8),
-           ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-           ('FONTSIZE', (0, -1), (-1, -1), 12),
-           ('BOTTOMPADDING', (0, -1), (-1, -1), 8)
-       ]))
-
-       story.append(table)
-
-       # Build PDF
-       doc.build(story)
-
-       # Prepare response
-       buffer.seek(0)
-       response = Response(
-           buffer.getvalue(),
-           mimetype='application/pdf',
-           headers={'Content-disposition': f'attachment; filename=pale_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'}
-       )
-       return response
-
-   except ImportError:
-       error_response = Response(
-           "PDF generation requires reportlab library. Please install it first.",
-           status=500,
-           mimetype='text/plain'
-       )
-       return error_response
+def pale_report_version(db_session, start_date, end_date, member_filter):
+   """Cheap fingerprint of the attendance rows behind a PALE report, used to key cached PDFs"""
+   query = db_session.query(
+       func.count(AttendanceRecord.id),
+       func.max(AttendanceRecord.id),
+       func.max(AttendanceRecord.updated_at)
+   ).select_from(AttendanceRecord).join(User, AttendanceRecord.user_id == User.id)
+   version = list(_filter_pale_records(query, start_date, end_date, member_filter).one())
+   # Names, phone numbers and active flags are printed too
+   version.append(db_session.query(func.max(User.updated_at)).scalar())
+   return version
+
+
+def _pale_detail_row(row):
+   """Convert one pale_detail_query row to the detail format with P/A/L/E columns"""
+   first_name, last_name, company, cell_phone, company_phone, event_date, status_code = row
+
+   # Map status code to P/A/L/E marks
+   status = ATTENDANCE_STATUS_LETTERS.get(status_code)
+   return {
+       'member_name': f"{first_name} {last_name}",
+       'company': company or '',
+       'phone_numbers': ', '.join(phone for phone in (cell_phone, company_phone) if phone),
+       'event_date': event_date,
+       'p_mark': 'X' if status == 'P' else '',
+       'a_mark': 'X' if status == 'A' else '',
+       'l_mark': 'X' if status == 'L' else '',
+       'e_mark': 'X' if status == 'E' else ''
+   }
 
 
 def generate_pale_detail(db_session, start_date, end_date, member_filter):
    """Generate detailed PALE attendance data showing every record"""
    try:
        logger.info(f"Generating PALE detail - start_date: {start_date}, end_date: {end_date}, member_filter: {member_filter}")
-       
-       # Query attendance records with filters
-       query = db_session.query(AttendanceRecord).join(User)
-
-       # Apply date range filter to event_date
-       if start_date:
-           query = query.filter(AttendanceRecord.event_date >= start_date)
-       if end_date:
-           query = query.filter(AttendanceRecord.event_date <= end_date)
-
-       # Apply member filter if provided
-       if member_filter:
-           query = query.filter(AttendanceRecord.user_id == member_filter)
-       else:
-           # Only get records for active members
-           query = query.filter(User.is_active == True)
-
-       # Order by event date, then member name
-       attendance_records = query.order_by(AttendanceRecord.event_date, User.last_name, User.first_name).all()
-       logger.info(f"Found {len(attendance_records)} attendance records for detail report")
-
-       # Convert to detail format with P/A/L/E columns
-       detail_data = []
-       for record in attendance_records:
-           member = record.user
-           
-           # Get phone numbers
-           phone_numbers = []
-           if hasattr(member, 'cell_phone') and member.cell_phone:
-               phone_numbers.append(member.cell_phone)
-           if hasattr(member, 'company_phone') and member.company_phone:
-               phone_numbers.append(member.company_phone)
-
-           # Map status to P/A/L/E marks
-           status = record.status.upper().strip()
-           p_mark = 'X' if status in ('PRESENT', 'P') else ''
-           a_mark = 'X' if status in ('ABSENT', 'A') else ''
-           l_mark = 'X' if status in ('LATE', 'L') else ''
-           e_mark = 'X' if status in ('EXCUSED', 'E') else ''
-
-           detail_data.append({
-               'member_name': f"{member.first_name} {member.last_name}",
-               'company': getattr(member, 'company', ''),
-               'phone_numbers': ', '.join(phone_numbers),
-               'event_date': record.event_date,
-               'p_mark': p_mark,
-               'a_mark': a_mark,
-               'l_mark': l_mark,
-               'e_mark': e_mark
-           })
 
+       detail_data = [_pale_detail_row(row) for row in pale_detail_query(db_session, start_date, end_date, member_filter)]
+       logger.info(f"Found {len(detail_data)} attendance records for detail report")
        return detail_data
 
    except Exception as e:
@@ -1045,30 +1031,29 @@ def generate_pale_detail(db_session, start_date, end_date, member_filter):
        return []
 
 
-def generate_pale_detail_csv(detail_data, tenant_name, current_user, start_date, end_date):
-   """Generate CSV detail report for PALE attendance"""
-   output = StringIO()
-   writer = csv.writer(output)
-
+def pale_detail_csv_rows(db_session, tenant_name, start_date, end_date, member_filter):
+   """CSV rows for the PALE detail report, read from a server-side cursor in batches"""
    # Write headers
-   writer.writerow([tenant_name])
-   writer.writerow(['PALE Attendance Detail Report'])
+   yield [tenant_name]
+   yield ['PALE Attendance Detail Report']
    if start_date or end_date:
        date_range = ''
        if start_date:
            date_range += f'From {start_date}'
        if end_date:
            date_range += f' To {end_date}'
-       writer.writerow([date_range])
-   writer.writerow([f'{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'])
-   writer.writerow([])  # Empty row
+       yield [date_range]
+   yield [f'{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}']
+   yield []  # Empty row
 
    # Write column headers
-   writer.writerow(['Member Name', 'Company', 'Phone Numbers', 'Event Date', 'P', 'A', 'L', 'E'])
+   yield ['Member Name', 'Company', 'Phone Numbers', 'Event Date', 'P', 'A', 'L', 'E']
 
    # Write data rows
-   for record in detail_data:
-       writer.writerow([
+   total_records = 0
+   for row in pale_detail_query(db_session, start_date, end_date, member_filter).yield_per(STREAM_BATCH_SIZE):
+       record = _pale_detail_row(row)
+       yield [
            record['member_name'],
            record['company'],
            record['phone_numbers'],
@@ -1077,131 +1062,113 @@ def generate_pale_detail_csv(detail_data, tenant_name, current_user, start_date,
            record['a_mark'],
            record['l_mark'],
            record['e_mark']
-       ])
+       ]
+       total_records += 1
 
    # Write summary
-   writer.writerow([])  # Empty row
-   total_records = len(detail_data)
-   writer.writerow([f'Total Records: {total_records}'])
-
-   # Prepare response
-   output.seek(0)
-   response = Response(
-       output.getvalue(),
-       mimetype='text/csv',
-       headers={'Content-disposition': f'attachment; filename=pale_detail_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'}
+   yield []  # Empty row
+   yield [f'Total Records: {total_records}']
+
+
+def generate_pale_detail_csv(tenant_id, tenant_name, start_date, end_date, member_filter):
+   """Stream CSV detail report for PALE attendance"""
+   def rows():
+       with get_tenant_db_session(tenant_id) as s:
+           yield from pale_detail_csv_rows(s, tenant_name, start_date, end_date, member_filter)
+
+   return csv_download(rows(), f'pale_detail_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
+
+
+def generate_pale_detail_pdf(detail_data, tenant_name, start_date, end_date):
+   """Render the PALE attendance detail PDF and return its bytes (raises ImportError without reportlab)"""
+   from reportlab.lib.pagesizes import letter
+   from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+   from reportlab.lib import colors
+
+   buffer = BytesIO()
+   doc = SimpleDocTemplate(
+       buffer,
+       pagesize=letter,
+       topMargin=0.75*72,
+       bottomMargin=0.75*72,
+       leftMargin=0.75*72,
+       rightMargin=0.75*72
    )
-   return response
+   styles = pdf_stylesheet()
+   story = []
 
+   # Title
+   title = Paragraph(f"<para align='center'>{tenant_name}</para>", styles['Heading1'])
+   story.append(title)
+   story.append(Spacer(1, 1))
 
-def generate_pale_detail_pdf(detail_data, tenant_name, current_user, start_date, end_date):
-   """Generate PDF detail report for PALE attendance"""
-   try:
-       from reportlab.lib.pagesizes import letter
-       from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-       from reportlab.lib.styles import getSampleStyleSheet
-       from reportlab.lib import colors
-
-       buffer = BytesIO()
-       doc = SimpleDocTemplate(
-           buffer,
-           pagesize=letter,
-           topMargin=0.75*72,
-           bottomMargin=0.75*72,
-           leftMargin=0.75*72,
-           rightMargin=0.75*72
-       )
-       styles = getSampleStyleSheet()
-       story = []
-
-       # Title
-       title = Paragraph(f"<para align='center'>{tenant_name}</para>", styles['Heading1'])
-       story.append(title)
-       story.append(Spacer(1, 1))
+   # Report title
+   report_title = Paragraph("<para align='center'>PALE Attendance Detail Report</para>", styles['Heading2'])
+   story.append(report_title)
+   story.append(Spacer(1, 1))
 
-       # Report title
-       report_title = Paragraph("<para align='center'>PALE Attendance Detail Report</para>", styles['Heading2'])
-       story.append(report_title)
+   # Date range if provided
+   if start_date or end_date:
+       date_range_text = ''
+       if start_date:
+           date_range_text += f'From {start_date}'
+       if end_date:
+           date_range_text += f' To {end_date}'
+       date_range = Paragraph(f"<para align='center'>{date_range_text}</para>", styles['Normal'])
+       story.append(date_range)
        story.append(Spacer(1, 1))
 
-       # Date range if provided
-       if start_date or end_date:
-           date_range_text = ''
-           if start_date:
-               date_range_text += f'From {start_date}'
-           if end_date:
-               date_range_text += f' To {end_date}'
-           date_range = Paragraph(f"<para align='center'>{date_range_text}</para>", styles['Normal'])
-           story.append(date_range)
-           story.append(Spacer(1, 1))
-
-       # Generation info
-       gen_info = Paragraph(f"<para align='center'>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</para>", styles['Normal'])
-       story.append(gen_info)
-       story.append(Spacer(1, 3))
-
-       # Table data
-       data = [['Member Name', 'Company', 'Phone Numbers', 'Event Date', 'P', 'A', 'L', 'E']]
-
-       for record in detail_data:
-           data.append([
-               record['member_name'],
-               record['company'],
-               record['phone_numbers'],
-               record['event_date'].strftime('%Y-%m-%d'),
-               record['p_mark'],
-               record['a_mark'],
-               record['l_mark'],
-               record['e_mark']
-           ])
-
-       # Summary row
-       total_records = len(detail_data)
+   # Generation info
+   gen_info = Paragraph(f"<para align='center'>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</para>", styles['Normal'])
+   story.append(gen_info)
+   story.append(Spacer(1, 3))
+
+   # Table data
+   data = [['Member Name', 'Company', 'Phone Numbers', 'Event Date', 'P', 'A', 'L', 'E']]
+
+   for record in detail_data:
        data.append([
-           f'Total Records: {total_records}',
-           '',
-           '',
-           '',
-           '',
-           '',
-           '',
-           ''
+           record['member_name'],
+           record['company'],
+           record['phone_numbers'],
+           record['event_date'].strftime('%Y-%m-%d'),
+           record['p_mark'],
+           record['a_mark'],
+           record['l_mark'],
+           record['e_mark']
        ])
 
-       # Create table
-       table = Table(data)
-       table.setStyle(TableStyle([
-           ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-           ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Left align Member Name column
-           ('ALIGN', (1, 0), (1, -1), 'LEFT'),  # Left align Company column
-           ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-           ('FONTSIZE', (0, 0), (-1, 0), 14),
-           ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-           ('FONTSIZE', (0, 1), (-1, -2), 12),
-           ('BOTTOMPADDING', (0, 1), (-1, -2), 8),
-           ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-           ('FONTSIZE', (0, -1), (-1, -1), 12),
-           ('BOTTOMPADDING', (0, -1), (-1, -1), 8)
-       ]))
-
-       story.append(table)
-
-       # Build PDF
-       doc.build(story)
-
-       # Prepare response
-       buffer.seek(0)
-       response = Response(
-           buffer.getvalue(),
-           mimetype='application/pdf',
-           headers={'Content-disposition': f'attachment; filename=pale_detail_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'}
-       )
-       return response
-
-   except ImportError:
-       error_response = Response(
-           "PDF generation requires reportlab library. Please install it first.",
-           status=500,
-           mimetype='text/plain'
-       )
-       return error_response
+   # Summary row
+   total_records = len(detail_data)
+   data.append([
+       f'Total Records: {total_records}',
+       '',
+       '',
+       '',
+       '',
+       '',
+       '',
+       ''
+   ])
+
+   # Create table
+   table = Table(data)
+   table.setStyle(TableStyle([
+       ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+       ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Left align Member Name column
+       ('ALIGN', (1, 0), (1, -1), 'LEFT'),  # Left align Company column
+       ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+       ('FONTSIZE', (0, 0), (-1, 0), 14),
+       ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+       ('FONTSIZE', (0, 1), (-1, -2), 12),
+       ('BOTTOMPADDING', (0, 1), (-1, -2), 8),
+       ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+       ('FONTSIZE', (0, -1), (-1, -1), 12),
+       ('BOTTOMPADDING', (0, -1), (-1, -1), 8)
+   ]))
+
+   story.append(table)
+
+   # Build PDF
+   doc.build(story)
+   return buffer.getvalue()
@@ -0,0 +1,143 @@
+# app/attendance/rules.py
+
+from calendar import monthrange
+from datetime import date, datetime
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import attributes, joinedload
+from app.models import User, AttendanceRecord, AttendanceRule, AttendanceAlert
+from app.commit_hooks import CommitKeyTracker
+
+# Rule counts are not stored: every evaluation recounts the window from attendance_record.
+# For the few members a save touched that is one range scan each of the
+# (user_id, event_date, attendance_type_id) unique key, and a full pass is one range scan of
+# ix_attendance_record_date_status_user per rule. Recounting also means records ageing out of
+# a window need no expiry bookkeeping; the daily full pass moves every window on.
+
+# Session.info key holding the members whose rules must be re-evaluated before commit
+RULE_MEMBERS_KEY = 'attendance_rule_members'
+
+
+def mark_rule_members(s, user_ids):
+    """Queue members for rule evaluation when the session commits (for Core writes)."""
+    _rule_members.mark(s, (user_id for user_id in user_ids if user_id))
+
+
+def window_start(as_of, months):
+    """The day `months` months before as_of (clamped to the end of shorter months); the window is (start, as_of]."""
+    year, month = divmod(as_of.year * 12 + as_of.month - 1 - months, 12)
+    return date(year, month + 1, min(as_of.day, monthrange(year, month + 1)[1]))
+
+
+def _window_counts(s, rule, start, as_of, user_ids=None):
+    """{user_id: records counted by the rule in (start, as_of]} for active members."""
+    query = s.query(AttendanceRecord.user_id, func.count()).join(User, AttendanceRecord.user_id == User.id).filter(
+        User.is_active == True,
+        AttendanceRecord.status_code == rule.status_code,
+        AttendanceRecord.event_date > start,
+        AttendanceRecord.event_date <= as_of
+    )
+    if rule.attendance_type_id:
+        query = query.filter(AttendanceRecord.attendance_type_id == rule.attendance_type_id)
+    if user_ids is not None:
+        query = query.filter(AttendanceRecord.user_id.in_(user_ids))
+    return dict(query.group_by(AttendanceRecord.user_id))
+
+
+def _open_alert_members(s, rule_id, user_ids=None):
+    query = s.query(AttendanceAlert.user_id).filter(
+        AttendanceAlert.rule_id == rule_id, AttendanceAlert.resolved_at.is_(None)
+    )
+    if user_ids is not None:
+        query = query.filter(AttendanceAlert.user_id.in_(user_ids))
+    return {row[0] for row in query}
+
+
+def evaluate_rule(s, rule, as_of=None, user_ids=None):
+    """
+    Recount one rule's window for the given members (every active member when user_ids is
+    None), open an alert for each member over max_count and resolve the open alerts of
+    members back within it. Runs inside the caller's transaction. Returns (alerts opened,
+    alerts resolved).
+    """
+    as_of = as_of or date.today()
+    now = datetime.utcnow()
+    start = window_start(as_of, rule.window_months)
+    counts = _window_counts(s, rule, start, as_of, user_ids)
+    open_members = _open_alert_members(s, rule.id, user_ids)
+
+    # Members no longer active count nothing, so their open alerts resolve below
+    user_ids = set(counts) | open_members if user_ids is None else set(user_ids)
+
+    breaking = {user_id for user_id in user_ids if counts.get(user_id, 0) > rule.max_count}
+    opened = [{'rule_id': rule.id, 'user_id': user_id, 'window_start': start, 'window_end': as_of,
+               'count': counts[user_id], 'created_at': now} for user_id in breaking - open_members]
+    if opened:
+        s.execute(pg_insert(AttendanceAlert).values(opened).on_conflict_do_nothing(
+            index_elements=['rule_id', 'user_id'], index_where=AttendanceAlert.resolved_at.is_(None)
+        ))
+    resolved = open_members - breaking
+    if resolved:
+        alerts = AttendanceAlert.__table__
+        s.execute(alerts.update().where(
+            alerts.c.rule_id == rule.id, alerts.c.user_id.in_(resolved), alerts.c.resolved_at.is_(None)
+        ).values(resolved_at=now))
+    return len(opened), len(resolved)
+
+
+def evaluate_members(s, user_ids, as_of=None):
+    """Re-evaluate every active rule for the given members. Returns (alerts opened, alerts resolved)."""
+    opened = resolved = 0
+    user_ids = set(user_ids)
+    if not user_ids:
+        return opened, resolved
+    for rule in s.query(AttendanceRule).filter(AttendanceRule.is_active == True):
+        rule_opened, rule_resolved = evaluate_rule(s, rule, as_of, user_ids)
+        opened += rule_opened
+        resolved += rule_resolved
+    return opened, resolved
+
+
+def recompute_rules(s, as_of=None, rule_ids=None):
+    """
+    Full evaluation of every rule (or the given ones) for all members. Inactive rules have
+    their open alerts resolved. Returns (alerts opened, alerts resolved).
+    """
+    opened = resolved = 0
+    query = s.query(AttendanceRule)
+    if rule_ids is not None:
+        query = query.filter(AttendanceRule.id.in_(rule_ids))
+    for rule in query.all():
+        if rule.is_active:
+            rule_opened, rule_resolved = evaluate_rule(s, rule, as_of)
+            opened += rule_opened
+            resolved += rule_resolved
+        else:
+            alerts = AttendanceAlert.__table__
+            resolved += s.execute(alerts.update().where(
+                alerts.c.rule_id == rule.id, alerts.c.resolved_at.is_(None)
+            ).values(resolved_at=datetime.utcnow())).rowcount
+    _rule_members.forget(s)
+    return opened, resolved
+
+
+def open_alerts(s, limit=200):
+    """Open alerts, newest first, with their rule and member loaded."""
+    return s.query(AttendanceAlert).options(
+        joinedload(AttendanceAlert.rule), joinedload(AttendanceAlert.user)
+    ).filter(AttendanceAlert.resolved_at.is_(None)).order_by(AttendanceAlert.created_at.desc()).limit(limit).all()
+
+
+def _record_members(record):
+    # A record moved to another member changes the old member's counts too
+    user_ids = [record.user_id] + list(attributes.get_history(record, 'user_id').deleted or ())
+    return [user_id for user_id in user_ids if user_id]
+
+
+def _evaluate_tracked_members(s, user_ids):
+    # Alerts are written with PostgreSQL's INSERT ... ON CONFLICT, like the rollups
+    if s.get_bind().dialect.name == 'postgresql':
+        evaluate_members(s, user_ids)
+
+
+_rule_members = CommitKeyTracker(RULE_MEMBERS_KEY, AttendanceRecord, _record_members, _evaluate_tracked_members)
@@ -0,0 +1,113 @@
+# app/attendance/saving.py
+
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import User, AttendanceRecord, AttendanceType, ATTENDANCE_STATUS_LETTERS, attendance_status_code
+from .events import mark_attendance_changed
+from .rollup import mark_rollup_months
+from .rules import mark_rule_members
+
+# Columns of the unique constraint created by migrate_attendance_unique_key.py
+ATTENDANCE_UNIQUE_COLUMNS = ('user_id', 'event_date', 'attendance_type_id')
+# Largest change list accepted by one JSON save; a full roster is far below this
+MAX_SAVE_CHANGES = 5000
+# Rows per INSERT statement, well inside PostgreSQL's bind parameter limit
+UPSERT_BATCH_SIZE = 1000
+
+
+def submitted_statuses(form, select_prefix='select_', status_prefix='attendance_'):
+    """{user_id: status} for members whose select_<id> box is ticked and who have an attendance value."""
+    statuses = {}
+    for key, value in form.items():
+        if key.startswith(select_prefix) and value == 'on':
+            suffix = key[len(select_prefix):]
+            status = form.get(f'{status_prefix}{suffix}')
+            if suffix.isdigit() and status:
+                statuses[int(suffix)] = status
+    return statuses
+
+
+def parse_changes(changes):
+    """
+    Validate a JSON save payload's list of changed cells ({user_id, attendance_type_id,
+    event_date as YYYY-MM-DD, status}) into cells for upsert_attendance. Raises ValueError.
+    """
+    if not isinstance(changes, list):
+        raise ValueError("changes must be a list")
+    if len(changes) > MAX_SAVE_CHANGES:
+        raise ValueError(f"At most {MAX_SAVE_CHANGES} changes can be saved at once")
+    cells = []
+    for change in changes:
+        try:
+            cell = {
+                'user_id': int(change['user_id']),
+                'attendance_type_id': int(change['attendance_type_id']),
+                'event_date': datetime.strptime(change['event_date'], '%Y-%m-%d').date(),
+                'status': change['status'],
+            }
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Invalid change: {change!r}")
+        if cell['status'] not in ATTENDANCE_STATUS_LETTERS.values():
+            raise ValueError(f"Invalid status: {cell['status']!r}")
+        cells.append(cell)
+    return cells
+
+
+def matrix_state(s, event_date, attendance_type_id):
+    """{user_id: status} already saved for one meeting, the baseline the matrix page diffs against."""
+    return {user_id: ATTENDANCE_STATUS_LETTERS[code] for user_id, code in s.query(
+        AttendanceRecord.user_id, AttendanceRecord.status_code
+    ).filter(
+        AttendanceRecord.event_date == event_date,
+        AttendanceRecord.attendance_type_id == attendance_type_id
+    )}
+
+
+def upsert_attendance(s, cells):
+    """
+    Save attendance cells in one INSERT ... ON CONFLICT DO UPDATE on
+    (user_id, event_date, attendance_type_id). cells are dicts with user_id,
+    attendance_type_id, event_date and status (a letter or name, stored as its code);
+    for a repeated key the last one wins, and cells for unknown members are dropped.
+    Raises ValueError for an unknown status or attendance type, before anything is written.
+
+    Returns (created, updated, unchanged); rows whose status is already the same are not rewritten.
+    """
+    if not cells:
+        return 0, 0, 0
+    cells = {(cell['user_id'], cell['event_date'], cell['attendance_type_id']): cell for cell in cells}
+    type_ids = {key[2] for key in cells}
+    unknown_types = type_ids - {row[0] for row in s.query(AttendanceType.id).filter(AttendanceType.id.in_(type_ids))}
+    if unknown_types:
+        raise ValueError(f"Unknown attendance type: {', '.join(str(type_id) for type_id in sorted(unknown_types))}")
+    user_ids = {row[0] for row in s.query(User.id).filter(User.id.in_({key[0] for key in cells}))}
+    now = datetime.utcnow()
+    rows = []
+    for (user_id, event_date, attendance_type_id), cell in cells.items():
+        if user_id in user_ids:
+            code = attendance_status_code(cell['status'])
+            rows.append({
+                'user_id': user_id,
+                'event_date': event_date,
+                'attendance_type_id': attendance_type_id,
+                'status_code': code,
+                'created_at': now,
+                'updated_at': now,
+            })
+    if not rows:
+        return 0, 0, 0
+
+    written = []
+    for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = pg_insert(AttendanceRecord).values(rows[i:i + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=ATTENDANCE_UNIQUE_COLUMNS,
+            set_={'status_code': stmt.excluded.status_code, 'updated_at': stmt.excluded.updated_at},
+            where=AttendanceRecord.status_code != stmt.excluded.status_code
+        ).returning(AttendanceRecord.created_at)  # updates keep the old created_at, inserts carry ours
+        written.extend(s.execute(stmt).scalars().all())
+    mark_attendance_changed(s)
+    mark_rollup_months(s, {row['event_date'] for row in rows})
+    mark_rule_members(s, user_ids)
+    created = sum(1 for created_at in written if created_at == now)
+    return created, len(written) - created, len(rows) - len(written)
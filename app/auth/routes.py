@@ -5,6 +5,7 @@ from config import Config
 from database import get_tenant_db_session
 from app.models import User, UserAuthDetails
 from app.utils import infer_tenant_from_hostname
+from app.members.sync import get_member_changes, InvalidCursorError
 from datetime import datetime
 
 # Define the Blueprint
@@ -371,3 +372,30 @@ def manage_users_api(tenant_id):
             return jsonify({"users": user_list})
         except Exception as e:
             return jsonify({"error": f"Failed to retrieve users: {str(e)}"}), 500
+
+
+@auth_bp.route('/api/<tenant_id>/users/sync', methods=['GET'])
+def sync_users_api(tenant_id):
+    """
+    Delta sync for mobile/directory clients: ?since=<cursor>&limit=<n>
+    Returns members and lookup rows changed after the cursor, tombstones for deleted rows,
+    and the cursor to pass on the next call. Omit since for a full sync; repeat while has_more is true.
+    """
+    if tenant_id != g.tenant_id:
+        return jsonify({"error": "Tenant ID mismatch in URL and request context"}), 403
+    if 'user_id' not in session or session.get('tenant_id') != tenant_id:
+        return jsonify({"error": "Not logged in"}), 401
+
+    try:
+        limit = int(request.args.get('limit', 500))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    try:
+        with get_tenant_db_session(g.tenant_id) as s:
+            changes = get_member_changes(s, request.args.get('since'), limit)
+        return jsonify(changes)
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to sync users: {str(e)}"}), 500
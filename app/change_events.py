@@ -0,0 +1,60 @@
+# app/change_events.py
+
+import logging
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Notifications only reach listeners in the process that committed; other gunicorn workers
+# never see them. Per-worker caches invalidated from a ModelChangeNotifier must therefore also
+# expire on their own, and this is how stale another worker's copy may get.
+LOCAL_CACHE_TTL_SECONDS = 60
+
+
+class ModelChangeNotifier:
+    """
+    Calls registered callback(tenant_id) functions after a transaction that wrote any of
+    models commits. tenant_id is None when the session was not created by
+    get_tenant_db_session, in which case listeners should drop data for every tenant.
+    ORM writes are picked up at flush; Core/bulk statements call mark() or notify().
+    """
+
+    def __init__(self, name, models):
+        self.name = name
+        self.models = tuple(models)
+        self.session_key = f'{name}_changed'
+        self._listeners = []
+        event.listen(Session, 'after_flush', self._track_writes)
+        event.listen(Session, 'after_commit', self._notify_after_commit)
+        event.listen(Session, 'after_rollback', self._reset_after_rollback)
+
+    def listen(self, callback):
+        """Register callback(tenant_id); usable as a decorator."""
+        self._listeners.append(callback)
+        return callback
+
+    def notify(self, tenant_id):
+        """Invoke the listeners now, for writes made outside a session."""
+        for callback in self._listeners:
+            try:
+                callback(tenant_id)
+            except Exception as e:
+                logger.error(f"{self.name.capitalize()} change listener failed for tenant {tenant_id}: {str(e)}")
+
+    def mark(self, s):
+        """Flag the session so listeners run after it commits (for Core writes the ORM cannot see)."""
+        s.info[self.session_key] = True
+
+    def _track_writes(self, session, flush_context):
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, self.models):
+                session.info[self.session_key] = True
+                return
+
+    def _notify_after_commit(self, session):
+        if session.info.pop(self.session_key, False):
+            self.notify(session.info.get('tenant_id'))
+
+    def _reset_after_rollback(self, session):
+        session.info.pop(self.session_key, None)
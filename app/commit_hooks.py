@@ -0,0 +1,71 @@
+# app/commit_hooks.py
+
+import zlib
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+# Key locked shared by every incremental refresh of a summary table and exclusively by its rebuild
+WHOLE_TABLE_KEY = 0
+
+
+def lock_keys(s, namespace, keys, shared=False):
+    """
+    Take PostgreSQL transaction-level advisory locks on (namespace, key) for each integer key,
+    in ascending order so concurrent callers cannot deadlock. They are held until the
+    transaction ends, so statements run after this see everything committed by the previous
+    holder: recounts of the same keys are serialised instead of overwriting each other from
+    stale snapshots. Does nothing on other databases.
+    """
+    keys = sorted(set(keys))
+    if not keys or s.get_bind().dialect.name != 'postgresql':
+        return
+    lock = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+    s.execute(text(f"SELECT {lock}(:space, key) FROM unnest(CAST(:keys AS integer[])) AS key"), {
+        'space': zlib.crc32(namespace.encode('utf-8')) & 0x7fffffff, 'keys': keys
+    })
+
+
+class CommitKeyTracker:
+    """
+    Collects the keys a transaction touched and hands them to refresh(session, keys) just before
+    it commits, so derived rows are rewritten in the same transaction as the writes behind them.
+    ORM writes to model are turned into keys by keys_for(obj) after each flush; Core writes call
+    mark(). The keys wait in session.info[session_key] and are dropped on rollback.
+    """
+
+    def __init__(self, session_key, model, keys_for, refresh):
+        self.session_key = session_key
+        self.model = model
+        self.keys_for = keys_for
+        self.refresh = refresh
+        event.listen(Session, 'after_flush', self._track_keys)
+        event.listen(Session, 'before_commit', self._refresh_before_commit)
+        event.listen(Session, 'after_rollback', self._reset_after_rollback)
+
+    def mark(self, s, keys):
+        """Queue keys for a refresh when the session commits (for Core writes)."""
+        s.info.setdefault(self.session_key, set()).update(keys)
+
+    def forget(self, s):
+        """Drop queued keys, e.g. after everything was rebuilt in this transaction."""
+        s.info.pop(self.session_key, None)
+
+    def _track_keys(self, session, flush_context):
+        keys = []
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, self.model):
+                keys.extend(self.keys_for(obj))
+        if keys:
+            self.mark(session, keys)
+
+    def _refresh_before_commit(self, session):
+        if self.session_key not in session.info and not (session.new or session.dirty or session.deleted):
+            return
+        # Flush first so ORM changes still pending are tracked
+        session.flush()
+        keys = session.info.pop(self.session_key, None)
+        if keys:
+            self.refresh(session, keys)
+
+    def _reset_after_rollback(self, session):
+        session.info.pop(self.session_key, None)
@@ -0,0 +1,174 @@
+# app/dues/balances.py
+
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import and_, case, exists, func, literal, select
+from sqlalchemy.orm import attributes
+from app.models import User, DuesRecord, DuesType, DuesMemberBalance
+from app.commit_hooks import WHOLE_TABLE_KEY, CommitKeyTracker, lock_keys
+
+logger = logging.getLogger(__name__)
+
+AGING_BUCKETS = ('not_due', 'days_0_30', 'days_31_60', 'days_61_90', 'days_over_90')
+BALANCE_COLUMNS = ('member_id', 'dues_type_id', 'record_count', 'total_due', 'total_paid', 'balance') + \
+    AGING_BUCKETS + ('oldest_open_due_date', 'as_of')
+
+# Session.info key holding the (member_id, dues_type_id) pairs whose balance rows must be rewritten before commit
+BALANCE_PAIRS_KEY = 'dues_balance_pairs'
+PAIR_BATCH_SIZE = 1000
+
+
+def mark_balance_pairs(s, pairs):
+    """Queue (member_id, dues_type_id) pairs for a balance refresh when the session commits (for Core writes)."""
+    _balance_pairs.mark(s, (pair for pair in pairs if all(pair)))
+
+
+def _balance_source(as_of, where=None):
+    """
+    dues_record summed per member and dues type, aged against as_of. The bucket edges are
+    dates computed here, so the same SELECT runs on any database.
+    """
+    open_amount = DuesRecord.dues_amount - func.coalesce(DuesRecord.amount_paid, 0)
+
+    def bucket(condition):
+        return func.coalesce(func.sum(case((condition, open_amount), else_=0)), 0)
+
+    def days_ago(days):
+        return as_of - timedelta(days=days)
+
+    source = select(
+        DuesRecord.member_id,
+        DuesRecord.dues_type_id,
+        func.count().label('record_count'),
+        func.sum(DuesRecord.dues_amount).label('total_due'),
+        func.sum(func.coalesce(DuesRecord.amount_paid, 0)).label('total_paid'),
+        func.sum(open_amount).label('balance'),
+        bucket(DuesRecord.due_date > as_of).label('not_due'),
+        bucket(DuesRecord.due_date.between(days_ago(30), as_of)).label('days_0_30'),
+        bucket(DuesRecord.due_date.between(days_ago(60), days_ago(31))).label('days_31_60'),
+        bucket(DuesRecord.due_date.between(days_ago(90), days_ago(61))).label('days_61_90'),
+        bucket(DuesRecord.due_date < days_ago(90)).label('days_over_90'),
+        func.min(case((open_amount > 0, DuesRecord.due_date))).label('oldest_open_due_date'),
+        literal(as_of, DuesMemberBalance.as_of.type).label('as_of'),
+    ).group_by(DuesRecord.member_id, DuesRecord.dues_type_id)
+    return source.where(where) if where is not None else source
+
+
+def _balances_built(s):
+    return s.query(exists().select_from(DuesMemberBalance)).scalar()
+
+
+def refresh_balance_pairs(s, pairs, as_of=None):
+    """
+    Rewrite the balance rows of the given (member_id, dues_type_id) pairs inside the caller's
+    transaction; each pair costs a scan of that member's records on ix_dues_record_member_due_date.
+    The members are locked first: a concurrent rewrite of the same pair would otherwise not see
+    our new row, and its INSERT would fail on the primary key. While the table is still empty
+    (never built) the whole table is built instead.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+    if not _balances_built(s):
+        rebuild_balances(s, as_of)
+        return
+    as_of = as_of or date.today()
+    balances = DuesMemberBalance.__table__
+    lock_keys(s, balances.name, [WHOLE_TABLE_KEY], shared=True)
+    lock_keys(s, balances.name, {member_id for member_id, _ in pairs})
+    by_type = defaultdict(list)
+    for member_id, dues_type_id in pairs:
+        by_type[dues_type_id].append(member_id)
+    for dues_type_id, member_ids in by_type.items():
+        for i in range(0, len(member_ids), PAIR_BATCH_SIZE):
+            batch = member_ids[i:i + PAIR_BATCH_SIZE]
+            s.execute(balances.delete().where(
+                balances.c.dues_type_id == dues_type_id, balances.c.member_id.in_(batch)
+            ))
+            s.execute(balances.insert().from_select(BALANCE_COLUMNS, _balance_source(
+                as_of, and_(DuesRecord.dues_type_id == dues_type_id, DuesRecord.member_id.in_(batch))
+            )))
+
+
+def rebuild_balances(s, as_of=None):
+    """
+    Replace every balance row from dues_record, aged against as_of (default today). Run daily
+    so the aging buckets move on. Returns the number of rows written; the caller commits.
+    """
+    lock_keys(s, DuesMemberBalance.__tablename__, [WHOLE_TABLE_KEY])
+    s.execute(DuesMemberBalance.__table__.delete())
+    s.execute(DuesMemberBalance.__table__.insert().from_select(BALANCE_COLUMNS, _balance_source(as_of or date.today())))
+    _balance_pairs.forget(s)
+    return s.query(func.count()).select_from(DuesMemberBalance).scalar()
+
+
+def _balance_rows(s):
+    """
+    The balance table, or while it has never been built the same figures computed from
+    dues_record, so an unmigrated database shows correct (if slower) pages instead of zeros.
+    """
+    if _balances_built(s):
+        return DuesMemberBalance.__table__
+    logger.warning("dues_member_balance is empty; computing balances from dues_record")
+    return _balance_source(date.today()).subquery().alias('dues_member_balance_live')
+
+
+def _dues_record_pairs(record):
+    # A record moved to another member or dues type leaves its old pair behind
+    old_members = attributes.get_history(record, 'member_id').deleted or [record.member_id]
+    old_types = attributes.get_history(record, 'dues_type_id').deleted or [record.dues_type_id]
+    pairs = [(record.member_id, record.dues_type_id)]
+    pairs.extend((member_id, dues_type_id) for member_id in old_members for dues_type_id in old_types)
+    return [pair for pair in pairs if all(pair)]
+
+
+_balance_pairs = CommitKeyTracker(BALANCE_PAIRS_KEY, DuesRecord, _dues_record_pairs, refresh_balance_pairs)
+
+
+def _totals(rows):
+    keys = ('total_due', 'total_paid', 'balance') + AGING_BUCKETS
+    return {key: sum(row[key] or 0 for row in rows) for key in keys}
+
+
+def member_balances(s, member_id):
+    """
+    Per-dues-type balances and aging for one member, plus their totals.
+    Returns (rows, totals) where rows are dicts carrying the dues type name.
+    """
+    summary = _balance_rows(s)
+    rows = s.execute(
+        summary.select().add_columns(DuesType.dues_type.label('dues_type_name'))
+        .join_from(summary, DuesType.__table__, DuesType.id == summary.c.dues_type_id)
+        .where(summary.c.member_id == member_id)
+        .order_by(DuesType.dues_type)
+    ).mappings().all()
+    rows = [dict(row) for row in rows]
+    return rows, _totals(rows)
+
+
+def aging_report(s, dues_type_id=None):
+    """
+    Members with an outstanding balance, largest first, aggregated across dues types
+    (or for one dues type). Returns (rows, totals).
+    """
+    summary = _balance_rows(s)
+    bucket_sums = [func.sum(summary.c[bucket]).label(bucket) for bucket in AGING_BUCKETS]
+    query = s.query(
+        User.id.label('member_id'),
+        User.first_name,
+        User.last_name,
+        User.email,
+        func.sum(summary.c.total_due).label('total_due'),
+        func.sum(summary.c.total_paid).label('total_paid'),
+        func.sum(summary.c.balance).label('balance'),
+        *bucket_sums,
+        func.min(summary.c.oldest_open_due_date).label('oldest_open_due_date')
+    ).join(summary, summary.c.member_id == User.id)
+    if dues_type_id:
+        query = query.filter(summary.c.dues_type_id == dues_type_id)
+    rows = query.group_by(User.id, User.first_name, User.last_name, User.email).having(
+        func.sum(summary.c.balance) > 0
+    ).order_by(func.sum(summary.c.balance).desc(), User.last_name, User.first_name).all()
+    rows = [row._asdict() for row in rows]
+    return rows, _totals(rows)
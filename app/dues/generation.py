@@ -0,0 +1,61 @@
+# app/dues/generation.py
+
+from datetime import date
+from sqlalchemy import literal, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import User, DuesRecord
+from .balances import mark_balance_pairs
+from .kpis import mark_kpi_months
+
+# Must match the constraint created by migrate_dues_unique_key.py
+DUES_RECORD_UNIQUE_KEY = 'uq_dues_record_member_type_date'
+
+
+def selected_member_ids(form, prefix='select_'):
+    """Member ids whose select_<id> checkbox was ticked on the generate dues form."""
+    member_ids = []
+    for key, value in form.items():
+        if key.startswith(prefix) and value == 'on':
+            suffix = key[len(prefix):]
+            if suffix.isdigit():
+                member_ids.append(int(suffix))
+    return member_ids
+
+
+def generate_dues_records(s, member_ids, dues_type_id, amount_due, due_date, generated_on=None):
+    """
+    Create or refresh one dues record per selected active member in a single statement.
+
+    INSERT ... SELECT from "user" with ON CONFLICT on (member_id, dues_type_id, due_date),
+    so repeated or concurrent submissions update the existing row instead of duplicating it.
+    Returns (created, updated) counts. Payments already recorded on updated rows are kept.
+    """
+    if not member_ids:
+        return 0, 0
+    generated_on = generated_on or date.today()
+
+    source = select(
+        User.id,
+        literal(float(amount_due)),
+        literal(int(dues_type_id)),
+        literal(due_date),
+        literal(generated_on)
+    ).where(User.is_active == True, User.id.in_(member_ids))
+
+    stmt = pg_insert(DuesRecord).from_select(
+        ['member_id', 'dues_amount', 'dues_type_id', 'due_date', 'date_dues_generated'],
+        source
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint=DUES_RECORD_UNIQUE_KEY,
+        set_={
+            'dues_amount': stmt.excluded.dues_amount,
+            'date_dues_generated': stmt.excluded.date_dues_generated,
+        }
+    ).returning(literal_column('xmax = 0').label('inserted'))  # xmax is 0 only for freshly inserted rows
+
+    inserted = s.execute(stmt).scalars().all()
+    mark_balance_pairs(s, [(member_id, int(dues_type_id)) for member_id in member_ids])
+    mark_kpi_months(s, [due_date])
+    created = sum(1 for flag in inserted if flag)
+    return created, len(inserted) - created
@@ -0,0 +1,100 @@
+# app/dues/kpis.py
+
+from sqlalchemy import Date, and_, cast, exists, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import DuesRecord, DuesType, DuesMonthlyKpi
+from app.monthly_rollups import MonthlyRollupTracker, lock_months, lock_whole_rollup, month_start, months_between, next_month
+
+# Session.info key holding the due months whose rollup rows must be recomputed before commit
+KPI_MONTHS_KEY = 'dues_kpi_months'
+DEFAULT_TREND_MONTHS = 60
+
+
+def _rollup_source(months=None):
+    """dues_record aggregated by due month and dues type, optionally for some months only."""
+    month = cast(func.date_trunc('month', DuesRecord.due_date), Date)
+    source = select(
+        month, DuesRecord.dues_type_id, func.count(DuesRecord.id), func.sum(DuesRecord.dues_amount),
+        func.sum(func.coalesce(DuesRecord.amount_paid, 0)), func.now()
+    ).group_by(month, DuesRecord.dues_type_id)
+    if months:
+        source = source.where(or_(*[
+            and_(DuesRecord.due_date >= first, DuesRecord.due_date < next_month(first))
+            for first in months
+        ]))
+    return source
+
+
+def _insert_rollup(months=None):
+    stmt = pg_insert(DuesMonthlyKpi).from_select(
+        ['month', 'dues_type_id', 'record_count', 'billed', 'collected', 'updated_at'], _rollup_source(months)
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=['month', 'dues_type_id'],
+        set_={column: stmt.excluded[column] for column in ('record_count', 'billed', 'collected', 'updated_at')}
+    )
+
+
+def refresh_kpi_months(s, months):
+    """
+    Recompute the rollup rows of the given months inside the caller's transaction. Each month
+    is one range scan of ix_dues_record_due_date_member, however many records changed; the
+    months are locked first so concurrent writes into a month recount one after the other.
+    """
+    months = sorted(set(months))
+    if not months or s.get_bind().dialect.name != 'postgresql':
+        return
+    lock_months(s, DuesMonthlyKpi.__tablename__, months)
+    s.execute(_insert_rollup(months))
+    # Rows for month and dues type pairs that no longer have any records
+    kpi = DuesMonthlyKpi.__table__
+    s.execute(kpi.delete().where(
+        kpi.c.month.in_(months),
+        ~exists().where(
+            DuesRecord.dues_type_id == kpi.c.dues_type_id,
+            DuesRecord.due_date >= kpi.c.month,
+            DuesRecord.due_date < kpi.c.month + literal_column("interval '1 month'")
+        )
+    ))
+
+
+def rebuild_kpis(s):
+    """Replace the whole rollup from dues_record. Returns the number of rows written."""
+    lock_whole_rollup(s, DuesMonthlyKpi.__tablename__)
+    s.execute(DuesMonthlyKpi.__table__.delete())
+    s.execute(_insert_rollup())
+    _kpi_months.forget(s)
+    return s.query(func.count()).select_from(DuesMonthlyKpi).scalar()
+
+
+_kpi_months = MonthlyRollupTracker(KPI_MONTHS_KEY, DuesRecord, 'due_date', refresh_kpi_months)
+mark_kpi_months = _kpi_months.mark
+
+
+def kpi_trend(s, start_month, end_month, dues_type_id=None):
+    """
+    Billed, collected and outstanding per month from the rollup table alone, with a row per
+    dues type and a total per month. Months without dues are included as zeros.
+    """
+    query = s.query(
+        DuesMonthlyKpi.month, DuesMonthlyKpi.dues_type_id, DuesMonthlyKpi.record_count,
+        DuesMonthlyKpi.billed, DuesMonthlyKpi.collected
+    ).filter(DuesMonthlyKpi.month >= month_start(start_month), DuesMonthlyKpi.month <= end_month)
+    if dues_type_id:
+        query = query.filter(DuesMonthlyKpi.dues_type_id == dues_type_id)
+    names = dict(s.query(DuesType.id, DuesType.dues_type))
+
+    months = {month: {'month': month.strftime('%Y-%m'), 'record_count': 0, 'billed': 0.0, 'collected': 0.0,
+                      'outstanding': 0.0, 'by_dues_type': []}
+              for month in months_between(start_month, end_month)}
+    for month, type_id, record_count, billed, collected in query.order_by(DuesMonthlyKpi.month, DuesMonthlyKpi.dues_type_id):
+        entry = months[month]
+        entry['by_dues_type'].append({
+            'dues_type_id': type_id, 'dues_type': names.get(type_id), 'record_count': record_count,
+            'billed': billed, 'collected': collected, 'outstanding': billed - collected,
+        })
+        entry['record_count'] += record_count
+        entry['billed'] += billed
+        entry['collected'] += collected
+        entry['outstanding'] += billed - collected
+    return list(months.values())
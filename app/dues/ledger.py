@@ -0,0 +1,141 @@
+# app/dues/ledger.py
+
+from datetime import date
+from sqlalchemy import bindparam, func
+from app.models import DuesRecord, DuesPayment
+from .balances import mark_balance_pairs
+from .kpis import mark_kpi_months
+
+
+def submitted_payments(form, select_prefix='select_', amount_prefix='payment_'):
+    """
+    {dues_record_id: amount} for the rows ticked on the collection form.
+    Only the submitted fields are inspected; blank, invalid and non-positive amounts are skipped.
+    """
+    payments = {}
+    for key, value in form.items():
+        if not key.startswith(select_prefix) or value != 'on':
+            continue
+        record_id = key[len(select_prefix):]
+        if not record_id.isdigit():
+            continue
+        try:
+            amount = float(form.get(f'{amount_prefix}{record_id}') or 0)
+        except ValueError:
+            continue
+        if amount > 0:
+            payments[int(record_id)] = amount
+    return payments
+
+
+def open_record_payments(s, payments, start_date=None, end_date=None):
+    """
+    The part of {dues_record_id: amount} that the collection page offers: records with an
+    open balance whose due date lies between start_date and end_date (either may be None).
+    One query over the submitted ids, so paid or out-of-range records cannot be posted to.
+    """
+    if not payments:
+        return {}
+    query = s.query(DuesRecord.id).filter(
+        DuesRecord.id.in_(payments.keys()),
+        func.coalesce(DuesRecord.amount_paid, 0) < DuesRecord.dues_amount
+    )
+    if start_date:
+        query = query.filter(DuesRecord.due_date >= start_date)
+    if end_date:
+        query = query.filter(DuesRecord.due_date <= end_date)
+    return {record_id: payments[record_id] for record_id, in query}
+
+
+def post_payments(s, payments, actor_id=None, payment_date=None, document_number=None):
+    """
+    Record {dues_record_id: amount} as ledger rows and add them to each record's amount_paid.
+
+    The ledger rows go in as one batched INSERT and the running totals as one batched
+    UPDATE, so the cost depends on the number of payments rather than on open records.
+    Unknown record ids are ignored. Returns the number of payments posted; the caller commits.
+    """
+    if not payments:
+        return 0
+    payment_date = payment_date or date.today()
+    return post_payment_rows(s, [
+        {'dues_record_id': record_id, 'amount': amount, 'payment_date': payment_date, 'document_number': document_number}
+        for record_id, amount in payments.items()
+    ], actor_id)
+
+
+def post_payment_rows(s, rows, actor_id=None):
+    """
+    Batched form of post_payments for payments that each carry their own date and document
+    number (statement imports). rows are dicts with dues_record_id, amount, payment_date and
+    document_number; one record may appear several times. Returns the number of rows posted.
+    """
+    if not rows:
+        return 0
+
+    records = {record_id: (member_id, dues_type_id, due_date) for record_id, member_id, dues_type_id, due_date in s.query(
+        DuesRecord.id, DuesRecord.member_id, DuesRecord.dues_type_id, DuesRecord.due_date
+    ).filter(DuesRecord.id.in_({row['dues_record_id'] for row in rows}))}
+    rows = [row for row in rows if row['dues_record_id'] in records]
+    if not rows:
+        return 0
+
+    s.execute(DuesPayment.__table__.insert(), [
+        {
+            'dues_record_id': row['dues_record_id'],
+            'amount': row['amount'],
+            'payment_date': row['payment_date'],
+            'document_number': row['document_number'],
+            'recorded_by_id': actor_id,
+        }
+        for row in rows
+    ])
+
+    # One running-total update per record: amounts summed, earliest date and first document kept
+    totals = {}
+    for row in rows:
+        total = totals.setdefault(row['dues_record_id'], {
+            'b_id': row['dues_record_id'], 'b_amount': 0.0, 'b_date': row['payment_date'], 'b_document': None
+        })
+        total['b_amount'] += row['amount']
+        total['b_date'] = min(total['b_date'], row['payment_date'])
+        total['b_document'] = total['b_document'] or row['document_number']
+
+    dues_record = DuesRecord.__table__
+    s.execute(
+        dues_record.update()
+        .where(dues_record.c.id == bindparam('b_id'))
+        .values(
+            amount_paid=func.coalesce(dues_record.c.amount_paid, 0) + bindparam('b_amount'),
+            payment_received_date=func.coalesce(dues_record.c.payment_received_date,
+                                                bindparam('b_date', type_=dues_record.c.payment_received_date.type)),
+            document_number=func.coalesce(bindparam('b_document', type_=dues_record.c.document_number.type),
+                                          dues_record.c.document_number),
+        ),
+        list(totals.values())
+    )
+    mark_balance_pairs(s, {records[record_id][:2] for record_id in totals})
+    mark_kpi_months(s, {records[record_id][2] for record_id in totals})
+    # Running totals were changed behind the ORM's back
+    for record in s.identity_map.values():
+        if isinstance(record, DuesRecord) and record.id in totals:
+            s.expire(record, ['amount_paid', 'payment_received_date', 'document_number'])
+    return len(rows)
+
+
+def set_amount_paid(s, record, total_paid, actor_id=None, payment_date=None, document_number=None):
+    """
+    Bring record.amount_paid to total_paid by posting the difference to the ledger,
+    so hand edits on the payment form keep the history intact. Returns the amount posted.
+    """
+    difference = round((total_paid or 0) - (record.amount_paid or 0), 2)
+    if difference:
+        post_payments(s, {record.id: difference}, actor_id, payment_date, document_number)
+    return difference
+
+
+def payment_history(s, dues_record_id):
+    """Ledger rows for one dues record, oldest first (served by ix_dues_payment_record_date)."""
+    return s.query(DuesPayment).filter_by(dues_record_id=dues_record_id).order_by(
+        DuesPayment.payment_date, DuesPayment.id
+    ).all()
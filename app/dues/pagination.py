@@ -0,0 +1,130 @@
+# app/dues/pagination.py
+
+import base64
+import json
+from datetime import date
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import contains_eager
+from app.models import User, DuesRecord, DuesType, DUES_RECORD_PAID
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+# (sort keys, descending, position of due_date in the keys). Keys are plain or indexed
+# expressions on dues_record ending in the primary key, so every row has a unique position
+# and each page is a range scan of one index instead of a sort of every matching row.
+# 'ledger': open dues first, then due date and member (ix_dues_record_paid_due_date_member).
+# 'recent': newest first, for one member's history (ix_dues_record_member_due_date).
+ORDERINGS = {
+    'ledger': (lambda: (DUES_RECORD_PAID, DuesRecord.due_date, DuesRecord.member_id, DuesRecord.id), False, 1),
+    'recent': (lambda: (DuesRecord.due_date, DuesRecord.id), True, 0),
+}
+
+
+class DuesPage:
+    """One page of dues records plus the cursor for the next page and totals over every matching record."""
+
+    def __init__(self, records, next_cursor, totals, page_size):
+        self.records = records
+        self.next_cursor = next_cursor
+        self.totals = totals
+        self.page_size = page_size
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(values):
+    """Cursor holding the last row's sort keys."""
+    values = [value.isoformat() if isinstance(value, date) else value for value in values]
+    payload = {'after': values}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, ordering):
+    """Key values from a cursor, or None if it is missing or malformed (which restarts at page one)."""
+    if not cursor:
+        return None
+    keys, _, due_date_index = ORDERINGS[ordering]
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))['after']
+        if not isinstance(values, list) or len(values) != len(keys()):
+            return None
+        values[due_date_index] = date.fromisoformat(values[due_date_index])
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+    return values
+
+
+def page_size_arg(value):
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE."""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+
+
+def _filtered(query, member_id, start_date, end_date):
+    if member_id:
+        query = query.filter(DuesRecord.member_id == member_id)
+    if start_date:
+        query = query.filter(DuesRecord.due_date >= start_date)
+    if end_date:
+        query = query.filter(DuesRecord.due_date <= end_date)
+    return query
+
+
+def dues_totals(s, member_id=None, start_date=None, end_date=None):
+    """Record count, amount due, amount paid and balance over every matching record, in one aggregate."""
+    count, total_due, total_paid = _filtered(
+        s.query(func.count(DuesRecord.id), func.sum(DuesRecord.dues_amount),
+                func.sum(func.coalesce(DuesRecord.amount_paid, 0))),
+        member_id, start_date, end_date
+    ).one()
+    total_due, total_paid = total_due or 0.0, total_paid or 0.0
+    return {'record_count': count, 'total_due': total_due, 'total_paid': total_paid, 'balance': total_due - total_paid}
+
+
+def dues_page(s, member_id=None, start_date=None, end_date=None, cursor=None,
+              page_size=DEFAULT_PAGE_SIZE, ordering='ledger', with_totals=True):
+    """
+    Fetch the page of DuesRecords (member and dues type loaded) after cursor.
+
+    Pages are addressed by the sort key of the last row seen rather than an offset, so
+    every page costs the same however deep it is and rows added meanwhile are not skipped.
+    Totals are aggregated on every page, never taken from the cursor, so they always match
+    the database; pass with_totals=False when the caller has its own (totals is then None).
+    """
+    keys, descending, _ = ORDERINGS[ordering]
+    keys = keys()
+    query = s.query(DuesRecord, *keys).join(User, DuesRecord.member_id == User.id).join(
+        DuesType, DuesRecord.dues_type_id == DuesType.id
+    ).options(contains_eager(DuesRecord.member), contains_eager(DuesRecord.dues_type))
+    query = _filtered(query, member_id, start_date, end_date)
+
+    after = decode_cursor(cursor, ordering)
+    if after:
+        query = query.filter(tuple_(*keys) < tuple_(*after) if descending else tuple_(*keys) > tuple_(*after))
+    totals = dues_totals(s, member_id, start_date, end_date) if with_totals else None
+
+    rows = query.order_by(*[key.desc() if descending else key for key in keys]).limit(page_size + 1).all()
+    next_cursor = encode_cursor(rows[page_size - 1][1:]) if len(rows) > page_size else None
+    records = [row[0] for row in rows[:page_size]]
+    return DuesPage(records, next_cursor, totals, page_size)
+
+
+def dues_record_json(record):
+    return {
+        'id': record.id,
+        'member_id': record.member_id,
+        'member_name': f"{record.member.first_name or ''} {record.member.last_name or ''}".strip(),
+        'dues_type': record.dues_type.dues_type,
+        'due_date': record.due_date.isoformat(),
+        'dues_amount': record.dues_amount,
+        'amount_paid': record.amount_paid or 0.0,
+        'balance': record.dues_amount - (record.amount_paid or 0.0),
+        'payment_received_date': record.payment_received_date.isoformat() if record.payment_received_date else None,
+        'document_number': record.document_number,
+    }
@@ -0,0 +1,395 @@
+# app/dues/reconciliation.py
+
+import csv
+import io
+import itertools
+import re
+import uuid
+from collections import Counter, namedtuple
+from datetime import datetime
+from functools import lru_cache
+from sqlalchemy import func
+from app.models import User, DuesRecord, DuesPayment, BankStatementLine
+from app.utils import STREAM_BATCH_SIZE
+from .ledger import post_payment_rows, post_payments
+
+# Matched payments and statement lines are written in batches of this many
+IMPORT_FLUSH_SIZE = 5000
+# Statement lines are checked against earlier imports this many at a time
+DUPLICATE_CHECK_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+
+StatementLine = namedtuple('StatementLine', ['line_number', 'posted_date', 'amount', 'reference', 'payer_name',
+                                             'description', 'transaction_id'], defaults=(None,))
+
+# Accepted CSV header spellings, compared after normalising case and punctuation
+_CSV_COLUMNS = {
+    'posted_date': ('date', 'posted date', 'posting date', 'transaction date', 'value date'),
+    'amount': ('amount', 'credit', 'credit amount', 'deposit', 'deposits'),
+    'reference': ('reference', 'ref', 'check', 'check number', 'check no', 'cheque number', 'document number', 'doc number'),
+    'payer_name': ('name', 'payer', 'payer name', 'payee', 'from', 'counterparty'),
+    'description': ('description', 'memo', 'details', 'narrative'),
+    'transaction_id': ('transaction id', 'fitid', 'bank reference', 'transaction reference', 'transaction number'),
+}
+_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y%m%d')
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)')
+_NOT_ALNUM = re.compile(r'[^a-z0-9]+')
+_NOT_ALNUM_UPPER = re.compile(r'[^A-Z0-9]+')
+_ZERO_PADDING = re.compile(r'(?<![0-9])0+(?=[0-9])')
+
+
+class StatementFormatError(ValueError):
+    """The uploaded file is not a statement this importer can read."""
+
+
+class StatementImportResult:
+    """Counts for one import; unmatched lines are in the review queue under import_id."""
+
+    def __init__(self, import_id):
+        self.import_id = import_id
+        self.matched = 0
+        self.matched_amount = 0.0
+        self.unmatched = 0
+        self.unmatched_amount = 0.0
+        self.duplicates = 0
+        self.skipped = 0
+        self.errors = []
+
+    def skip(self, line_number, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Line {line_number}: {message}")
+
+
+def _header_key(value):
+    return _NOT_ALNUM.sub(' ', (value or '').lower()).strip()
+
+
+def normalise_name(value):
+    return ' '.join(_NOT_ALNUM.sub(' ', (value or '').lower()).split())
+
+
+def normalise_reference(value):
+    """Compare references without punctuation or zero padding: 'chk 42' matches 'CHK-0042'."""
+    return _ZERO_PADDING.sub('', _NOT_ALNUM_UPPER.sub('', (value or '').upper())) or None
+
+
+def _line_key(reference, payer_name, posted_date, amount):
+    """What identifies a line without a bank transaction id; identical lines are told apart by their count."""
+    return (normalise_reference(reference) or normalise_name(payer_name), posted_date, _cents(amount))
+
+
+def _cents(amount):
+    return int(round(amount * 100))
+
+
+def _parse_amount(value):
+    value = (value or '').strip().replace('$', '').replace(',', '')
+    if value.startswith('(') and value.endswith(')'):
+        value = '-' + value[1:-1]
+    return float(value)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value):
+    """Statements repeat the same few hundred dates, so parsed dates are memoised."""
+    value = (value or '').strip()[:10]
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date '{value}'")
+
+
+def _csv_lines(text, result):
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if not header:
+        raise StatementFormatError("The statement file is empty.")
+    keys = [_header_key(column) for column in header]
+    positions = {}
+    for field, aliases in _CSV_COLUMNS.items():
+        for position, key in enumerate(keys):
+            if key in aliases:
+                positions[field] = position
+                break
+    if 'posted_date' not in positions or 'amount' not in positions:
+        raise StatementFormatError("The statement needs a date column and an amount column.")
+
+    def cell(row, field):
+        position = positions.get(field)
+        return row[position].strip() if position is not None and position < len(row) else ''
+
+    for line_number, row in enumerate(reader, start=2):
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            yield StatementLine(line_number, _parse_date(cell(row, 'posted_date')), _parse_amount(cell(row, 'amount')),
+                                cell(row, 'reference') or None, cell(row, 'payer_name') or None, cell(row, 'description') or None,
+                                cell(row, 'transaction_id') or None)
+        except ValueError as e:
+            result.skip(line_number, str(e))
+
+
+def _ofx_lines(text, result):
+    """STMTTRN blocks from SGML (OFX 1.x, unclosed tags) or XML (OFX 2.x) statements, one line at a time."""
+    transaction = None
+    for line_number, line in enumerate(text, start=1):
+        for match in _OFX_TAG.finditer(line):
+            closing, tag, value = match.group(1), match.group(2).upper(), match.group(3).strip()
+            if tag == 'STMTTRN':
+                if closing and transaction is not None:
+                    try:
+                        yield StatementLine(transaction['line_number'], _parse_date(transaction.get('DTPOSTED', '')[:8]),
+                                            _parse_amount(transaction.get('TRNAMT', '')),
+                                            transaction.get('CHECKNUM') or transaction.get('REFNUM') or None,
+                                            transaction.get('NAME') or None, transaction.get('MEMO') or None,
+                                            transaction.get('FITID') or None)
+                    except ValueError as e:
+                        result.skip(transaction['line_number'], str(e))
+                    transaction = None
+                elif not closing:
+                    transaction = {'line_number': line_number}
+            elif transaction is not None and not closing and value:
+                transaction[tag] = value
+
+
+def read_statement(stream, filename, result):
+    """
+    Lazily parse an uploaded statement (CSV with a header row, or OFX/QFX) into StatementLines.
+    Unreadable lines are counted on result and skipped.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    first = text.readline()
+    text = itertools.chain([first], text)
+    is_ofx = (filename or '').lower().endswith(('.ofx', '.qfx')) or first.lstrip().startswith(('OFXHEADER', '<?xml', '<OFX'))
+    return _ofx_lines(text, result) if is_ofx else _csv_lines(text, result)
+
+
+class SeenLines:
+    """
+    Statement lines already recorded, so a statement uploaded twice (or overlapping an earlier
+    one) is not posted twice. History is read per batch of incoming lines, only for the posted
+    dates and bank transaction ids the batch contains, so an import reads as much history as
+    its own statement covers.
+
+    Lines with a bank transaction id are duplicates when that id was imported before. Lines
+    without one are keyed on reference (or payer name), date and amount. Identical lines are
+    legitimate (two equal payments on one day), so the n-th identical line of this statement is
+    a duplicate only if an earlier import, or the hand-recorded check payments, already hold
+    n such lines.
+    """
+
+    def __init__(self, s, import_id):
+        self.s = s
+        self.import_id = import_id
+        self.transaction_ids = set()  # Bank transaction ids imported earlier or already seen in this statement
+        self.recorded = {}            # line key -> most identical lines one earlier source recorded
+        self.occurrences = Counter()  # line key -> identical lines read so far from this statement
+        self._loaded_dates = set()
+
+    def load(self, lines):
+        """Read the history for a batch of lines; call before is_duplicate on any of them."""
+        transaction_ids = {line.transaction_id for line in lines if line.transaction_id} - self.transaction_ids
+        if transaction_ids:
+            self.transaction_ids.update(row[0] for row in self.s.query(BankStatementLine.transaction_id).filter(
+                BankStatementLine.transaction_id.in_(transaction_ids),
+                BankStatementLine.import_id != self.import_id
+            ))
+
+        # Each date is read once, before this import writes any line or payment dated that day
+        dates = {line.posted_date for line in lines if not line.transaction_id} - self._loaded_dates
+        if not dates:
+            return
+        self._loaded_dates.update(dates)
+        per_source = Counter()
+        for import_id, reference, payer_name, posted_date, amount in self.s.query(
+            BankStatementLine.import_id, BankStatementLine.reference, BankStatementLine.payer_name,
+            BankStatementLine.posted_date, BankStatementLine.amount
+        ).filter(BankStatementLine.posted_date.in_(dates), BankStatementLine.import_id != self.import_id):
+            per_source[import_id, _line_key(reference, payer_name, posted_date, amount)] += 1
+        for document_number, payment_date, amount in self.s.query(
+            DuesPayment.document_number, DuesPayment.payment_date, DuesPayment.amount
+        ).filter(DuesPayment.payment_date.in_(dates), DuesPayment.document_number.isnot(None)):
+            if normalise_reference(document_number):
+                per_source[None, _line_key(document_number, None, payment_date, amount)] += 1
+        for (_, key), count in per_source.items():
+            self.recorded[key] = max(self.recorded.get(key, 0), count)
+
+    def is_duplicate(self, line):
+        if line.transaction_id:
+            if line.transaction_id in self.transaction_ids:
+                return True
+            self.transaction_ids.add(line.transaction_id)
+            return False
+        key = _line_key(line.reference, line.payer_name, line.posted_date, line.amount)
+        self.occurrences[key] += 1
+        return self.occurrences[key] <= self.recorded.get(key, 0)
+
+
+class OpenDuesIndex:
+    """
+    In-memory hash indexes over every open dues record, built with one query per import
+    so matching a statement line never touches the database.
+    """
+
+    def __init__(self, s):
+        self.balances = {}      # dues_record_id -> open balance in cents
+        self.by_reference = {}  # normalised document_number -> [dues_record_id]
+        self.by_name = {}       # normalised member name -> {member_id: [dues_record_id, oldest first]}
+        balance = DuesRecord.dues_amount - func.coalesce(DuesRecord.amount_paid, 0)
+        rows = s.query(
+            DuesRecord.id, DuesRecord.member_id, DuesRecord.document_number, balance, User.first_name, User.last_name
+        ).join(User, DuesRecord.member_id == User.id).filter(balance > 0).order_by(
+            DuesRecord.due_date, DuesRecord.id
+        ).yield_per(STREAM_BATCH_SIZE)
+        for record_id, member_id, document_number, open_balance, first_name, last_name in rows:
+            self.balances[record_id] = _cents(open_balance)
+            reference = normalise_reference(document_number)
+            if reference:
+                self.by_reference.setdefault(reference, []).append(record_id)
+            for name in {normalise_name(f"{first_name or ''} {last_name or ''}"),
+                         normalise_name(f"{last_name or ''} {first_name or ''}")}:
+                if name:
+                    self.by_name.setdefault(name, {}).setdefault(member_id, []).append(record_id)
+
+    def _open(self, record_ids):
+        return [record_id for record_id in record_ids if self.balances.get(record_id, 0) > 0]
+
+    def match(self, line):
+        """
+        Allocate a credit to open records: [(dues_record_id, cents)], or None to send it for review.
+        Tried in order: the record whose document_number is the line's reference (amount up to its
+        balance); the payer's oldest record with exactly that balance; all of the payer's open
+        records when the amount settles them together. Payer names shared by several members never match.
+        """
+        cents = _cents(line.amount)
+        reference = normalise_reference(line.reference)
+        if reference:
+            for record_id in self._open(self.by_reference.get(reference, ())):
+                if cents <= self.balances[record_id]:
+                    return self._allocate([(record_id, cents)])
+
+        members = self.by_name.get(normalise_name(line.payer_name), {})
+        if len(members) != 1:
+            return None
+        record_ids = self._open(next(iter(members.values())))
+        for record_id in record_ids:
+            if self.balances[record_id] == cents:
+                return self._allocate([(record_id, cents)])
+        if record_ids and sum(self.balances[record_id] for record_id in record_ids) == cents:
+            return self._allocate([(record_id, self.balances[record_id]) for record_id in record_ids])
+        return None
+
+    def _allocate(self, allocations):
+        for record_id, cents in allocations:
+            self.balances[record_id] -= cents
+        return allocations
+
+
+def _with_history(lines, seen, batch_size=DUPLICATE_CHECK_BATCH_SIZE):
+    """Yield lines, reading the history of each batch into seen before its first line."""
+    lines = iter(lines)
+    while True:
+        batch = list(itertools.islice(lines, batch_size))
+        if not batch:
+            return
+        seen.load([line for line in batch if line.amount > 0])
+        yield from batch
+
+
+def import_statement(s, lines, result, source_file=None, actor_id=None, flush_size=IMPORT_FLUSH_SIZE):
+    """
+    Match streamed StatementLines against open dues and post the matches to the payment ledger.
+
+    Every credit is kept as a BankStatementLine: matched lines are recorded as 'matched',
+    the rest wait in the review queue as 'pending'. Payments and lines are written in batches
+    as the file is read, so memory stays bounded for large statements; the caller commits
+    once at the end. Debits, zero amounts and lines already imported are skipped. Returns result.
+    """
+    index = OpenDuesIndex(s)
+    seen = SeenLines(s, result.import_id)
+    imported_at = datetime.utcnow()
+    payments = []
+    lines_out = []
+
+    for line in _with_history(lines, seen):
+        if line.amount <= 0:
+            result.skip(line.line_number, "not a credit")
+            continue
+        if seen.is_duplicate(line):
+            result.duplicates += 1
+            continue
+
+        allocations = index.match(line)
+        lines_out.append({
+            'import_id': result.import_id,
+            'source_file': source_file,
+            'line_number': line.line_number,
+            'posted_date': line.posted_date,
+            'amount': line.amount,
+            'reference': line.reference,
+            'transaction_id': line.transaction_id,
+            'payer_name': line.payer_name,
+            'description': (line.description or '')[:255] or None,
+            'status': 'matched' if allocations else 'pending',
+            'dues_record_id': allocations[0][0] if allocations else None,
+            'imported_by_id': actor_id,
+            'resolved_by_id': actor_id if allocations else None,
+            'resolved_at': imported_at if allocations else None,
+        })
+        if allocations:
+            payments.extend({
+                'dues_record_id': record_id,
+                'amount': cents / 100.0,
+                'payment_date': line.posted_date,
+                'document_number': line.reference,
+            } for record_id, cents in allocations)
+            result.matched += 1
+            result.matched_amount += line.amount
+        else:
+            result.unmatched += 1
+            result.unmatched_amount += line.amount
+
+        if len(payments) >= flush_size:
+            post_payment_rows(s, payments, actor_id)
+            payments = []
+        if len(lines_out) >= flush_size:
+            s.execute(BankStatementLine.__table__.insert(), lines_out)
+            lines_out = []
+
+    post_payment_rows(s, payments, actor_id)
+    if lines_out:
+        s.execute(BankStatementLine.__table__.insert(), lines_out)
+    return result
+
+
+def new_import(stream, filename):
+    """Start an import: (result, lines) for a statement upload."""
+    result = StatementImportResult(uuid.uuid4().hex)
+    return result, read_statement(stream, filename, result)
+
+
+def pending_lines(s, limit=200):
+    """Review queue, oldest statement date first."""
+    return s.query(BankStatementLine).filter_by(status='pending').order_by(
+        BankStatementLine.posted_date, BankStatementLine.id
+    ).limit(limit).all()
+
+
+def resolve_line(s, line, actor_id, dues_record_id=None):
+    """
+    Take a line off the review queue: post it as a payment on dues_record_id, or mark it
+    ignored when no record is given. Returns False if the record does not exist.
+    """
+    if dues_record_id is not None:
+        if not post_payments(s, {dues_record_id: line.amount}, actor_id, line.posted_date, line.reference):
+            return False
+        line.status = 'matched'
+        line.dues_record_id = dues_record_id
+    else:
+        line.status = 'ignored'
+    line.resolved_by_id = actor_id
+    line.resolved_at = datetime.utcnow()
+    return True
@@ -0,0 +1,220 @@
+# app/dues/reminders.py
+
+import logging
+import smtplib
+import time
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from flask import current_app
+from sqlalchemy import bindparam
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import DuesReminder
+from .balances import aging_report
+
+logger = logging.getLogger(__name__)
+
+REMINDER_TEMPLATE = 'dues_reminder_email.txt'
+REMINDER_UNIQUE_KEY = 'uq_dues_reminder_member_date'
+QUEUE_BATCH_SIZE = 1000
+# Delay before the first retry; doubled after every further failed attempt
+RETRY_BACKOFF = timedelta(minutes=5)
+
+
+def _recently_reminded(s, member_ids, since):
+    """Members in member_ids with a reminder queued or sent on or after since; failed ones do not count."""
+    return {member_id for member_id, in s.query(DuesReminder.member_id).filter(
+        DuesReminder.member_id.in_(member_ids),
+        DuesReminder.reminder_date >= since,
+        DuesReminder.status != 'failed'
+    )}
+
+
+def queue_reminders(s, tenant_name, as_of=None, min_balance=0.01, min_interval_days=None):
+    """
+    Fill the outbox with one templated reminder per member whose open balance is at least
+    min_balance, read from the balance summary. A member reminded within the last
+    min_interval_days (default REMINDER_MIN_INTERVAL_DAYS) is left alone, so a daily cron
+    reminds each member once per interval. Returns the number of reminders queued.
+    """
+    as_of = as_of or date.today()
+    if min_interval_days is None:
+        min_interval_days = current_app.config['REMINDER_MIN_INTERVAL_DAYS']
+    since = as_of - timedelta(days=max(min_interval_days, 1) - 1)
+    template = current_app.jinja_env.get_template(REMINDER_TEMPLATE)
+    subject = f"{tenant_name}: dues balance reminder"
+    rows, _ = aging_report(s)
+    rows = [row for row in rows if row['email'] and row['balance'] >= min_balance]
+
+    queued = 0
+    for i in range(0, len(rows), QUEUE_BATCH_SIZE):
+        batch = rows[i:i + QUEUE_BATCH_SIZE]
+        skip = _recently_reminded(s, [row['member_id'] for row in batch], since)
+        reminders = [{
+            'member_id': row['member_id'],
+            'reminder_date': as_of,
+            'email': row['email'],
+            'subject': subject,
+            'body': template.render(tenant_name=tenant_name, member=row, as_of=as_of),
+            'balance': row['balance'],
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': datetime.utcnow(),
+        } for row in batch if row['member_id'] not in skip]
+        if not reminders:
+            continue
+        # The unique key still covers two runs racing on the same day
+        result = s.execute(pg_insert(DuesReminder).values(reminders).on_conflict_do_nothing(
+            constraint=REMINDER_UNIQUE_KEY
+        ))
+        queued += result.rowcount
+    s.commit()
+    return queued
+
+
+class RateLimiter:
+    """Spaces calls to wait() at least 1/per_second apart; a falsy rate disables limiting."""
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self.next_at = time.monotonic()
+
+    def wait(self):
+        now = time.monotonic()
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+
+def smtp_connection(config):
+    smtp = smtplib.SMTP(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=30)
+    if config['MAIL_USE_TLS']:
+        smtp.starttls()
+    if config['MAIL_USERNAME']:
+        smtp.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+    return smtp
+
+
+def _message(sender, email, subject, body):
+    message = EmailMessage()
+    message['From'] = sender
+    message['To'] = email
+    message['Subject'] = subject
+    message['Date'] = formatdate(localtime=True)
+    message['Message-ID'] = make_msgid()
+    message.set_content(body)
+    return message
+
+
+def _claim_batch(s, batch_size):
+    """Due pending reminders, locked so concurrent senders skip them instead of sending twice."""
+    return s.query(
+        DuesReminder.id, DuesReminder.email, DuesReminder.subject, DuesReminder.body, DuesReminder.attempts
+    ).filter(
+        DuesReminder.status == 'pending', DuesReminder.next_attempt_at <= datetime.utcnow()
+    ).order_by(DuesReminder.next_attempt_at, DuesReminder.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+
+def _record_results(s, sent_ids, failures, max_attempts):
+    """Write a batch's delivery state back in two statements: one UPDATE for the sent rows, one executemany for failures."""
+    now = datetime.utcnow()
+    table = DuesReminder.__table__
+    if sent_ids:
+        s.execute(table.update().where(table.c.id.in_(sent_ids)).values(
+            status='sent', sent_at=now, attempts=table.c.attempts + 1, last_error=None
+        ))
+    if failures:
+        s.execute(
+            table.update().where(table.c.id == bindparam('b_id')).values(
+                status=bindparam('b_status'), attempts=bindparam('b_attempts'),
+                next_attempt_at=bindparam('b_next_attempt_at'), last_error=bindparam('b_error')
+            ),
+            [{
+                'b_id': reminder_id,
+                'b_status': 'failed' if permanent or attempts + 1 >= max_attempts else 'pending',
+                'b_attempts': attempts + 1,
+                'b_next_attempt_at': now + RETRY_BACKOFF * (2 ** attempts),
+                'b_error': error[:255],
+            } for reminder_id, attempts, error, permanent in failures]
+        )
+    s.commit()
+
+
+def send_batch(s, smtp_factory=None, limiter=None):
+    """
+    Send one batch of due reminders over a single SMTP connection.
+    Returns (sent, failed), or None when nothing is due.
+    """
+    config = current_app.config
+    rows = _claim_batch(s, config['MAIL_BATCH_SIZE'])
+    if not rows:
+        s.rollback()
+        return None
+
+    sent_ids = []
+    failures = []
+    try:
+        smtp = (smtp_factory or smtp_connection)(config)
+    except (smtplib.SMTPException, OSError) as e:
+        logger.error(f"Could not connect to mail server {config['MAIL_SERVER']}:{config['MAIL_PORT']}: {str(e)}")
+        failures = [(row.id, row.attempts, f"Connection failed: {str(e)}", False) for row in rows]
+        _record_results(s, sent_ids, failures, config['MAIL_MAX_ATTEMPTS'])
+        return 0, len(failures)
+
+    try:
+        for index, row in enumerate(rows):
+            if limiter:
+                limiter.wait()
+            try:
+                smtp.send_message(_message(config['MAIL_DEFAULT_SENDER'], row.email, row.subject, row.body))
+                sent_ids.append(row.id)
+            except smtplib.SMTPRecipientsRefused as e:
+                # Rejected addresses will not start working on a retry
+                failures.append((row.id, row.attempts, f"Recipient refused: {e.recipients}", True))
+            except smtplib.SMTPResponseException as e:
+                # 5xx replies are permanent, 4xx ones are worth retrying
+                failures.append((row.id, row.attempts, f"{e.smtp_code} {e.smtp_error!r}", 500 <= e.smtp_code < 600))
+            except smtplib.SMTPServerDisconnected as e:
+                # The connection is gone: everything not yet sent is retried with the next batch
+                failures.extend((pending.id, pending.attempts, f"Disconnected: {str(e)}", False) for pending in rows[index:])
+                break
+            except smtplib.SMTPException as e:
+                # Anything else smtplib raises (unsupported extension, bad data, ...) fails just this row.
+                # SMTPException subclasses OSError, so this has to come before the socket error case.
+                failures.append((row.id, row.attempts, f"{type(e).__name__}: {str(e)}", False))
+            except OSError as e:
+                # Socket errors leave the connection unusable, same as a disconnect
+                failures.extend((pending.id, pending.attempts, f"Disconnected: {str(e)}", False) for pending in rows[index:])
+                break
+    finally:
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        # Record what was sent even if something unexpected escaped the loop, so it is not resent;
+        # rows never attempted stay pending and are claimed again by the next batch
+        _record_results(s, sent_ids, failures, config['MAIL_MAX_ATTEMPTS'])
+
+    return len(sent_ids), len(failures)
+
+
+def drain_outbox(s, smtp_factory=None, max_per_second=None):
+    """
+    Send batches until no reminder is due. Returns (sent, failed, elapsed seconds).
+    max_per_second defaults to MAIL_MAX_PER_SECOND and paces sends across batches.
+    """
+    limiter = RateLimiter(max_per_second if max_per_second is not None else current_app.config['MAIL_MAX_PER_SECOND'])
+    started = time.perf_counter()
+    total_sent = total_failed = 0
+    while True:
+        result = send_batch(s, smtp_factory, limiter)
+        if result is None:
+            break
+        sent, failed = result
+        total_sent += sent
+        total_failed += failed
+        if not sent and failed:
+            # Nothing got through (server down); leave the rest for the next run
+            break
+    return total_sent, total_failed, time.perf_counter() - started
@@ -0,0 +1,109 @@
+# app/dues/reports.py
+
+from collections import namedtuple
+from sqlalchemy import func
+from app.models import User, DuesRecord, DuesType, DuesPayment
+from app.utils import STREAM_BATCH_SIZE
+
+PaidReportRow = namedtuple('PaidReportRow', [
+    'member_name', 'dues_type', 'due_date', 'dues_amount', 'amount_paid', 'payment_received_date', 'document_number'
+])
+DuesTypeTotal = namedtuple('DuesTypeTotal', ['dues_type', 'amount_due', 'amount_paid', 'record_count'])
+
+
+class DuesPaidReport:
+    """Detail rows plus totals for the dues paid report, shared by the CSV, HTML and PDF outputs."""
+
+    def __init__(self, rows, by_dues_type, total_due, total_paid, record_count):
+        self.rows = rows
+        self.by_dues_type = by_dues_type
+        self.total_due = total_due
+        self.total_paid = total_paid
+        self.record_count = record_count
+
+
+def _filtered(query, start_date, end_date, member_id):
+    if start_date:
+        query = query.filter(DuesRecord.due_date >= start_date)
+    if end_date:
+        query = query.filter(DuesRecord.due_date <= end_date)
+    if member_id:
+        query = query.filter(DuesRecord.member_id == member_id)
+    return query
+
+
+def paid_report_rows_query(s, start_date=None, end_date=None, member_id=None):
+    """Column-only detail query: largest amount owed first, then due date, then name."""
+    amount_paid = func.coalesce(DuesRecord.amount_paid, 0)
+    query = s.query(
+        (func.coalesce(User.first_name, '') + ' ' + func.coalesce(User.last_name, '')).label('member_name'),
+        DuesType.dues_type,
+        DuesRecord.due_date,
+        DuesRecord.dues_amount,
+        amount_paid.label('amount_paid'),
+        DuesRecord.payment_received_date,
+        DuesRecord.document_number
+    ).select_from(DuesRecord).join(User, DuesRecord.member_id == User.id).join(DuesType, DuesRecord.dues_type_id == DuesType.id)
+    return _filtered(query, start_date, end_date, member_id).order_by(
+        (DuesRecord.dues_amount - amount_paid).desc(),
+        DuesRecord.due_date,
+        User.last_name,
+        User.first_name
+    )
+
+
+def paid_report_totals(s, start_date=None, end_date=None, member_id=None):
+    """
+    Per-dues-type and grand totals in one GROUP BY ROLLUP query.
+    Returns (by_dues_type, total_due, total_paid, record_count).
+    """
+    query = s.query(
+        DuesType.dues_type,
+        func.sum(DuesRecord.dues_amount),
+        func.sum(func.coalesce(DuesRecord.amount_paid, 0)),
+        func.count(DuesRecord.id),
+        func.grouping(DuesType.dues_type)
+    ).select_from(DuesRecord).join(DuesType, DuesRecord.dues_type_id == DuesType.id)
+    rows = _filtered(query, start_date, end_date, member_id).group_by(
+        func.rollup(DuesType.dues_type)
+    ).order_by(func.grouping(DuesType.dues_type), DuesType.dues_type).all()
+
+    by_dues_type = []
+    total_due, total_paid, record_count = 0.0, 0.0, 0
+    for dues_type, amount_due, amount_paid, count, is_total in rows:
+        if is_total:
+            total_due, total_paid, record_count = amount_due or 0.0, amount_paid or 0.0, count
+        else:
+            by_dues_type.append(DuesTypeTotal(dues_type, amount_due or 0.0, amount_paid or 0.0, count))
+    return by_dues_type, total_due, total_paid, record_count
+
+
+def paid_report_version(s, start_date=None, end_date=None, member_id=None):
+    """Cheap fingerprint of the data behind the report, used to key cached PDF renderings."""
+    query = s.query(
+        func.count(DuesRecord.id),
+        func.max(DuesRecord.id),
+        func.sum(DuesRecord.dues_amount),
+        func.sum(func.coalesce(DuesRecord.amount_paid, 0)),
+        func.max(DuesRecord.date_dues_generated)
+    ).select_from(DuesRecord)
+    version = list(_filtered(query, start_date, end_date, member_id).one())
+    # Payments, member names and dues type names also show up in the output
+    version.append(s.query(func.max(DuesPayment.id)).scalar())
+    version.append(s.query(func.max(User.updated_at)).scalar())
+    version.append(s.query(func.max(DuesType.updated_at)).scalar())
+    return version
+
+
+def iter_paid_report_rows(s, start_date=None, end_date=None, member_id=None, batch_size=STREAM_BATCH_SIZE):
+    """Detail rows fetched batch_size at a time from a server-side cursor, for exports of any size."""
+    query = paid_report_rows_query(s, start_date, end_date, member_id).yield_per(batch_size)
+    for row in query:
+        yield PaidReportRow(*row)
+
+
+def get_dues_paid_report(s, start_date=None, end_date=None, member_id=None):
+    """Load the dues paid report: detail rows as plain tuples, totals computed by Postgres."""
+    rows = [PaidReportRow(*row) for row in paid_report_rows_query(s, start_date, end_date, member_id)]
+    by_dues_type, total_due, total_paid, record_count = paid_report_totals(s, start_date, end_date, member_id)
+    return DuesPaidReport(rows, by_dues_type, total_due, total_paid, record_count)
@@ -1,17 +1,30 @@
 import logging
-from flask import Blueprint, request, render_template, redirect, url_for, session, flash, g, Response
+from flask import Blueprint, request, render_template, redirect, url_for, session, flash, g, Response, jsonify
 from config import Config
 from database import get_tenant_db_session
-from app.models import User, DuesRecord, DuesType, AttendanceRecord, AttendanceType
+from app.models import User, DuesRecord, DuesType, BankStatementLine
 from app.members.forms import DuesCreateForm, DuesPaymentForm, DuesUpdateForm
+from app.members.directory import get_member_directory
+from .generation import generate_dues_records, selected_member_ids
+from .ledger import open_record_payments, post_payments, set_amount_paid, submitted_payments
+from .balances import aging_report, member_balances
+from app.monthly_rollups import month_start
+from .kpis import DEFAULT_TREND_MONTHS, kpi_trend
+from .pagination import DEFAULT_PAGE_SIZE, dues_page, dues_record_json, page_size_arg
+from .reconciliation import StatementFormatError, import_statement, new_import, pending_lines, resolve_line
+from .reports import get_dues_paid_report, iter_paid_report_rows, paid_report_totals, paid_report_version
+from app.utils import csv_download
+from app.pdf_jobs import pdf_job_id, pdf_job_response, pdf_job_status_response, pdf_stylesheet, send_pdf_job, start_pdf_job
 from sqlalchemy.orm import joinedload
 from datetime import date, datetime
-from io import StringIO, BytesIO
-import csv
+from io import BytesIO
 from . import dues_bp
 
 logger = logging.getLogger(__name__)
 
+# Background PDF reports this blueprint renders, and so the only jobs its poll and download routes serve
+DUES_PDF_REPORTS = ('dues_paid_report',)
+
 
 @dues_bp.route('/<tenant_id>', methods=['GET', 'POST'])
 def dues(tenant_id):
@@ -22,7 +35,7 @@ def dues(tenant_id):
         dues_types = s.query(DuesType).filter_by(is_active=True).all()
         dues_create_form = DuesCreateForm()
         dues_create_form.dues_type_id.choices = [(dues_type.id, dues_type.dues_type) for dues_type in dues_types]
-        dues_create_form.member_id.choices = [(user.id, f"{user.first_name} {user.last_name}") for user in s.query(User).all()]
+        dues_create_form.member_id.choices = get_member_directory(s, tenant_id).choices()
 
         if request.method == 'POST' and can_edit:
             if dues_create_form.validate_on_submit():
@@ -38,15 +51,8 @@ def dues(tenant_id):
                 flash('Dues record created successfully!', 'success')
                 return redirect(url_for('dues.dues', tenant_id=tenant_id))
 
-        # Query dues records, open dues first, then sorted
-        dues_records = s.query(DuesRecord).join(User).join(DuesType).order_by(
-            DuesRecord.amount_paid < DuesRecord.dues_amount,  # Open dues first
-            DuesRecord.due_date,
-            User.last_name,
-            User.first_name
-        ).all()
-
-        return render_template('dues.html', tenant_id=tenant_id, dues_records=dues_records, form=dues_create_form, can_edit=can_edit, dues_types=dues_types)
+        # Records are listed page by page on the dues history pages, so none are loaded here
+        return render_template('dues.html', tenant_id=tenant_id, form=dues_create_form, can_edit=can_edit, dues_types=dues_types)
 
 
 @dues_bp.route('/<tenant_id>/payment/<int:dues_record_id>', methods=['GET', 'POST'])
@@ -60,7 +66,9 @@ def dues_payment(tenant_id, dues_record_id):
         form = DuesPaymentForm(obj=dues_record) # Pre-populate form with existing data
 
         if form.validate_on_submit():
-            dues_record.amount_paid = form.amount_paid.data
+            # Record the change as a ledger entry rather than overwriting the total
+            set_amount_paid(s, dues_record, form.amount_paid.data, actor_id=session.get('user_id'),
+                            payment_date=form.payment_received_date.data, document_number=form.document_number.data)
             dues_record.document_number = form.document_number.data
             dues_record.payment_received_date = form.payment_received_date.data
             s.commit()
@@ -127,40 +135,12 @@ def generate_dues(tenant_id):
                     flash("Invalid amount or date format.", "danger")
                     return redirect(url_for('dues.generate_dues', tenant_id=tenant_id))
 
-                # Get all active users
-                all_users = s.query(User).filter_by(is_active=True).order_by(User.first_name, User.last_name).all()
-
-                records_created = 0
-                for user in all_users:
-                    # Check if user was selected (checkbox checked)
-                    user_selected = request.form.get(f'select_{user.id}') == 'on'
-
-                    if user_selected:
-                        # Check if dues record already exists for this user, dues type, and due date
-                        existing_record = s.query(DuesRecord).filter_by(
-                            member_id=user.id,
-                            dues_type_id=dues_type_id,
-                            due_date=due_date
-                        ).first()
-
-                        if existing_record:
-                            # Update existing record
-                            existing_record.dues_amount = amount_due
-                            existing_record.date_dues_generated = date.today()
-                        else:
-                            # Create new record
-                            new_record = DuesRecord(
-                                member_id=user.id,
-                                dues_amount=amount_due,
-                                dues_type_id=dues_type_id,
-                                due_date=due_date,
-                                date_dues_generated=date.today()
-                            )
-                            s.add(new_record)
-                            records_created += 1
+                # One INSERT ... ON CONFLICT for all selected members
+                member_ids = selected_member_ids(request.form)
+                records_created, records_updated = generate_dues_records(s, member_ids, dues_type_id, amount_due, due_date)
 
                 s.commit()
-                flash(f"Dues generated successfully! {records_created} new records created.", "success")
+                flash(f"Dues generated successfully! {records_created} new records created, {records_updated} existing records updated.", "success")
 
             except Exception as e:
                 s.rollback()
@@ -213,37 +193,10 @@ def dues_collection(tenant_id):
     with get_tenant_db_session(tenant_id) as s:
         if request.method == 'POST':
             try:
-                # Process bulk payment updates for selected members
-                # Apply date filter to the records being processed
-                query = s.query(DuesRecord).join(User).join(DuesType).filter(
-                    DuesRecord.amount_paid < DuesRecord.dues_amount
-                )
-
-                if start_date:
-                    query = query.filter(DuesRecord.due_date >= start_date)
-                if end_date:
-                    query = query.filter(DuesRecord.due_date <= end_date)
-
-                dues_records = query.all()
-                payments_processed = 0
-
-                for record in dues_records:
-                    # Check if this record was selected for payment
-                    selected = request.form.get(f'select_{record.id}') == 'on'
-                    payment_amount_str = request.form.get(f'payment_{record.id}')
-
-                    if selected and payment_amount_str:
-                        try:
-                            payment_amount = float(payment_amount_str)
-                            if payment_amount > 0:
-                                # Add payment to existing amount paid
-                                record.amount_paid += payment_amount
-                                # Set payment date if not already set
-                                if not record.payment_received_date:
-                                    record.payment_received_date = date.today()
-                                payments_processed += 1
-                        except ValueError:
-                            continue  # Skip invalid payment amounts
+                # Only the submitted rows are looked at, and only those still open in the displayed
+                # date range are paid; payments go to the ledger in one batch
+                payments = open_record_payments(s, submitted_payments(request.form), start_date, end_date)
+                payments_processed = post_payments(s, payments, actor_id=session['user_id'])
 
                 s.commit()
                 flash(f"Payments processed successfully! {payments_processed} payment(s) recorded.", "success")
@@ -342,48 +295,39 @@ def my_dues_history(tenant_id):
 
             if can_manage_dues:
                 # Get all users for dropdown
-                all_users = s.query(User).order_by(User.last_name, User.first_name).all()
+                all_users = get_member_directory(s, tenant_id).entries()
 
                 if selected_user_id:
                     selected_user = s.query(User).filter_by(id=selected_user_id).first()
-                    if selected_user:
-                        # Show selected user's dues
-                        dues_query = s.query(DuesRecord).join(DuesType).join(User).filter(DuesRecord.member_id == selected_user_id).options(joinedload(DuesRecord.dues_type), joinedload(DuesRecord.member))
-                        page_title = f"Dues History - {selected_user.first_name or ''} {selected_user.last_name or ''}".strip() or selected_user.email
-                    else:
-                        # Invalid user selected, show all
-                        dues_query = s.query(DuesRecord).join(DuesType).join(User).options(joinedload(DuesRecord.dues_type), joinedload(DuesRecord.member))
-                        page_title = "All Dues History"
+
+                if selected_user:
+                    # Show selected user's dues
+                    member_id = selected_user.id
+                    page_title = f"Dues History - {selected_user.first_name or ''} {selected_user.last_name or ''}".strip() or selected_user.email
                 else:
-                    # No user selected, show all
-                    dues_query = s.query(DuesRecord).join(DuesType).join(User).options(joinedload(DuesRecord.dues_type), joinedload(DuesRecord.member))
+                    # No (or invalid) user selected, show all
+                    member_id = None
                     page_title = "All Dues History"
             else:
                 # Show only current user's dues
-                dues_query = s.query(DuesRecord).join(DuesType).join(User).filter(DuesRecord.member_id == current_user_id).options(joinedload(DuesRecord.dues_type), joinedload(DuesRecord.member))
+                member_id = current_user_id
                 page_title = "My Dues History"
 
-            # Apply date range filter
-            if start_date:
-                dues_query = dues_query.filter(DuesRecord.due_date >= start_date)
-            if end_date:
-                dues_query = dues_query.filter(DuesRecord.due_date <= end_date)
-
-            # Order by: unpaid dues first (by due date), then paid dues (by due date), then by name
-            my_dues = dues_query.order_by(
-                DuesRecord.amount_paid >= DuesRecord.dues_amount,  # Unpaid first, paid last
-                DuesRecord.due_date.asc(),  # Earliest due dates first within each group
-                User.last_name,
-                User.first_name
-            ).all()
+            # One keyset page: unpaid dues first (by due date), then paid dues, then by member; totals cover every page
+            page = dues_page(s, member_id, start_date, end_date,
+                             cursor=request.args.get('cursor'),
+                             page_size=page_size_arg(request.args.get('per_page', DEFAULT_PAGE_SIZE)))
+            my_dues = page.records
 
-            logger.info(f"Retrieved {len(my_dues)} dues records")
+            logger.info(f"Retrieved {len(my_dues)} of {page.totals['record_count']} dues records")
 
         logger.info("Rendering my_dues_history.html template")
         return render_template('my_dues_history.html',
                              tenant_id=tenant_id,
                              tenant_display_name=tenant_display_name,
                              my_dues=my_dues,
+                             page=page,
+                             totals=page.totals,
                              can_manage_dues=can_manage_dues,
                              page_title=page_title,
                              selected_user=selected_user,
@@ -398,6 +342,75 @@ def my_dues_history(tenant_id):
         return redirect(url_for('dues.my_dues_history', tenant_id=tenant_id))
 
 
+@dues_bp.route('/<tenant_id>/ledger')
+def dues_ledger(tenant_id):
+    """
+    JSON pages of dues records for the same views as the history pages.
+    Query args: member_id, start_date, end_date, cursor (from next_cursor), per_page.
+    """
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        return jsonify({'error': 'Not logged in'}), 401
+
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() if request.args.get('start_date') else None
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() if request.args.get('end_date') else None
+        member_id = int(request.args['member_id']) if request.args.get('member_id') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid member_id or date (use YYYY-MM-DD)'}), 400
+
+    # Members without dues permission only ever see their own records
+    if not session.get('user_permissions', {}).get('can_edit_dues', False):
+        if member_id and member_id != session['user_id']:
+            return jsonify({'error': 'Permission denied'}), 403
+        member_id = session['user_id']
+
+    ordering = 'recent' if request.args.get('order') == 'recent' else 'ledger'
+    with get_tenant_db_session(tenant_id) as s:
+        page = dues_page(s, member_id, start_date, end_date,
+                         cursor=request.args.get('cursor'),
+                         page_size=page_size_arg(request.args.get('per_page', DEFAULT_PAGE_SIZE)),
+                         ordering=ordering)
+        return jsonify({
+            'records': [dues_record_json(record) for record in page.records],
+            'next_cursor': page.next_cursor,
+            'totals': page.totals,
+        })
+
+
+@dues_bp.route('/<tenant_id>/kpis')
+def dues_kpis(tenant_id):
+    """
+    JSON billed / collected / outstanding per due month and dues type, read from the monthly rollup.
+    Query args: start and end (YYYY-MM, default the last five years), dues_type_id.
+    """
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        return jsonify({'error': 'Not logged in'}), 401
+    if not session.get('user_permissions', {}).get('can_edit_dues', False):
+        return jsonify({'error': 'Permission denied'}), 403
+
+    try:
+        end_month = datetime.strptime(request.args['end'], '%Y-%m').date() if request.args.get('end') else month_start(date.today())
+        if request.args.get('start'):
+            start_month = datetime.strptime(request.args['start'], '%Y-%m').date()
+        else:
+            months_back = end_month.year * 12 + end_month.month - DEFAULT_TREND_MONTHS
+            start_month = date(months_back // 12, months_back % 12 + 1, 1)
+        dues_type_id = int(request.args['dues_type_id']) if request.args.get('dues_type_id') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid dues_type_id or month (use YYYY-MM)'}), 400
+    if start_month > end_month:
+        return jsonify({'error': 'start must not be after end'}), 400
+
+    with get_tenant_db_session(tenant_id) as s:
+        months = kpi_trend(s, start_month, end_month, dues_type_id)
+        return jsonify({
+            'start': start_month.strftime('%Y-%m'),
+            'end': end_month.strftime('%Y-%m'),
+            'months': months,
+            'totals': {key: sum(month[key] for month in months) for key in ('record_count', 'billed', 'collected', 'outstanding')},
+        })
+
+
 @dues_bp.route('/<tenant_id>/member/<int:member_id>/history')
 def member_dues_history(tenant_id, member_id):
     if 'user_id' not in session or session['tenant_id'] != tenant_id:
@@ -419,24 +432,143 @@ def member_dues_history(tenant_id, member_id):
             flash("Member not found.", "danger")
             return redirect(url_for('dues.my_dues_history', tenant_id=tenant_id))
 
-        # Get member's dues records
-        member_dues = s.query(DuesRecord, DuesType).join(DuesType).filter(
-            DuesRecord.member_id == member_id
-        ).order_by(DuesRecord.due_date.desc()).all()
+        # Get one page of the member's dues records, newest first
+        page = dues_page(s, member_id, cursor=request.args.get('cursor'),
+                         page_size=page_size_arg(request.args.get('per_page', DEFAULT_PAGE_SIZE)),
+                         ordering='recent', with_totals=False)
 
-        # Calculate summary
-        total_due = sum(record.dues_amount for record, _ in member_dues)
-        total_paid = sum(record.amount_paid for record, _ in member_dues)
-        total_balance = total_due - total_paid
+        # Summary and record count come precomputed from the member balance rows
+        balances, totals = member_balances(s, member_id)
 
         return render_template('member_dues_history.html',
                              tenant_id=tenant_id,
                              tenant_display_name=tenant_display_name,
                              selected_member=selected_member,
-                             member_dues=member_dues,
-                             total_due=total_due,
-                             total_paid=total_paid,
-                             total_balance=total_balance)
+                             member_dues=page.records,
+                             page=page,
+                             balances=balances,
+                             total_due=totals['total_due'],
+                             total_paid=totals['total_paid'],
+                             total_balance=totals['balance'],
+                             aging=totals,
+                             today=date.today())
+
+
+@dues_bp.route('/<tenant_id>/aging_report')
+def dues_aging_report(tenant_id):
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        flash("You must be logged in to view this page.", "danger")
+        return redirect(url_for('auth.login', tenant_id=tenant_id))
+
+    # Check if user has permission to view dues reports
+    user_permissions = session.get('user_permissions', {})
+    if not user_permissions.get('can_edit_dues', False):
+        flash("You do not have permission to view dues reports.", "danger")
+        return redirect(url_for('dues.dues', tenant_id=tenant_id))
+
+    tenant_display_name = Config.TENANT_DISPLAY_NAMES.get(tenant_id, tenant_id.capitalize())
+    dues_type_id = request.args.get('dues_type_id', type=int)
+
+    with get_tenant_db_session(tenant_id) as s:
+        dues_types = s.query(DuesType).filter_by(is_active=True).order_by(DuesType.dues_type).all()
+        rows, totals = aging_report(s, dues_type_id)
+
+        return render_template('dues_aging_report.html',
+                             tenant_id=tenant_id,
+                             tenant_display_name=tenant_display_name,
+                             dues_types=dues_types,
+                             selected_dues_type_id=dues_type_id,
+                             rows=rows,
+                             totals=totals)
+
+
+@dues_bp.route('/<tenant_id>/reconcile', methods=['GET', 'POST'])
+def dues_reconcile(tenant_id):
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        flash("You must be logged in to view this page.", "danger")
+        return redirect(url_for('auth.login', tenant_id=tenant_id))
+
+    user_permissions = session.get('user_permissions', {})
+    if not user_permissions.get('can_edit_dues', False):
+        flash("You do not have permission to reconcile dues payments.", "danger")
+        return redirect(url_for('dues.dues', tenant_id=tenant_id))
+
+    tenant_display_name = Config.TENANT_DISPLAY_NAMES.get(tenant_id, tenant_id.capitalize())
+
+    with get_tenant_db_session(tenant_id) as s:
+        if request.method == 'POST':
+            statement = request.files.get('statement')
+            if not statement or not statement.filename:
+                flash("Please choose a bank statement file to import.", "danger")
+                return redirect(url_for('dues.dues_reconcile', tenant_id=tenant_id))
+
+            try:
+                # The upload is parsed and matched as it is read; nothing is committed unless the whole file imports
+                result, lines = new_import(statement.stream, statement.filename)
+                import_statement(s, lines, result, source_file=statement.filename, actor_id=session['user_id'])
+                s.commit()
+                flash(f"Statement imported: {result.matched} line(s) posted (${result.matched_amount:.2f}), "
+                      f"{result.unmatched} line(s) sent for review (${result.unmatched_amount:.2f}), "
+                      f"{result.duplicates} already imported, {result.skipped} skipped.", "success")
+                for error in result.errors:
+                    flash(error, "warning")
+            except StatementFormatError as e:
+                s.rollback()
+                flash(str(e), "danger")
+            except Exception as e:
+                s.rollback()
+                logger.error(f"Statement import failed for tenant {tenant_id}: {str(e)}")
+                flash(f"Failed to import statement: {str(e)}", "danger")
+            return redirect(url_for('dues.dues_reconcile', tenant_id=tenant_id))
+
+        lines = pending_lines(s)
+        pending_count = s.query(BankStatementLine).filter_by(status='pending').count()
+
+        return render_template('dues_reconcile.html',
+                             tenant_id=tenant_id,
+                             tenant_display_name=tenant_display_name,
+                             lines=lines,
+                             pending_count=pending_count)
+
+
+@dues_bp.route('/<tenant_id>/reconcile/<int:line_id>', methods=['POST'])
+def dues_reconcile_line(tenant_id, line_id):
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        flash("You must be logged in to view this page.", "danger")
+        return redirect(url_for('auth.login', tenant_id=tenant_id))
+
+    user_permissions = session.get('user_permissions', {})
+    if not user_permissions.get('can_edit_dues', False):
+        flash("You do not have permission to reconcile dues payments.", "danger")
+        return redirect(url_for('dues.dues', tenant_id=tenant_id))
+
+    with get_tenant_db_session(tenant_id) as s:
+        line = s.query(BankStatementLine).filter_by(id=line_id, status='pending').first()
+        if not line:
+            flash("Statement line not found or already resolved.", "danger")
+            return redirect(url_for('dues.dues_reconcile', tenant_id=tenant_id))
+
+        dues_record_id = None
+        if request.form.get('action') != 'ignore':
+            dues_record_id = request.form.get('dues_record_id', type=int)
+            if not dues_record_id:
+                flash("Enter the dues record number to post this payment to.", "danger")
+                return redirect(url_for('dues.dues_reconcile', tenant_id=tenant_id))
+
+        try:
+            if not resolve_line(s, line, session['user_id'], dues_record_id):
+                flash(f"Dues record #{dues_record_id} does not exist.", "danger")
+                return redirect(url_for('dues.dues_reconcile', tenant_id=tenant_id))
+            s.commit()
+            if dues_record_id:
+                flash(f"Payment of ${line.amount:.2f} posted to dues record #{dues_record_id}.", "success")
+            else:
+                flash("Statement line ignored.", "success")
+        except Exception as e:
+            s.rollback()
+            flash(f"Failed to resolve statement line: {str(e)}", "danger")
+
+    return redirect(url_for('dues.dues_reconcile', tenant_id=tenant_id))
 
 
 @dues_bp.route('/<tenant_id>/paid_report_filter', methods=['GET', 'POST'])
@@ -478,7 +610,7 @@ def dues_paid_report_filter(tenant_id):
 
         with get_tenant_db_session(tenant_id) as s:
             # Get all members for the filter dropdown
-            all_members = s.query(User).order_by(User.last_name, User.first_name).all()
+            all_members = get_member_directory(s, tenant_id).entries()
 
         return render_template('dues_paid_report_filter.html',
                              tenant_id=tenant_id,
@@ -539,9 +671,7 @@ def pale_report_filter(tenant_id):
         with get_tenant_db_session(tenant_id) as db_session:
             try:
                 # Get all active members for the filter dropdown with proper error handling
-                all_members = db_session.query(User).filter_by(is_active=True).order_by(
-                    User.last_name, User.first_name
-                ).all()
+                all_members = get_member_directory(db_session, tenant_id).entries(active_only=True)
 
                 # Log successful data retrieval
                 logger.info(f"PALE report filter loaded successfully for tenant: {tenant_id}")
@@ -686,66 +816,11 @@ def _build_pale_report_query_params(form_data):
 
 @dues_bp.route('/<tenant_id>/pale_report', methods=['GET', 'POST'])
 def pale_report(tenant_id):
-    try:
-        if 'user_id' not in session or session['tenant_id'] != tenant_id:
-            flash("You must be logged in to view this page.", "danger")
-            return redirect(url_for('auth.login', tenant_id=tenant_id))
-
-        # Check if user has permission to view attendance reports
-        user_permissions = session.get('user_permissions', {})
-        if not user_permissions.get('can_edit_attendance', False):
-            flash("You do not have permission to view attendance reports.", "danger")
-            return redirect(url_for('attendance.attendance_history', tenant_id=tenant_id))
-
-        tenant_display_name = Config.TENANT_DISPLAY_NAMES.get(tenant_id, tenant_id.capitalize())
-
-        # Get filter parameters
-        start_date_str = request.args.get('start_date')
-        end_date_str = request.args.get('end_date')
-        member_filter = request.args.get('member_filter', '')  # member id or empty for all
-        report_format = request.args.get('format', 'pdf')
-
-        # Parse dates if provided
-        start_date = None
-        end_date = None
-        if start_date_str:
-            try:
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            except ValueError:
-                start_date = None
-        if end_date_str:
-            try:
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            except ValueError:
-                end_date = None
-
-        with get_tenant_db_session(tenant_id) as s:
-            # Get current user for report header
-            current_user = s.query(User).get(session['user_id'])
-            if not current_user:
-                flash("User not found.", "danger")
-                return redirect(url_for('auth.login', tenant_id=tenant_id))
-
-            # Get all members for the filter dropdown
-            all_members = s.query(User).order_by(User.last_name, User.first_name).all()
-
-            # Build attendance summary data
-            # This will aggregate attendance records by member and attendance type
-            attendance_summary = generate_pale_summary(s, start_date, end_date, member_filter)
-
-            # Generate reports based on format
-            if report_format == 'csv':
-                return generate_pale_csv_report(attendance_summary, tenant_display_name, current_user, start_date, end_date)
-            elif report_format == 'pdf':
-                return generate_pale_pdf_report(attendance_summary, tenant_display_name, current_user, start_date, end_date)
-            else:
-                # Default to PDF download
-                return generate_pale_pdf_report(attendance_summary, tenant_display_name, current_user, start_date, end_date)
-
-    except Exception as e:
-        logger.error(f"Error in pale_report: {str(e)}")
-        flash("An error occurred while generating the PALE report.", "danger")
-        return redirect(url_for('attendance.attendance_history', tenant_id=tenant_id))
+    """The PALE filter form posts here; the attendance blueprint builds every format of the report."""
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        flash("You must be logged in to view this page.", "danger")
+        return redirect(url_for('auth.login', tenant_id=tenant_id))
+    return redirect(url_for('attendance.pale_report', tenant_id=tenant_id, **request.args.to_dict()))
 
 
 @dues_bp.route('/<tenant_id>/paid_report', methods=['GET', 'POST'])
@@ -790,126 +865,112 @@ def dues_paid_report(tenant_id):
                 flash("User not found.", "danger")
                 return redirect(url_for('auth.login', tenant_id=tenant_id))
 
-            # Get all members for the filter dropdown
-            all_members = s.query(User).order_by(User.last_name, User.first_name).all()
-
-            # Always show all dues records (both open and closed balances)
-            query = s.query(DuesRecord).join(User).join(DuesType)
+            # CSV is streamed straight from the database rather than loaded up front
+            if report_format == 'csv':
+                return generate_csv_report(tenant_id, tenant_display_name, start_date, end_date, member_filter or None)
 
-            # Apply date range filter to due date for all records
-            if start_date:
-                query = query.filter(DuesRecord.due_date >= start_date)
-            if end_date:
-                query = query.filter(DuesRecord.due_date <= end_date)
+            # PDFs (the default) are rendered on the background pool and cached until the dues data changes
+            params = {'start_date': start_date, 'end_date': end_date, 'member_filter': member_filter}
+            job_id = pdf_job_id(tenant_id, 'dues_paid_report', params,
+                                paid_report_version(s, start_date, end_date, member_filter or None))
+            start_pdf_job(tenant_id, job_id, render_paid_report_pdf, tenant_id, tenant_display_name,
+                          start_date, end_date, member_filter or None)
+            return pdf_job_response(tenant_id, job_id, 'dues', tenant_display_name)
 
-            # Apply member filter if provided
-            if member_filter:
-                query = query.filter(DuesRecord.member_id == member_filter)
-
-            # Apply sorting: Primary sort by amount owed (largest to smallest), then by due date, then name
-            query = query.order_by(
-                (DuesRecord.dues_amount - DuesRecord.amount_paid).desc(),  # Amount owed (largest first)
-                DuesRecord.due_date,  # Then by due date (earliest first)
-                User.last_name,       # Then by last name
-                User.first_name       # Then by first name
-            )
+    except Exception as e:
+        logger.error(f"Error in dues_paid_report: {str(e)}")
+        flash("An error occurred while generating the dues paid report.", "danger")
+        return redirect(url_for('dues.dues', tenant_id=tenant_id))
 
-            paid_dues_records = query.all()
 
-            # Calculate summary totals
-            total_amount_paid = sum(record.amount_paid for record in paid_dues_records)
-            total_records = len(paid_dues_records)
+@dues_bp.route('/<tenant_id>/pdf_jobs/<job_id>')
+def pdf_job(tenant_id, job_id):
+    """Poll URL for a background dues PDF"""
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        return jsonify({'error': 'Not logged in'}), 401
+    if not session.get('user_permissions', {}).get('can_edit_dues', False):
+        return jsonify({'error': 'Permission denied'}), 403
+    return pdf_job_status_response(tenant_id, job_id, 'dues', DUES_PDF_REPORTS)
 
-            # Generate reports based on format - all are downloads now
-            if report_format == 'csv':
-                return generate_csv_report(paid_dues_records, tenant_display_name, current_user, start_date, end_date)
-            elif report_format == 'pdf':
-                return generate_pdf_report(paid_dues_records, tenant_display_name, current_user, start_date, end_date)
-            else:
-                # Default to PDF download
-                return generate_pdf_report(paid_dues_records, tenant_display_name, current_user, start_date, end_date)
 
-    except Exception as e:
-        logger.error(f"Error in dues_paid_report: {str(e)}")
-        flash("An error occurred while generating the dues paid report.", "danger")
+@dues_bp.route('/<tenant_id>/pdf_jobs/<job_id>/download')
+def pdf_job_download(tenant_id, job_id):
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        flash("You must be logged in to view this page.", "danger")
+        return redirect(url_for('auth.login', tenant_id=tenant_id))
+    if not session.get('user_permissions', {}).get('can_edit_dues', False):
+        flash("You do not have permission to view dues reports.", "danger")
         return redirect(url_for('dues.dues', tenant_id=tenant_id))
 
+    response = send_pdf_job(tenant_id, job_id, DUES_PDF_REPORTS)
+    if response is None:
+        flash("This report is no longer available. Please generate it again.", "warning")
+        return redirect(url_for('dues.dues_paid_report_filter', tenant_id=tenant_id))
+    return response
 
-def generate_csv_report(records, tenant_name, current_user, start_date, end_date):
-    """Generate CSV report for paid dues"""
-    output = StringIO()
-    writer = csv.writer(output)
 
+def paid_report_csv_rows(s, tenant_name, start_date, end_date, member_id=None):
+    """CSV rows for the paid dues report; detail rows are streamed, totals come from the ROLLUP query"""
     # Write centered headers as requested
-    writer.writerow([tenant_name])
-    writer.writerow(['Dues Paid Report'])
+    yield [tenant_name]
+    yield ['Dues Paid Report']
     if start_date or end_date:
         date_range = ''
         if start_date:
             date_range += f'From {start_date}'
         if end_date:
             date_range += f' To {end_date}'
-        writer.writerow([date_range])
-    writer.writerow([f'{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'])
-    writer.writerow([])  # Empty row
+        yield [date_range]
+    yield [f'{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}']
+    yield []  # Empty row
 
     # Write column headers
-    writer.writerow(['Member Name', 'Dues Type', 'Due Date', 'Amount Due', 'Amount Paid', 'Payment Date'])
+    yield ['Member Name', 'Dues Type', 'Due Date', 'Amount Due', 'Amount Paid', 'Payment Date']
 
     # Write data rows
-    for record in records:
-        writer.writerow([
-            f"{record.member.first_name} {record.member.last_name}",
-            record.dues_type.dues_type,
-            record.due_date.strftime('%Y-%m-%d'),  # Due Date moved between Dues Type and Amount Due
-            f"${record.dues_amount:.2f}",  # Amount Due (total amount that should be paid)
-            f"${record.amount_paid:.2f}",  # Amount Paid (how much has been paid)
-            record.payment_received_date.strftime('%Y-%m-%d') if record.payment_received_date else ''
-        ])
+    for row in iter_paid_report_rows(s, start_date, end_date, member_id):
+        yield [
+            row.member_name,
+            row.dues_type,
+            row.due_date.strftime('%Y-%m-%d'),  # Due Date moved between Dues Type and Amount Due
+            f"${row.dues_amount:.2f}",  # Amount Due (total amount that should be paid)
+            f"${row.amount_paid:.2f}",  # Amount Paid (how much has been paid)
+            row.payment_received_date.strftime('%Y-%m-%d') if row.payment_received_date else ''
+        ]
+
+    by_dues_type, total_due, total_paid, record_count = paid_report_totals(s, start_date, end_date, member_id)
 
     # Write summary - Totals on same line (no words)
-    writer.writerow([])  # Empty row
-    total_due = sum(r.dues_amount for r in records)
-    total_paid = sum(r.amount_paid for r in records)
-    writer.writerow([f'Totals: ${total_due:.2f}, ${total_paid:.2f}'])
+    yield []  # Empty row
+    yield [f'Totals: ${total_due:.2f}, ${total_paid:.2f}']
 
     # Write dues type breakdown (no records column)
-    writer.writerow([])  # Empty row
-    writer.writerow(['Dues Type Breakdown:'])
+    yield []  # Empty row
+    yield ['Dues Type Breakdown:']
 
-    # Group records by dues type and calculate totals
-    dues_type_totals = {}
-    for record in records:
-        dues_type = record.dues_type.dues_type
-        if dues_type not in dues_type_totals:
-            dues_type_totals[dues_type] = {'amount_due': 0, 'amount_paid': 0}
+    # Write breakdown for each dues type (no records count)
+    for totals in by_dues_type:
+        yield [
+            f'  {totals.dues_type}',
+            f'${totals.amount_due:.2f} due',
+            f'${totals.amount_paid:.2f} paid'
+        ]
 
-        dues_type_totals[dues_type]['amount_due'] += record.dues_amount
-        dues_type_totals[dues_type]['amount_paid'] += record.amount_paid
 
-    # Write breakdown for each dues type (no records count)
-    for dues_type, totals in dues_type_totals.items():
-        writer.writerow([
-            f'  {dues_type}',
-            f'${totals["amount_due"]:.2f} due',
-            f'${totals["amount_paid"]:.2f} paid'
-        ])
+def generate_csv_report(tenant_id, tenant_name, start_date, end_date, member_id=None):
+    """Stream CSV report for paid dues"""
+    def rows():
+        with get_tenant_db_session(tenant_id) as s:
+            yield from paid_report_csv_rows(s, tenant_name, start_date, end_date, member_id)
 
-    # Prepare response
-    output.seek(0)
-    response = Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-disposition': f'attachment; filename=dues_paid_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'}
-    )
-    return response
+    return csv_download(rows(), f'dues_paid_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
 
 
-def generate_html_report(records, tenant_name, current_user, start_date, end_date, start_date_str, end_date_str, member_filter, all_members, tenant_id):
+def generate_html_report(report, tenant_name, current_user, start_date, end_date, start_date_str, end_date_str, member_filter, all_members, tenant_id):
     """Generate HTML report for download"""
-    # Calculate summary totals
-    total_amount_paid = sum(record.amount_paid for record in records)
-    total_records = len(records)
+    # Summary totals
+    total_amount_paid = report.total_paid
+    total_records = report.record_count
 
     # Generate HTML content
     html_content = f"""
@@ -1013,15 +1074,15 @@ def generate_html_report(records, tenant_name, current_user, start_date, end_dat
 """
 
     # Add data rows
-    for record in records:
+    for row in report.rows:
         html_content += f"""
             <tr>
-                <td>{record.member.first_name} {record.member.last_name}</td>
-                <td>{record.dues_type.dues_type}</td>
-                <td class="text-right">${record.amount_paid:.2f}</td>
-                <td>{record.payment_received_date.strftime('%Y-%m-%d') if record.payment_received_date else '-'}</td>
-                <td>{record.document_number or '-'}</td>
-                <td>{record.due_date.strftime('%Y-%m-%d')}</td>
+                <td>{row.member_name}</td>
+                <td>{row.dues_type}</td>
+                <td class="text-right">${row.amount_paid:.2f}</td>
+                <td>{row.payment_received_date.strftime('%Y-%m-%d') if row.payment_received_date else '-'}</td>
+                <td>{row.document_number or '-'}</td>
+                <td>{row.due_date.strftime('%Y-%m-%d')}</td>
             </tr>
 """
 
@@ -1053,393 +1114,128 @@ def generate_html_report(records, tenant_name, current_user, start_date, end_dat
     return response
 
 
-def generate_pdf_report(records, tenant_name, current_user, start_date, end_date):
-    """Generate PDF report for paid dues"""
-    try:
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.lib import colors
-
-        buffer = BytesIO()
-        # Set margins to 0.75 inches for better table fit
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            topMargin=0.75*72,    # 0.75 inches
-            bottomMargin=0.75*72, # 0.75 inches
-            leftMargin=0.75*72,   # 0.75 inches
-            rightMargin=0.75*72   # 0.75 inches
-        )
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Ultra-minimal centered title (maximum paper efficiency)
-        title = Paragraph(f"<para align='center'>{tenant_name}</para>", styles['Heading1'])
-        story.append(title)
-        story.append(Spacer(1, 1))  # Reduced from 2 to 1
-
-        # Ultra-minimal report title
-        report_title = Paragraph("<para align='center'>Dues Paid Report</para>", styles['Heading2'])
-        story.append(report_title)
-        story.append(Spacer(1, 1))  # Reduced from 2 to 1
-
-        # Ultra-minimal date range (if provided)
-        if start_date or end_date:
-            date_range_text = ''
-            if start_date:
-                date_range_text += f'From {start_date}'
-            if end_date:
-                date_range_text += f' To {end_date}'
-            date_range = Paragraph(f"<para align='center'>{date_range_text}</para>", styles['Normal'])
-            story.append(date_range)
-            story.append(Spacer(1, 1))  # Reduced from 2 to 1
-
-        # Ultra-minimal generation info - date/time only
-        gen_info = Paragraph(f"<para align='center'>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</para>", styles['Normal'])
-        story.append(gen_info)
-        story.append(Spacer(1, 3))  # Reduced from 5 to 3
-
-        # Table data
-        data = [['Member Name', 'Dues Type', 'Due Date', 'Amount Due', 'Amount Paid', 'Payment Date']]
-
-        for record in records:
-            data.append([
-                f"{record.member.first_name} {record.member.last_name}",
-                record.dues_type.dues_type,
-                record.due_date.strftime('%Y-%m-%d'),  # Due Date moved between Dues Type and Amount Due
-                f"${record.dues_amount:.2f}",  # Amount Due (total amount that should be paid)
-                f"${record.amount_paid:.2f}",  # Amount Paid (how much has been paid)
-                record.payment_received_date.strftime('%Y-%m-%d') if record.payment_received_date else ''
-            ])
-
-        # Summary row - Totals on same line (no words)
-        total_due_pdf = sum(r.dues_amount for r in records)
-        total_paid_pdf = sum(r.amount_paid for r in records)
-        data.append([
-            ' Totals',
-            f'${total_due_pdf:.2f}',
-            f'${total_paid_pdf:.2f}',
-            '',
-            '',
-            ''
-        ])
-
-        # Create clean table without grid lines or backgrounds
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Left align Member Name column
-            ('ALIGN', (3, 1), (3, -1), 'RIGHT'),  # Right align Amount Due column
-            ('ALIGN', (4, 1), (4, -1), 'RIGHT'),  # Right align Amount Paid column
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),  # Headers: 14pt
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),  # Header padding: 10pt
-            ('FONTSIZE', (0, 1), (-1, -2), 12),  # Data: 12pt
-            ('BOTTOMPADDING', (0, 1), (-1, -2), 8),  # Data padding: 8pt
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 12),  # Totals: 12pt
-            ('BOTTOMPADDING', (0, -1), (-1, -1), 8)  # Totals padding: 8pt
-        ]))
-
-        story.append(table)
-
-        # Add dues type breakdown section (more compact)
-        story.append(Spacer(1, 12))
-        story.append(Paragraph("Dues Type Breakdown:", styles['Heading2']))
-
-        # Group records by dues type and calculate totals
-        dues_type_totals = {}
-        for record in records:
-            dues_type = record.dues_type.dues_type
-            if dues_type not in dues_type_totals:
-                dues_type_totals[dues_type] = {'amount_due': 0, 'amount_paid': 0}
-
-            dues_type_totals[dues_type]['amount_due'] += record.dues_amount
-            dues_type_totals[dues_type]['amount_paid'] += record.amount_paid
-
-        # Create breakdown table data (no records column)
-        breakdown_data = [['Dues Type', 'Amount Due', 'Amount Paid']]
-        for dues_type, totals in dues_type_totals.items():
-            breakdown_data.append([
-                dues_type,
-                f"${totals['amount_due']:.2f}",
-                f"${totals['amount_paid']:.2f}"
-            ])
-
-        # Create breakdown table (more compact)
-        breakdown_table = Table(breakdown_data)
-        breakdown_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-
-        story.append(breakdown_table)
-
-        # Build PDF
-        doc.build(story)
-
-        # Prepare response
-        buffer.seek(0)
-        response = Response(
-            buffer.getvalue(),
-            mimetype='application/pdf',
-            headers={'Content-disposition': f'attachment; filename=dues_paid_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'}
-        )
-        return response
-
-    except ImportError:
-        # Return a simple error response since we don't have access to tenant_id or flash in this context
-        error_response = Response(
-            "PDF generation requires reportlab library. Please install it first.",
-            status=500,
-            mimetype='text/plain'
-        )
-        return error_response
-
-
-def generate_pale_summary(session, start_date, end_date, member_filter):
-    """Generate PALE attendance summary data"""
-    try:
-        # Query attendance records with filters
-        query = session.query(AttendanceRecord).join(User).join(AttendanceType)
-
-        # Apply date range filter to attendance date
-        if start_date:
-            query = query.filter(AttendanceRecord.attendance_date >= start_date)
-        if end_date:
-            query = query.filter(AttendanceRecord.attendance_date <= end_date)
-
-        # Apply member filter if provided
-        if member_filter:
-            query = query.filter(AttendanceRecord.member_id == member_filter)
-
-        attendance_records = query.all()
-
-        # Group by member and aggregate attendance types
-        member_summary = {}
-
-        for record in attendance_records:
-            member_id = record.member_id
-            if member_id not in member_summary:
-                member_summary[member_id] = {
-                    'member': record.member,
-                    'counts': {'P': 0, 'A': 0, 'L': 0, 'E': 0}
-                }
-
-            # Map attendance status to P/A/L/E codes
-            status = record.attendance_status.upper()
-            if status == 'PRESENT':
-                member_summary[member_id]['counts']['P'] += 1
-            elif status == 'ABSENT':
-                member_summary[member_id]['counts']['A'] += 1
-            elif status == 'LATE':
-                member_summary[member_id]['counts']['L'] += 1
-            elif status == 'EXCUSED':
-                member_summary[member_id]['counts']['E'] += 1
-
-        # Convert to list format for reporting
-        summary_data = []
-        for member_id, data in member_summary.items():
-            member = data['member']
-            counts = data['counts']
-
-            # Get all phone numbers
-            phone_numbers = []
-            if member.phone:
-                phone_numbers.append(member.phone)
-            if hasattr(member, 'phone2') and member.phone2:
-                phone_numbers.append(member.phone2)
-
-            summary_data.append({
-                'member_name': f"{member.first_name} {member.last_name}",
-                'company': getattr(member, 'company', ''),
-                'phone_numbers': ', '.join(phone_numbers),
-                'present_count': counts['P'],
-                'absent_count': counts['A'],
-                'late_count': counts['L'],
-                'excused_count': counts['E']
-            })
-
-        # Sort by member name
-        summary_data.sort(key=lambda x: x['member_name'])
-
-        return summary_data
-
-    except Exception as e:
-        logger.error(f"Error generating PALE summary: {str(e)}")
-        return []
+def render_paid_report_pdf(tenant_id, tenant_name, start_date, end_date, member_id=None):
+    """Load and render the paid dues PDF; runs on the background PDF pool with its own session"""
+    with get_tenant_db_session(tenant_id) as s:
+        # All dues records (both open and closed balances); totals come from one ROLLUP query
+        report = get_dues_paid_report(s, start_date, end_date, member_id)
+    return generate_pdf_report(report, tenant_name, start_date, end_date)
+
+
+def generate_pdf_report(report, tenant_name, start_date, end_date):
+    """Render the paid dues PDF and return its bytes (raises ImportError without reportlab)"""
+    from reportlab.lib.pagesizes import letter, A4
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib import colors
+
+    buffer = BytesIO()
+    # Set margins to 0.75 inches for better table fit
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        topMargin=0.75*72,    # 0.75 inches
+        bottomMargin=0.75*72, # 0.75 inches
+        leftMargin=0.75*72,   # 0.75 inches
+        rightMargin=0.75*72   # 0.75 inches
+    )
+    styles = pdf_stylesheet()
+    story = []
 
+    # Ultra-minimal centered title (maximum paper efficiency)
+    title = Paragraph(f"<para align='center'>{tenant_name}</para>", styles['Heading1'])
+    story.append(title)
+    story.append(Spacer(1, 1))  # Reduced from 2 to 1
 
-def generate_pale_csv_report(summary_data, tenant_name, current_user, start_date, end_date):
-    """Generate CSV report for PALE attendance summary"""
-    output = StringIO()
-    writer = csv.writer(output)
+    # Ultra-minimal report title
+    report_title = Paragraph("<para align='center'>Dues Paid Report</para>", styles['Heading2'])
+    story.append(report_title)
+    story.append(Spacer(1, 1))  # Reduced from 2 to 1
 
-    # Write headers
-    writer.writerow([tenant_name])
-    writer.writerow(['PALE Attendance Report'])
+    # Ultra-minimal date range (if provided)
     if start_date or end_date:
-        date_range = ''
+        date_range_text = ''
         if start_date:
-            date_range += f'From {start_date}'
+            date_range_text += f'From {start_date}'
         if end_date:
-            date_range += f' To {end_date}'
-        writer.writerow([date_range])
-    writer.writerow([f'{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'])
-    writer.writerow([])  # Empty row
-
-    # Write column headers
-    writer.writerow(['Member Name', 'Company', 'Phone Numbers', 'P', 'A', 'L', 'E'])
-
-    # Write data rows
-    for record in summary_data:
-        writer.writerow([
-            record['member_name'],
-            record['company'],
-            record['phone_numbers'],
-            record['present_count'],
-            record['absent_count'],
-            record['late_count'],
-            record['excused_count']
-        ])
-
-    # Write summary
-    writer.writerow([])  # Empty row
-    total_present = sum(r['present_count'] for r in summary_data)
-    total_absent = sum(r['absent_count'] for r in summary_data)
-    total_late = sum(r['late_count'] for r in summary_data)
-    total_excused = sum(r['excused_count'] for r in summary_data)
-    total_records = len(summary_data)
-
-    writer.writerow([f'Totals: {total_records} members, P: {total_present}, A: {total_absent}, L: {total_late}, E: {total_excused}'])
+            date_range_text += f' To {end_date}'
+        date_range = Paragraph(f"<para align='center'>{date_range_text}</para>", styles['Normal'])
+        story.append(date_range)
+        story.append(Spacer(1, 1))  # Reduced from 2 to 1
 
-    # Prepare response
-    output.seek(0)
-    response = Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-disposition': f'attachment; filename=pale_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'}
-    )
-    return response
+    # Ultra-minimal generation info - date/time only
+    gen_info = Paragraph(f"<para align='center'>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</para>", styles['Normal'])
+    story.append(gen_info)
+    story.append(Spacer(1, 3))  # Reduced from 5 to 3
 
+    # Table data
+    data = [['Member Name', 'Dues Type', 'Due Date', 'Amount Due', 'Amount Paid', 'Payment Date']]
 
-def generate_pale_pdf_report(summary_data, tenant_name, current_user, start_date, end_date):
-    """Generate PDF report for PALE attendance summary"""
-    try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.lib import colors
-
-        buffer = BytesIO()
-        # Set margins to 0.75 inches for better table fit
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            topMargin=0.75*72,    # 0.75 inches
-            bottomMargin=0.75*72, # 0.75 inches
-            leftMargin=0.75*72,   # 0.75 inches
-            rightMargin=0.75*72   # 0.75 inches
-        )
-        styles = getSampleStyleSheet()
-        story = []
-
-        # Ultra-minimal centered title (maximum paper efficiency)
-        title = Paragraph(f"<para align='center'>{tenant_name}</para>", styles['Heading1'])
-        story.append(title)
-        story.append(Spacer(1, 1))
-
-        # Ultra-minimal report title
-        report_title = Paragraph("<para align='center'>PALE Attendance Report</para>", styles['Heading2'])
-        story.append(report_title)
-        story.append(Spacer(1, 1))
-
-        # Ultra-minimal date range (if provided)
-        if start_date or end_date:
-            date_range_text = ''
-            if start_date:
-                date_range_text += f'From {start_date}'
-            if end_date:
-                date_range_text += f' To {end_date}'
-            date_range = Paragraph(f"<para align='center'>{date_range_text}</para>", styles['Normal'])
-            story.append(date_range)
-            story.append(Spacer(1, 1))
-
-        # Ultra-minimal generation info - date/time only
-        gen_info = Paragraph(f"<para align='center'>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</para>", styles['Normal'])
-        story.append(gen_info)
-        story.append(Spacer(1, 3))
-
-        # Table data - PALE format with attendance type columns
-        data = [['Member Name', 'Company', 'Phone Numbers', 'P', 'A', 'L', 'E']]
-
-        for record in summary_data:
-            data.append([
-                record['member_name'],
-                record['company'],
-                record['phone_numbers'],
-                str(record['present_count']),
-                str(record['absent_count']),
-                str(record['late_count']),
-                str(record['excused_count'])
-            ])
-
-        # Summary row
-        total_present = sum(r['present_count'] for r in summary_data)
-        total_absent = sum(r['absent_count'] for r in summary_data)
-        total_late = sum(r['late_count'] for r in summary_data)
-        total_excused = sum(r['excused_count'] for r in summary_data)
-        total_members = len(summary_data)
-
+    for row in report.rows:
         data.append([
-            f'Totals: {total_members} members',
-            '',
-            '',
-            str(total_present),
-            str(total_absent),
-            str(total_late),
-            str(total_excused)
+            row.member_name,
+            row.dues_type,
+            row.due_date.strftime('%Y-%m-%d'),  # Due Date moved between Dues Type and Amount Due
+            f"${row.dues_amount:.2f}",  # Amount Due (total amount that should be paid)
+            f"${row.amount_paid:.2f}",  # Amount Paid (how much has been paid)
+            row.payment_received_date.strftime('%Y-%m-%d') if row.payment_received_date else ''
         ])
 
-        # Create clean table without grid lines or backgrounds
-        table = Table(data)
-        table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),  # Headers: 14pt
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),  # Header padding: 10pt
-            ('FONTSIZE', (0, 1), (-1, -2), 12),  # Data: 12pt
-            ('BOTTOMPADDING', (0, 1), (-1, -2), 8),  # Data padding: 8pt
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, -1), (-1, -1), 12),  # Totals: 12pt
-            ('BOTTOMPADDING', (0, -1), (-1, -1), 8)  # Totals padding: 8pt
-        ]))
-
-        story.append(table)
-
-        # Build PDF
-        doc.build(story)
-
-        # Prepare response
-        buffer.seek(0)
-        response = Response(
-            buffer.getvalue(),
-            mimetype='application/pdf',
-            headers={'Content-disposition': f'attachment; filename=pale_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'}
-        )
-        return response
-
-    except ImportError:
-        # Return a simple error response since we don't have access to tenant_id or flash in this context
-        error_response = Response(
-            "PDF generation requires reportlab library. Please install it first.",
-            status=500,
-            mimetype='text/plain'
-        )
-        return error_response
+    # Summary row - Totals on same line (no words)
+    data.append([
+        ' Totals',
+        f'${report.total_due:.2f}',
+        f'${report.total_paid:.2f}',
+        '',
+        '',
+        ''
+    ])
+
+    # Create clean table without grid lines or backgrounds
+    table = Table(data)
+    table.setStyle(TableStyle([
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('ALIGN', (0, 0), (0, -1), 'LEFT'),  # Left align Member Name column
+        ('ALIGN', (3, 1), (3, -1), 'RIGHT'),  # Right align Amount Due column
+        ('ALIGN', (4, 1), (4, -1), 'RIGHT'),  # Right align Amount Paid column
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),  # Headers: 14pt
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),  # Header padding: 10pt
+        ('FONTSIZE', (0, 1), (-1, -2), 12),  # Data: 12pt
+        ('BOTTOMPADDING', (0, 1), (-1, -2), 8),  # Data padding: 8pt
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, -1), (-1, -1), 12),  # Totals: 12pt
+        ('BOTTOMPADDING', (0, -1), (-1, -1), 8)  # Totals padding: 8pt
+    ]))
+
+    story.append(table)
+
+    # Add dues type breakdown section (more compact)
+    story.append(Spacer(1, 12))
+    story.append(Paragraph("Dues Type Breakdown:", styles['Heading2']))
+
+    # Create breakdown table data (no records column)
+    breakdown_data = [['Dues Type', 'Amount Due', 'Amount Paid']]
+    for totals in report.by_dues_type:
+        breakdown_data.append([
+            totals.dues_type,
+            f"${totals.amount_due:.2f}",
+            f"${totals.amount_paid:.2f}"
+        ])
+
+    # Create breakdown table (more compact)
+    breakdown_table = Table(breakdown_data)
+    breakdown_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    story.append(breakdown_table)
+
+    # Build PDF
+    doc.build(story)
+    return buffer.getvalue()
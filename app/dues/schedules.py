@@ -0,0 +1,194 @@
+# app/dues/schedules.py
+
+import calendar
+import logging
+import re
+from datetime import date, timedelta
+from sqlalchemy import literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import User, DuesRecord, DuesSchedule
+from .balances import rebuild_balances
+from .generation import DUES_RECORD_UNIQUE_KEY
+from app.monthly_rollups import months_between
+from .kpis import mark_kpi_months
+
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = ('monthly', 'quarterly', 'annual', 'anniversary')
+DEFAULT_BATCH_SIZE = 2000
+
+# member_anniversary is entered as MM/YY; older rows may hold MM/DD/YYYY or ISO dates
+_ANNIVERSARY_FORMATS = (
+    re.compile(r'^(?P<month>\d{1,2})/(?P<year>\d{2})$'),
+    re.compile(r'^(?P<month>\d{1,2})/\d{1,2}/(?P<year>\d{4})$'),
+    re.compile(r'^(?P<year>\d{4})-(?P<month>\d{1,2})(-\d{1,2})?$'),
+)
+
+
+def parse_anniversary(value):
+    """Return (month, join_year or None) from a member_anniversary string, or None if unparseable."""
+    value = (value or '').strip()
+    for pattern in _ANNIVERSARY_FORMATS:
+        match = pattern.match(value)
+        if match:
+            month = int(match.group('month'))
+            if not 1 <= month <= 12:
+                return None
+            year = int(match.group('year'))
+            return month, (2000 + year if year < 100 else year)
+    return None
+
+
+def _on_day(year, month, day):
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def _add_months(year, month, months):
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def schedule_window(schedule, as_of):
+    """(first, last) due dates still to materialise for schedule, or None when it is up to date."""
+    first = schedule.start_date
+    if schedule.generated_through and schedule.generated_through >= first:
+        first = schedule.generated_through + timedelta(days=1)
+    last = min(as_of, schedule.end_date) if schedule.end_date else as_of
+    return (first, last) if first <= last else None
+
+
+def due_dates(schedule, first, last):
+    """Due dates of a monthly, quarterly or annual schedule that fall within [first, last]."""
+    step = {'monthly': 1, 'quarterly': 3, 'annual': 12}[schedule.frequency]
+    day = schedule.day_of_month if schedule.frequency != 'annual' else schedule.start_date.day
+    dates = []
+    year, month = schedule.start_date.year, schedule.start_date.month
+    while True:
+        due = _on_day(year, month, day)
+        if due > last:
+            return dates
+        if due >= first:
+            dates.append(due)
+        year, month = _add_months(year, month, step)
+
+
+def _member_filter(schedule):
+    conditions = [User.is_active == True]
+    if schedule.membership_type_id:
+        conditions.append(User.membership_type_id == schedule.membership_type_id)
+    return conditions
+
+
+def _insert_ignore(stmt):
+    # Existing records (earlier runs, manual entries) are left untouched, which makes reruns no-ops
+    return stmt.on_conflict_do_nothing(constraint=DUES_RECORD_UNIQUE_KEY)
+
+
+def _materialise_fixed(s, schedule, first, last, batch_size, generated_on):
+    """One INSERT ... SELECT per due date and batch of member ids, committed as it goes."""
+    inserted = 0
+    for due in due_dates(schedule, first, last):
+        last_id = 0
+        while True:
+            member_ids = [row[0] for row in s.query(User.id).filter(
+                *_member_filter(schedule), User.id > last_id
+            ).order_by(User.id).limit(batch_size)]
+            if not member_ids:
+                break
+            source = select(
+                User.id, literal(schedule.amount), literal(schedule.dues_type_id), literal(due), literal(generated_on)
+            ).where(User.id.in_(member_ids))
+            result = s.execute(_insert_ignore(pg_insert(DuesRecord).from_select(
+                ['member_id', 'dues_amount', 'dues_type_id', 'due_date', 'date_dues_generated'], source
+            )))
+            s.commit()
+            inserted += result.rowcount
+            last_id = member_ids[-1]
+    return inserted
+
+
+def _materialise_anniversary(s, schedule, first, last, batch_size, generated_on):
+    """Yearly dues in each member's anniversary month, built in Python and inserted per batch."""
+    inserted = 0
+    last_id = 0
+    while True:
+        members = s.query(User.id, User.member_anniversary).filter(
+            *_member_filter(schedule), User.id > last_id
+        ).order_by(User.id).limit(batch_size).all()
+        if not members:
+            break
+        rows = []
+        for member_id, anniversary in members:
+            parsed = parse_anniversary(anniversary)
+            if not parsed:
+                continue
+            month, join_year = parsed
+            for year in range(first.year, last.year + 1):
+                due = _on_day(year, month, schedule.day_of_month)
+                if first <= due <= last and (join_year is None or year > join_year):
+                    rows.append({
+                        'member_id': member_id, 'dues_amount': schedule.amount, 'dues_type_id': schedule.dues_type_id,
+                        'due_date': due, 'date_dues_generated': generated_on, 'amount_paid': 0.0
+                    })
+        if rows:
+            result = s.execute(_insert_ignore(pg_insert(DuesRecord).values(rows)))
+            s.commit()
+            inserted += result.rowcount
+        last_id = members[-1][0]
+    return inserted
+
+
+def run_schedule(s, schedule, as_of=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Materialise every DuesRecord schedule owes up to as_of and advance its checkpoint.
+    Each batch commits on its own; after a crash the next run starts again from the old
+    checkpoint and the unique key skips rows that were already written.
+    Returns the number of records created.
+    """
+    as_of = as_of or date.today()
+    if schedule.frequency not in FREQUENCIES:
+        raise ValueError(f"Unknown dues schedule frequency: {schedule.frequency}")
+    window = schedule_window(schedule, as_of)
+    if not window:
+        return 0
+
+    first, last = window
+    generated_on = date.today()
+    if schedule.frequency == 'anniversary':
+        inserted = _materialise_anniversary(s, schedule, first, last, batch_size, generated_on)
+    else:
+        inserted = _materialise_fixed(s, schedule, first, last, batch_size, generated_on)
+
+    schedule.generated_through = last
+    # Batches commit without touching the KPI rollup; the window's months are refreshed once here
+    mark_kpi_months(s, months_between(first, last))
+    s.commit()
+    logger.info(f"Dues schedule {schedule.id}: {inserted} records for {first} to {last}")
+    return inserted
+
+
+def run_due_schedules(s, as_of=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Run every active schedule for one tenant. Returns {schedule_id: records created}.
+    The member balances are rebuilt once at the end (batches do not mark them), which also
+    rolls their aging buckets forward when run daily.
+    """
+    results = {}
+    schedules = s.query(DuesSchedule).filter_by(is_active=True).order_by(DuesSchedule.id).all()
+    for schedule in schedules:
+        schedule_id = schedule.id
+        try:
+            results[schedule_id] = run_schedule(s, schedule, as_of, batch_size)
+        except Exception as e:
+            # A broken schedule must not hold up the others; its checkpoint is unchanged so it retries next run
+            s.rollback()
+            logger.error(f"Dues schedule {schedule_id} failed: {str(e)}")
+            results[schedule_id] = None
+
+    try:
+        rebuild_balances(s)
+        s.commit()
+    except Exception as e:
+        s.rollback()
+        logger.error(f"Failed to rebuild dues member balances: {str(e)}")
+    return results
@@ -0,0 +1,192 @@
+# app/dues/statements.py
+
+import os
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from io import BytesIO
+from itertools import repeat
+from xml.sax.saxutils import escape
+from sqlalchemy import func
+from werkzeug.utils import secure_filename
+from app.models import User, DuesRecord, DuesType, DuesPayment
+from app.pdf_jobs import pdf_stylesheet
+from app.utils import STREAM_BATCH_SIZE
+
+# Statements handed to a worker process at a time; large enough to amortise pickling
+STATEMENT_CHUNK_SIZE = 25
+
+OpenItem = namedtuple('OpenItem', ['dues_type', 'due_date', 'dues_amount', 'amount_paid', 'balance'])
+StatementPayment = namedtuple('StatementPayment', ['payment_date', 'dues_type', 'amount', 'document_number'])
+MemberStatement = namedtuple('MemberStatement', [
+    'member_id', 'name', 'email', 'address_lines', 'open_items', 'payments', 'balance'
+])
+
+
+def _address_lines(line1, line2, city, state, zip_code):
+    city_line = ', '.join(part for part in (city, ' '.join(part for part in (state, zip_code) if part)) if part)
+    return tuple(line for line in (line1, line2, city_line) if line)
+
+
+def load_member_statements(s, as_of=None, payments_since=None, member_ids=None):
+    """
+    Everything the statements need, as plain picklable tuples, from two bulk queries:
+    open dues items (with member details) and payments since payments_since.
+    Members without an open balance get a statement only when listed in member_ids.
+    """
+    as_of = as_of or date.today()
+    payments_since = payments_since or date(as_of.year, 1, 1)
+    balance = DuesRecord.dues_amount - func.coalesce(DuesRecord.amount_paid, 0)
+
+    members = {}
+    if member_ids:
+        for row in s.query(User.id, User.first_name, User.last_name, User.email, User.address_line1,
+                           User.address_line2, User.city, User.state, User.zip_code).filter(User.id.in_(member_ids)):
+            members[row[0]] = row[1:]
+
+    items = {}
+    query = s.query(
+        DuesRecord.member_id, DuesType.dues_type, DuesRecord.due_date, DuesRecord.dues_amount,
+        func.coalesce(DuesRecord.amount_paid, 0), balance,
+        User.first_name, User.last_name, User.email, User.address_line1, User.address_line2,
+        User.city, User.state, User.zip_code
+    ).select_from(DuesRecord).join(User, DuesRecord.member_id == User.id).join(
+        DuesType, DuesRecord.dues_type_id == DuesType.id
+    ).filter(balance > 0, DuesRecord.due_date <= as_of)
+    if member_ids:
+        query = query.filter(DuesRecord.member_id.in_(member_ids))
+    for row in query.order_by(DuesRecord.member_id, DuesRecord.due_date).yield_per(STREAM_BATCH_SIZE):
+        members.setdefault(row[0], row[6:])
+        items.setdefault(row[0], []).append(OpenItem(*row[1:6]))
+
+    payments = {}
+    query = s.query(
+        DuesRecord.member_id, DuesPayment.payment_date, DuesType.dues_type, DuesPayment.amount, DuesPayment.document_number
+    ).select_from(DuesPayment).join(DuesRecord, DuesPayment.dues_record_id == DuesRecord.id).join(
+        DuesType, DuesRecord.dues_type_id == DuesType.id
+    ).filter(DuesPayment.payment_date >= payments_since, DuesPayment.payment_date <= as_of)
+    if member_ids:
+        query = query.filter(DuesRecord.member_id.in_(member_ids))
+    for row in query.order_by(DuesPayment.payment_date, DuesPayment.id).yield_per(STREAM_BATCH_SIZE):
+        if row[0] in members:
+            payments.setdefault(row[0], []).append(StatementPayment(*row[1:]))
+
+    statements = []
+    for member_id, (first_name, last_name, email, *address) in members.items():
+        open_items = items.get(member_id, [])
+        statements.append(MemberStatement(
+            member_id, f"{first_name or ''} {last_name or ''}".strip(), email, _address_lines(*address),
+            open_items, payments.get(member_id, []), sum(item.balance for item in open_items)
+        ))
+    statements.sort(key=lambda statement: (statement.name.split(' ')[-1].lower(), statement.name.lower(), statement.member_id))
+    return statements
+
+
+def statement_filename(statement):
+    return f"{secure_filename(statement.name) or 'member'}_{statement.member_id}.pdf"
+
+
+def render_statement_pdf(tenant_name, statement, as_of):
+    """Render one member's dues statement and return its bytes (raises ImportError without reportlab)"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib import colors
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.75*72, bottomMargin=0.75*72,
+                            leftMargin=0.75*72, rightMargin=0.75*72)
+    styles = pdf_stylesheet()
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+    ])
+
+    story = [
+        Paragraph(f"<para align='center'>{escape(tenant_name)}</para>", styles['Heading1']),
+        Paragraph("<para align='center'>Dues Statement</para>", styles['Heading2']),
+        Paragraph(f"<para align='center'>As of {as_of.strftime('%Y-%m-%d')}</para>", styles['Normal']),
+        Spacer(1, 12),
+    ]
+    for line in (statement.name,) + statement.address_lines:
+        story.append(Paragraph(escape(line), styles['Normal']))
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph("Open Items", styles['Heading3']))
+    if statement.open_items:
+        data = [['Dues Type', 'Due Date', 'Amount Due', 'Amount Paid', 'Balance']]
+        for item in statement.open_items:
+            data.append([item.dues_type, item.due_date.strftime('%Y-%m-%d'), f"${item.dues_amount:.2f}",
+                         f"${item.amount_paid:.2f}", f"${item.balance:.2f}"])
+        table = Table(data, hAlign='LEFT')
+        table.setStyle(table_style)
+        story.append(table)
+    else:
+        story.append(Paragraph("No open dues.", styles['Normal']))
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph("Payments Received", styles['Heading3']))
+    if statement.payments:
+        data = [['Date', 'Dues Type', 'Amount', 'Document #']]
+        for payment in statement.payments:
+            data.append([payment.payment_date.strftime('%Y-%m-%d'), payment.dues_type,
+                         f"${payment.amount:.2f}", payment.document_number or ''])
+        table = Table(data, hAlign='LEFT')
+        table.setStyle(table_style)
+        story.append(table)
+    else:
+        story.append(Paragraph("No payments received in this period.", styles['Normal']))
+    story.append(Spacer(1, 18))
+
+    story.append(Paragraph(f"<b>Balance Due: ${statement.balance:.2f}</b>", styles['Heading2']))
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def _render_chunk(tenant_name, statements, as_of):
+    """Worker entry point: render a chunk of statements to (filename, PDF bytes) pairs."""
+    return [(statement_filename(statement), render_statement_pdf(tenant_name, statement, as_of)) for statement in statements]
+
+
+def render_statements(tenant_name, statements, as_of, workers=None, chunk_size=STATEMENT_CHUNK_SIZE):
+    """
+    Yield (filename, PDF bytes) for every statement, in order. Rendering is CPU bound, so
+    chunks are spread over a process pool (one process per core unless workers says
+    otherwise); workers=1 renders in this process.
+    """
+    chunks = [statements[i:i + chunk_size] for i in range(0, len(statements), chunk_size)]
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from _render_chunk(tenant_name, chunk, as_of)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for rendered in executor.map(_render_chunk, repeat(tenant_name), chunks, repeat(as_of)):
+            yield from rendered
+
+
+def write_statements(tenant_name, statements, output, as_of, workers=None):
+    """
+    Render statements into output: a .zip path, or a directory that is created if needed.
+    Returns (count, elapsed seconds).
+    """
+    started = time.perf_counter()
+    count = 0
+    rendered = render_statements(tenant_name, statements, as_of, workers)
+    if output.lower().endswith('.zip'):
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for filename, pdf in rendered:
+                archive.writestr(filename, pdf)
+                count += 1
+    else:
+        os.makedirs(output, exist_ok=True)
+        for filename, pdf in rendered:
+            with open(os.path.join(output, filename), 'wb') as f:
+                f.write(pdf)
+            count += 1
+    return count, time.perf_counter() - started
@@ -0,0 +1,201 @@
+# app/members/audit.py
+
+import logging
+import re
+from datetime import date, datetime
+from flask import has_request_context, session as flask_session
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+from app.models import User, UserAuthDetails, MemberAuditLog
+
+logger = logging.getLogger(__name__)
+
+AUDITED_MODELS = (User, UserAuthDetails)
+
+# Bookkeeping columns that change on every write (or every login) and would only add noise
+IGNORED_COLUMNS = {'created_at', 'updated_at', 'version_id', 'last_login_1', 'last_login_2', 'last_login_3'}
+# Recorded as changed, but never with their values
+REDACTED_COLUMNS = {'password_hash'}
+REDACTED = '[redacted]'
+
+MAX_AUDIT_PAGE_SIZE = 500
+
+PARTITION_NAME = re.compile(r'^member_audit_log_(\d{4})_(\d{2})$')
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _redact(key, value):
+    if key in REDACTED_COLUMNS and value is not None:
+        return REDACTED
+    return _jsonable(value)
+
+
+def _member_id(obj):
+    return obj.id if isinstance(obj, User) else obj.user_id
+
+
+def _column_diff(obj, action):
+    """Return {column: [old, new]} for the audited columns of obj touched by this flush."""
+    state = inspect(obj)
+    changes = {}
+    for attr in state.mapper.column_attrs:
+        key = attr.key
+        if key in IGNORED_COLUMNS:
+            continue
+        if action == 'update':
+            history = state.attrs[key].history
+            if not history.has_changes():
+                continue
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            if old == new:
+                continue
+        else:
+            value = getattr(obj, key)
+            if value is None:
+                continue
+            old, new = (None, value) if action == 'insert' else (value, None)
+        changes[key] = [_redact(key, old), _redact(key, new)]
+    return changes
+
+
+def _current_actor_id():
+    if has_request_context():
+        return flask_session.get('user_id')
+    return None
+
+
+@event.listens_for(Session, 'after_flush')
+def _write_audit_rows(session, flush_context):
+    """Capture column diffs for audited models and insert them in the flush's own transaction."""
+    pending = [(obj, 'insert') for obj in session.new] + \
+              [(obj, 'update') for obj in session.dirty] + \
+              [(obj, 'delete') for obj in session.deleted]
+
+    rows = []
+    occurred_at = datetime.utcnow()
+    actor_id = None
+    for obj, action in pending:
+        if not isinstance(obj, AUDITED_MODELS):
+            continue
+        changes = _column_diff(obj, action)
+        if not changes:
+            continue
+        if actor_id is None:
+            actor_id = _current_actor_id()
+        rows.append({
+            'occurred_at': occurred_at,
+            'table_name': obj.__table__.name,
+            'record_id': obj.id,
+            'member_id': _member_id(obj),
+            'actor_id': actor_id,
+            'action': action,
+            'changes': changes,
+        })
+
+    if rows:
+        # One executemany; psycopg2 sends it as multi-row INSERT ... VALUES batches
+        session.connection().execute(MemberAuditLog.__table__.insert(), rows)
+
+
+def _serialize(entry):
+    return {
+        'id': entry.id,
+        'occurred_at': entry.occurred_at.isoformat(),
+        'table': entry.table_name,
+        'record_id': entry.record_id,
+        'member_id': entry.member_id,
+        'actor_id': entry.actor_id,
+        'action': entry.action,
+        'changes': entry.changes,
+    }
+
+
+def _history(s, column, value, limit, before):
+    limit = max(1, min(int(limit), MAX_AUDIT_PAGE_SIZE))
+    query = s.query(MemberAuditLog).filter(column == value)
+    if before:
+        query = query.filter(MemberAuditLog.occurred_at < before)
+    entries = query.order_by(MemberAuditLog.occurred_at.desc(), MemberAuditLog.id.desc()).limit(limit).all()
+    return [_serialize(entry) for entry in entries]
+
+
+def get_member_history(s, member_id, limit=100, before=None):
+    """Changes made to a member, newest first (served by ix_member_audit_log_member)."""
+    return _history(s, MemberAuditLog.member_id, member_id, limit, before)
+
+
+def get_actor_history(s, actor_id, limit=100, before=None):
+    """Changes made by a user, newest first (served by ix_member_audit_log_actor)."""
+    return _history(s, MemberAuditLog.actor_id, actor_id, limit, before)
+
+
+def _month_start(value, offset=0):
+    month = value.month - 1 + offset
+    return date(value.year + month // 12, month % 12 + 1, 1)
+
+
+def create_audit_partitions(conn, months_ahead=3, today=None):
+    """
+    Ensure monthly partitions exist from the current month through months_ahead, and for every
+    earlier month that still has rows in the default partition (written before its partition
+    existed). Rows that landed in the default partition are moved into their month's new partition.
+    Returns the names of the partitions created.
+    """
+    today = today or datetime.utcnow().date()
+    stranded = conn.execute(text(
+        "SELECT DISTINCT CAST(date_trunc('month', occurred_at) AS date) FROM member_audit_log_default "
+        "WHERE occurred_at < :current"
+    ), {'current': _month_start(today)}).scalars().all()
+    months = sorted(stranded) + [_month_start(today, offset) for offset in range(months_ahead + 1)]
+
+    existing = set(_partition_names(conn))
+    created = []
+    for start in months:
+        name = f"member_audit_log_{start:%Y_%m}"
+        if name not in existing:
+            _create_partition(conn, name, start, _month_start(start, 1))
+            created.append(name)
+    return created
+
+
+def _create_partition(conn, name, start, end):
+    bounds = {'start': start, 'end': end}
+    conn.execute(text(f"CREATE TABLE {name} (LIKE member_audit_log INCLUDING DEFAULTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM member_audit_log_default "
+        f"WHERE occurred_at >= :start AND occurred_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    conn.execute(text(
+        f"ALTER TABLE member_audit_log ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+
+
+def drop_expired_audit_partitions(conn, retention_months=24, today=None):
+    """Drop monthly partitions that ended before the retention cutoff. Returns the names dropped."""
+    cutoff = _month_start(today or datetime.utcnow().date(), -retention_months)
+    dropped = []
+    for name in _partition_names(conn):
+        match = PARTITION_NAME.match(name)
+        if match and date(int(match.group(1)), int(match.group(2)), 1) < cutoff:
+            conn.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    conn.execute(text("DELETE FROM member_audit_log_default WHERE occurred_at < :cutoff"), {'cutoff': cutoff})
+    return dropped
+
+
+def _partition_names(conn):
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'member_audit_log'"
+    ))
+    return sorted(row[0] for row in rows if PARTITION_NAME.match(row[0]))
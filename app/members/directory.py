@@ -0,0 +1,92 @@
+# app/members/directory.py
+
+import threading
+import time
+from array import array
+from collections import namedtuple
+from app.change_events import LOCAL_CACHE_TTL_SECONDS
+from app.models import User, MembershipType
+from .events import on_members_changed
+
+DirectoryEntry = namedtuple('DirectoryEntry', ['id', 'first_name', 'last_name', 'email', 'is_active', 'membership_type_name'])
+
+_directories = {}  # tenant_id -> (expires_at, MemberDirectory)
+_directories_lock = threading.Lock()
+
+
+def _sort_key(*values):
+    # Mimic Postgres ASC ordering: NULLs last, otherwise case-insensitive
+    return tuple((value is None, (value or '').lower()) for value in values)
+
+
+class MemberDirectory:
+    """
+    Compact snapshot of a tenant's members for dropdowns and form choices.
+    Data is held in parallel arrays ordered by (last_name, first_name);
+    _by_first_name is a permutation giving (first_name, last_name) order.
+    """
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda row: _sort_key(row[2], row[1]))
+        self.ids = array('l', (row[0] for row in rows))
+        self.first_names = [row[1] for row in rows]
+        self.last_names = [row[2] for row in rows]
+        self.emails = [row[3] for row in rows]
+        self.active = bytearray(1 if row[4] else 0 for row in rows)
+        self.membership_type_names = [row[5] for row in rows]
+        self.names = [f"{first or ''} {last or ''}".strip() or email
+                      for first, last, email in zip(self.first_names, self.last_names, self.emails)]
+        self._by_first_name = array('l', sorted(range(len(rows)),
+                                                key=lambda i: _sort_key(self.first_names[i], self.last_names[i])))
+        self._positions = {member_id: i for i, member_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _order(self, order_by, active_only):
+        positions = self._by_first_name if order_by == 'first_name' else range(len(self.ids))
+        if active_only:
+            return [i for i in positions if self.active[i]]
+        return positions
+
+    def entries(self, active_only=False, order_by='last_name'):
+        """Lightweight stand-ins for User rows, usable wherever templates read id/first_name/last_name/email."""
+        return [DirectoryEntry(self.ids[i], self.first_names[i], self.last_names[i], self.emails[i],
+                               bool(self.active[i]), self.membership_type_names[i])
+                for i in self._order(order_by, active_only)]
+
+    def choices(self, active_only=False, order_by='first_name'):
+        """(id, display name) pairs for SelectField choices and foreign key dropdowns."""
+        return [(self.ids[i], self.names[i]) for i in self._order(order_by, active_only)]
+
+    def name(self, member_id):
+        position = self._positions.get(int(member_id))
+        return self.names[position] if position is not None else None
+
+
+def get_member_directory(s, tenant_id):
+    """Return the cached directory for tenant_id, building it from one column query on a miss."""
+    now = time.monotonic()
+    with _directories_lock:
+        cached = _directories.get(tenant_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    rows = s.query(
+        User.id, User.first_name, User.last_name, User.email, User.is_active, MembershipType.name
+    ).outerjoin(MembershipType, User.membership_type_id == MembershipType.id).all()
+    directory = MemberDirectory(rows)
+
+    with _directories_lock:
+        _directories[tenant_id] = (now + LOCAL_CACHE_TTL_SECONDS, directory)
+    return directory
+
+
+@on_members_changed
+def invalidate_member_directory(tenant_id=None):
+    """Drop the snapshot for one tenant, or for all tenants when tenant_id is None."""
+    with _directories_lock:
+        if tenant_id is None:
+            _directories.clear()
+        else:
+            _directories.pop(tenant_id, None)
@@ -0,0 +1,10 @@
+# app/members/events.py
+
+from app.change_events import ModelChangeNotifier
+from app.models import User, UserAuthDetails, MembershipType
+
+# Writes to these models make cached member data (search prefixes, directory snapshots) stale
+members_changed = ModelChangeNotifier('members', (User, UserAuthDetails, MembershipType))
+
+on_members_changed = members_changed.listen
+notify_members_changed = members_changed.notify
@@ -1,7 +1,7 @@
 # app/members/routes.py
 
 import logging
-from flask import Blueprint, request, render_template, redirect, url_for, session, flash, g
+from flask import Blueprint, request, render_template, redirect, url_for, session, flash, g, jsonify
 from config import Config
 from database import get_tenant_db_session
 from app.models import User, UserAuthDetails, AttendanceRecord, AttendanceType, MembershipType, DuesRecord, DuesType
@@ -9,9 +9,22 @@ from app.utils import infer_tenant_from_hostname
 from sqlalchemy.orm import joinedload
 from datetime import date, datetime
 from .forms import DuesCreateForm, DuesPaymentForm, DuesUpdateForm
+from .search import search_members, get_cached_members
+from .directory import get_member_directory
+from .audit import get_member_history, get_actor_history
+from .updates import ConcurrentUpdateError, apply_changes, coerce_form_values, commit_changes, current_version
+from app.dues.schedules import parse_anniversary
 
 logger = logging.getLogger(__name__)
 
+# Columns a member may edit on their own demographics record
+DEMOGRAPHIC_FIELDS = [
+    'first_name', 'middle_initial', 'last_name', 'email',
+    'address_line1', 'address_line2', 'city', 'state', 'zip_code', 'cell_phone',
+    'company', 'company_address_line1', 'company_address_line2', 'company_city',
+    'company_state', 'company_zip_code', 'company_phone', 'company_title',
+    'network_group_title', 'member_anniversary', 'membership_type_id'
+]
 
 # Define the Blueprint
 members_bp = Blueprint('members', __name__, url_prefix='/')
@@ -48,6 +61,13 @@ def before_request():
 def _get_current_user(s, user_id):
     return s.query(User).filter_by(id=user_id).options(joinedload(User.auth_details)).first()
 
+def _demographic_values(source):
+    """Typed demographics values from a form or JSON object; raises ValueError for an invalid field."""
+    values = coerce_form_values(User, source, DEMOGRAPHIC_FIELDS)
+    if values.get('member_anniversary') and not parse_anniversary(values['member_anniversary']):
+        raise ValueError("Invalid value for member_anniversary (use MM/YY)")
+    return values
+
 def _format_phone(phone):
     if phone and len(phone) == 10 and phone.isdigit():
         return f"({phone[0:3]}) {phone[3:6]}-{phone[6:10]}"
@@ -85,36 +105,28 @@ def my_demographics(tenant_id):
 
         if request.method == 'POST':
             try:
-                # Update user info from form
-                current_user.first_name = request.form['first_name']
-                current_user.middle_initial = request.form.get('middle_initial')
-                current_user.last_name = request.form['last_name']
-                current_user.email = request.form['email']
-                current_user.address_line1 = request.form.get('address_line1')
-                current_user.address_line2 = request.form.get('address_line2')
-                current_user.city = request.form.get('city')
-                current_user.state = request.form.get('state')
-                current_user.zip_code = request.form.get('zip_code')
-                current_user.cell_phone = request.form.get('cell_phone')
-                current_user.company = request.form.get('company')
-                current_user.company_address_line1 = request.form.get('company_address_line1')
-                current_user.company_address_line2 = request.form.get('company_address_line2')
-                current_user.company_city = request.form.get('company_city')
-                current_user.company_state = request.form.get('company_state')
-                current_user.company_zip_code = request.form.get('company_zip_code')
-                current_user.company_phone = request.form.get('company_phone')
-                current_user.company_title = request.form.get('company_title')
-                current_user.network_group_title = request.form.get('network_group_title')
-                current_user.member_anniversary = request.form.get('member_anniversary')
-                current_user.membership_type_id = request.form.get('membership_type_id') or None
-
-                s.commit()
+                # Only columns whose submitted value differs are written
+                values = _demographic_values(request.form)
+                changed = apply_changes(current_user, values, expected_version=request.form.get('version_id'))
+                if not changed:
+                    flash("No changes to save.", "info")
+                    return redirect(url_for('members.my_demographics', tenant_id=tenant_id))
+
+                commit_changes(s, current_user)
                 flash("Your information has been updated successfully!", "success")
                 session['user_email'] = current_user.email
                 session['user_name'] = f"{current_user.first_name or ''} {current_user.last_name or ''}".strip() or current_user.email
                 
                 return redirect(url_for('members.my_demographics', tenant_id=tenant_id))
 
+            except ConcurrentUpdateError:
+                s.rollback()
+                flash("Your information was changed by someone else while you were editing. Please review it and try again.", "warning")
+                return redirect(url_for('members.my_demographics', tenant_id=tenant_id))
+            except ValueError as e:
+                s.rollback()
+                flash(f"{str(e)}.", "danger")
+                return redirect(url_for('members.my_demographics', tenant_id=tenant_id))
             except Exception as e:
                 s.rollback()
                 flash(f"Failed to update information: {str(e)}", "danger")
@@ -132,6 +144,48 @@ def my_demographics(tenant_id):
                            page_title="My Demographics",
                            format_phone_number=_format_phone
                            )
+
+
+@members_bp.route('/demographics/<tenant_id>/my', methods=['PATCH'])
+def patch_my_demographics(tenant_id):
+    """
+    Partial JSON update: {"version_id": n, "<field>": value, ...}.
+    Writes only the fields that changed; returns 409 if the record changed since version_id.
+    """
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        return jsonify({'error': 'Not logged in'}), 401
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+
+    with get_tenant_db_session(tenant_id) as s:
+        current_user = _get_current_user(s, session['user_id'])
+        if not current_user:
+            return jsonify({'error': 'User not found'}), 404
+
+        try:
+            values = _demographic_values(payload)
+            changed = apply_changes(current_user, values, expected_version=payload.get('version_id'))
+            if changed:
+                commit_changes(s, current_user)
+        except ConcurrentUpdateError as e:
+            s.rollback()
+            return jsonify({'error': str(e), 'version_id': current_version(current_user)}), 409
+        except ValueError as e:
+            s.rollback()
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            s.rollback()
+            logger.error(f"Error updating demographics for user {session['user_id']}: {str(e)}")
+            return jsonify({'error': 'Failed to update information'}), 500
+
+        if 'email' in changed or 'first_name' in changed or 'last_name' in changed:
+            session['user_email'] = current_user.email
+            session['user_name'] = f"{current_user.first_name or ''} {current_user.last_name or ''}".strip() or current_user.email
+
+        return jsonify({'changed': sorted(changed), 'version_id': current_version(current_user)})
+
 @members_bp.route('/demographics/<tenant_id>/list')
 def membership_list(tenant_id):
     import logging
@@ -190,8 +244,8 @@ def view_member_demographics(tenant_id, member_id):
             flash("Member not found.", "danger")
             return redirect(url_for('members.membership_list', tenant_id=tenant_id))
         
-        # Get all members for dropdown (to keep it available) with preloaded membership_type
-        all_members = s.query(User).options(joinedload(User.membership_type)).order_by(User.first_name, User.last_name).all()
+        # Get all members for dropdown (to keep it available) from the shared directory snapshot
+        all_members = get_member_directory(s, tenant_id).entries(order_by='first_name')
         
         # Get membership types for display
         membership_types = s.query(MembershipType).filter_by(is_active=True).order_by(MembershipType.sort_order, MembershipType.name).all()
@@ -208,6 +262,59 @@ def view_member_demographics(tenant_id, member_id):
                            format_phone_number=_format_phone)
 
 
+@members_bp.route('/demographics/<tenant_id>/search')
+def member_search(tenant_id):
+    """AJAX typeahead endpoint for member pickers: ?q=<text>&limit=<n>"""
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        return jsonify({'error': 'Not logged in'}), 401
+
+    query = request.args.get('q', '')
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        limit = 10
+
+    try:
+        # Short prefixes are usually served from the per-worker cache without a database session
+        members = get_cached_members(tenant_id, query, limit)
+        if members is None:
+            with get_tenant_db_session(tenant_id) as s:
+                members = search_members(s, tenant_id, query, limit)
+        return jsonify({'members': members})
+    except Exception as e:
+        logger.error(f"Error searching members: {str(e)}")
+        return jsonify({'error': 'Failed to search members'}), 500
+
+
+@members_bp.route('/security/<tenant_id>/audit')
+def member_audit_log(tenant_id):
+    """JSON change history: ?member_id=<id> or ?actor_id=<id>, optional &limit=<n>&before=<iso timestamp>"""
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        return jsonify({'error': 'Not logged in'}), 401
+    if not session.get('user_permissions', {}).get('can_edit_security'):
+        return jsonify({'error': 'You do not have permission to view the audit log'}), 403
+
+    try:
+        member_id = request.args.get('member_id', type=int)
+        actor_id = request.args.get('actor_id', type=int)
+        limit = int(request.args.get('limit', 100))
+        before = request.args.get('before')
+        before = datetime.fromisoformat(before) if before else None
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or before timestamp'}), 400
+    if (member_id is None) == (actor_id is None):
+        return jsonify({'error': 'Specify exactly one of member_id or actor_id'}), 400
+
+    try:
+        with get_tenant_db_session(tenant_id) as s:
+            if member_id is not None:
+                entries = get_member_history(s, member_id, limit, before)
+            else:
+                entries = get_actor_history(s, actor_id, limit, before)
+        return jsonify({'entries': entries})
+    except Exception as e:
+        logger.error(f"Error loading audit log: {str(e)}")
+        return jsonify({'error': 'Failed to load audit log'}), 500
 
 
 
@@ -240,7 +347,7 @@ def security(tenant_id):
 
             # Get all users for the dropdown (only if user can manage members)
             if can_manage_members:
-                all_users = s.query(User).options(joinedload(User.auth_details)).order_by(User.last_name, User.first_name).all()
+                all_users = get_member_directory(s, tenant_id).entries()
 
             # Get selected user (default to current user if no selection or not privileged)
             selected_user_id = request.args.get('user_id', current_user_id if not can_manage_members else None)
@@ -0,0 +1,132 @@
+# app/members/search.py
+
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import func, or_
+from app.change_events import LOCAL_CACHE_TTL_SECONDS
+from app.models import User
+from .events import on_members_changed
+
+# Queries up to this many characters are answered from the per-worker prefix cache
+PREFIX_CACHE_LENGTH = 3
+PREFIX_CACHE_MAX_ENTRIES = 4096
+MAX_RESULTS = 25
+
+_prefix_cache = OrderedDict()  # (tenant_id, prefix, limit) -> (expires_at, results)
+_prefix_cache_lock = threading.Lock()
+
+
+def member_search_expression():
+    """
+    Lower-cased "first last email" text used for fuzzy matching.
+    Must stay identical to the expression indexed by migrate_member_search_index.py,
+    otherwise Postgres cannot use the pg_trgm index.
+    """
+    return func.lower(
+        func.coalesce(User.first_name, '') + ' ' +
+        func.coalesce(User.last_name, '') + ' ' +
+        func.coalesce(User.email, '')
+    )
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _serialize(rows):
+    results = []
+    for member_id, first_name, last_name, email in rows:
+        results.append({
+            'id': member_id,
+            'name': f"{first_name or ''} {last_name or ''}".strip() or email,
+            'email': email
+        })
+    return results
+
+
+def _search_prefix(s, prefix, limit):
+    """Short queries: match the start of first name, last name or email (lower() text_pattern_ops indexes)."""
+    pattern = _escape_like(prefix) + '%'
+    rows = s.query(User.id, User.first_name, User.last_name, User.email).filter(
+        User.is_active == True,
+        or_(
+            func.lower(User.first_name).like(pattern, escape='\\'),
+            func.lower(User.last_name).like(pattern, escape='\\'),
+            func.lower(User.email).like(pattern, escape='\\')
+        )
+    ).order_by(User.first_name, User.last_name).limit(limit).all()
+    return _serialize(rows)
+
+
+def _search_fuzzy(s, query, limit):
+    """Longer queries: substring or trigram similarity match, best matches first."""
+    search_text = member_search_expression()
+    rows = s.query(User.id, User.first_name, User.last_name, User.email).filter(
+        User.is_active == True,
+        or_(
+            search_text.like('%' + _escape_like(query) + '%', escape='\\'),
+            search_text.op('%')(query)
+        )
+    ).order_by(
+        func.similarity(search_text, query).desc(),
+        User.first_name,
+        User.last_name
+    ).limit(limit).all()
+    return _serialize(rows)
+
+
+def _normalize(query, limit):
+    return ' '.join((query or '').lower().split()), max(1, min(int(limit), MAX_RESULTS))
+
+
+def get_cached_members(tenant_id, query, limit=10):
+    """
+    Return cached typeahead results without touching the database, or None on a miss.
+    Lets the endpoint skip opening a tenant session for the hottest (short) queries.
+    """
+    query, limit = _normalize(query, limit)
+    if not query:
+        return []
+    if len(query) > PREFIX_CACHE_LENGTH:
+        return None
+    with _prefix_cache_lock:
+        cached = _prefix_cache.get((tenant_id, query, limit))
+        if cached and cached[0] > time.monotonic():
+            _prefix_cache.move_to_end((tenant_id, query, limit))
+            return cached[1]
+    return None
+
+
+def search_members(s, tenant_id, query, limit=10):
+    """
+    Typeahead lookup of active members by name or email.
+    Returns a list of {'id', 'name', 'email'} dicts.
+    """
+    cached = get_cached_members(tenant_id, query, limit)
+    if cached is not None:
+        return cached
+
+    query, limit = _normalize(query, limit)
+    if len(query) > PREFIX_CACHE_LENGTH:
+        return _search_fuzzy(s, query, limit)
+
+    results = _search_prefix(s, query, limit)
+    key = (tenant_id, query, limit)
+    with _prefix_cache_lock:
+        _prefix_cache[key] = (time.monotonic() + LOCAL_CACHE_TTL_SECONDS, results)
+        _prefix_cache.move_to_end(key)
+        while len(_prefix_cache) > PREFIX_CACHE_MAX_ENTRIES:
+            _prefix_cache.popitem(last=False)
+    return results
+
+
+@on_members_changed
+def clear_prefix_cache(tenant_id=None):
+    """Drop cached prefixes for one tenant, or for all tenants when tenant_id is None."""
+    with _prefix_cache_lock:
+        if tenant_id is None:
+            _prefix_cache.clear()
+            return
+        for key in [key for key in _prefix_cache if key[0] == tenant_id]:
+            del _prefix_cache[key]
@@ -0,0 +1,127 @@
+# app/members/sync.py
+
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import text, tuple_
+from app.models import User, MembershipType, AttendanceType, DuesType, ReferralType, DeletedRecord
+
+MAX_SYNC_PAGE_SIZE = 1000
+MAX_RECORD_ID = 2 ** 31 - 1
+
+USER_SYNC_COLUMNS = [
+    'id', 'first_name', 'middle_initial', 'last_name', 'email',
+    'address_line1', 'address_line2', 'city', 'state', 'zip_code', 'cell_phone',
+    'company', 'company_address_line1', 'company_address_line2', 'company_city',
+    'company_state', 'company_zip_code', 'company_phone', 'company_title',
+    'network_group_title', 'member_anniversary', 'membership_type_id', 'is_active', 'updated_at'
+]
+
+# Lookup tables are small, so every changed row is returned in one go
+LOOKUP_MODELS = {
+    'membership_types': MembershipType,
+    'attendance_types': AttendanceType,
+    'dues_types': DuesType,
+    'referral_types': ReferralType,
+}
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(member_position, tombstone_position):
+    payload = {'m': list(member_position), 'd': list(tombstone_position)}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Return the (change_xid, id) positions reached in members and in tombstones; an empty cursor
+    means a full sync, and so does one issued before sync followed transaction ids.
+    """
+    if not cursor:
+        return None, None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if 'm' not in payload:
+            return None, None
+        member_xid, member_id = payload['m']
+        tombstone_xid, tombstone_id = payload['d']
+        return (int(member_xid), int(member_id)), (int(tombstone_xid), int(tombstone_id))
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError(f"Invalid sync cursor: {cursor}") from e
+
+
+def sync_horizon(s):
+    """
+    Oldest transaction id still running. Every transaction below it has committed or rolled back,
+    so no change stamped with a smaller change_xid can still appear; newer ones wait for a later sync.
+    """
+    return s.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")).scalar()
+
+
+def _serialize_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _lookup_rows(s, model, after_xid, horizon):
+    columns = [c for c in model.__table__.columns if c.key not in ('created_at', 'change_xid')]
+    query = s.query(*columns).filter(model.change_xid < horizon)
+    if after_xid is not None:
+        query = query.filter(model.change_xid > after_xid)
+    return [{c.key: _serialize_value(v) for c, v in zip(columns, row)} for row in query.order_by(model.id).all()]
+
+
+def _page(query, position_columns, after, limit):
+    """Up to limit rows after position, in position order, and whether more follow."""
+    if after:
+        query = query.filter(tuple_(*position_columns) > tuple_(*after))
+    rows = query.order_by(*position_columns).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+def _next_position(rows, has_more, horizon):
+    if has_more:
+        return rows[-1].change_xid, rows[-1].id
+    # Everything below horizon has been delivered, so the next sync can start there
+    return horizon - 1, MAX_RECORD_ID
+
+
+def get_member_changes(s, cursor=None, limit=500):
+    """
+    Return the members, lookup rows and deletions changed since cursor, plus the cursor for the next call.
+
+    Changes are ordered by the id of the transaction that wrote them (change_xid, kept by database
+    triggers) and only served below sync_horizon, so a change whose transaction commits after a
+    client has synced past it is held back rather than skipped. Members and tombstones are each
+    paged in (change_xid, id) order, at most limit per call, served by ix_user_change_xid_id and
+    ix_deleted_record_change_xid_id.
+    """
+    member_after, tombstone_after = decode_cursor(cursor)
+    limit = max(1, min(int(limit), MAX_SYNC_PAGE_SIZE))
+    horizon = sync_horizon(s)
+
+    user_columns = [getattr(User, name) for name in USER_SYNC_COLUMNS]
+    rows, more_users = _page(s.query(User.change_xid, *user_columns).filter(User.change_xid < horizon),
+                             (User.change_xid, User.id), member_after, limit)
+    users = [{name: _serialize_value(value) for name, value in zip(USER_SYNC_COLUMNS, row[1:])} for row in rows]
+
+    changes = {'users': users}
+    for key, model in LOOKUP_MODELS.items():
+        changes[key] = _lookup_rows(s, model, member_after[0] if member_after else None, horizon)
+
+    tombstones, more_tombstones = _page(
+        s.query(DeletedRecord.change_xid, DeletedRecord.id, DeletedRecord.table_name, DeletedRecord.record_id).filter(
+            DeletedRecord.change_xid < horizon
+        ), (DeletedRecord.change_xid, DeletedRecord.id), tombstone_after, limit
+    )
+    changes['deleted'] = [{'table': row.table_name, 'id': row.record_id} for row in tombstones]
+
+    changes['cursor'] = encode_cursor(_next_position(rows, more_users, horizon),
+                                      _next_position(tombstones, more_tombstones, horizon))
+    changes['has_more'] = more_users or more_tombstones
+    return changes
@@ -0,0 +1,103 @@
+# app/members/updates.py
+
+from datetime import date
+from sqlalchemy import Date, Integer, String, inspect
+from sqlalchemy.orm.exc import StaleDataError
+
+
+class ConcurrentUpdateError(Exception):
+    """The row was changed by someone else after the editor loaded it."""
+
+
+def _version_key(mapper):
+    if mapper.version_id_col is None:
+        return None
+    return mapper.get_property_by_column(mapper.version_id_col).key
+
+
+def current_version(obj):
+    """Version the editor should send back with its changes, or None for unversioned models."""
+    key = _version_key(inspect(obj).mapper)
+    return getattr(obj, key) if key else None
+
+
+def coerce_form_values(model, form, fields):
+    """
+    Read fields from a submitted form or JSON object and convert them to their column types:
+    integer columns take ints or digit strings ('' -> None), date columns ISO dates
+    ('' -> None), string columns text no longer than the column. Fields missing from the
+    input are left out so they are not touched by apply_changes. Raises ValueError naming
+    the first field that cannot be converted.
+    """
+    columns = model.__table__.columns
+    values = {}
+    for field in fields:
+        if field not in form:
+            continue
+        value = form.get(field)
+        column = columns.get(field)
+        if column is not None and value is not None:
+            values[field] = _coerce(field, column.type, value)
+        else:
+            values[field] = value
+    return values
+
+
+def _coerce(field, column_type, value):
+    if isinstance(value, str) and value == '' and isinstance(column_type, (Integer, Date)):
+        return None
+    try:
+        if isinstance(column_type, Integer):
+            if isinstance(value, bool) or not isinstance(value, (int, str)):
+                raise ValueError
+            return int(value)
+        if isinstance(column_type, Date):
+            return value if isinstance(value, date) else date.fromisoformat(value)
+        if isinstance(column_type, String):
+            if not isinstance(value, str) or (column_type.length and len(value) > column_type.length):
+                raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid value for {field}")
+    return value
+
+
+def apply_changes(obj, values, expected_version=None):
+    """
+    Assign only the values that differ from obj's current state and return them as a dict.
+    Unknown keys, the primary key and the version column are ignored. Raises
+    ConcurrentUpdateError when expected_version no longer matches the loaded row.
+    """
+    mapper = inspect(obj).mapper
+    version_key = _version_key(mapper)
+
+    if version_key and expected_version not in (None, ''):
+        try:
+            expected_version = int(expected_version)
+        except (TypeError, ValueError):
+            raise ConcurrentUpdateError(f"Invalid version: {expected_version}")
+        if getattr(obj, version_key) != expected_version:
+            raise ConcurrentUpdateError(
+                f"{mapper.class_.__name__} {inspect(obj).identity} was modified by someone else"
+            )
+
+    primary_keys = {mapper.get_property_by_column(column).key for column in mapper.primary_key}
+    writable = {attr.key for attr in mapper.column_attrs} - primary_keys - {version_key}
+
+    changed = {}
+    for key, value in values.items():
+        if key in writable and getattr(obj, key) != value:
+            setattr(obj, key, value)
+            changed[key] = value
+    return changed
+
+
+def commit_changes(s, obj):
+    """
+    Commit the session; the version check in the UPDATE turns a concurrent edit
+    between load and commit into ConcurrentUpdateError instead of a silent overwrite.
+    """
+    try:
+        s.commit()
+    except StaleDataError as e:
+        s.rollback()
+        raise ConcurrentUpdateError(f"{type(obj).__name__} was modified by someone else") from e
@@ -1,6 +1,7 @@
 from database import db
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import DDL, event, func, literal_column
 from sqlalchemy.orm import relationship, backref
 from datetime import datetime
 
@@ -30,10 +31,20 @@ class User(db.Model, UserMixin):
     member_anniversary = db.Column(db.String(32))
     membership_type_id = db.Column(db.Integer, db.ForeignKey('membership_type.id'))
     is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Id of the last transaction to write the row, set by the sync_mark_change trigger (see SYNCED_TABLES)
+    change_xid = db.Column(db.BigInteger)
+    version_id = db.Column(db.Integer, nullable=False, default=1)
     auth_details = relationship("UserAuthDetails", uselist=False, back_populates="user", cascade="all, delete-orphan")
     attendance_records = db.relationship('AttendanceRecord', backref='user', lazy=True, cascade='all, delete-orphan')
     dues_records = db.relationship('DuesRecord', backref='member', lazy=True, cascade='all, delete-orphan')
 
+    # Delta sync pages through members in (change_xid, id) order
+    __table_args__ = (db.Index('ix_user_change_xid_id', 'change_xid', 'id'),)
+    # Optimistic concurrency: UPDATEs match on version_id, so a concurrent edit raises StaleDataError
+    __mapper_args__ = {'version_id_col': version_id}
+
     def set_password(self, password):
         if self.auth_details is None:
             self.auth_details = UserAuthDetails(user=self)
@@ -84,6 +95,9 @@ class MembershipType(db.Model):
     can_edit_attendance = db.Column(db.Boolean, default=False)
     sort_order = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_xid = db.Column(db.BigInteger)
     users = db.relationship("User", backref="membership_type")
 
     def __repr__(self):
@@ -97,31 +111,156 @@ class AttendanceType(db.Model):
     description = db.Column(db.Text)
     is_active = db.Column(db.Boolean, default=True)
     sort_order = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_xid = db.Column(db.BigInteger)
     attendance_records = db.relationship('AttendanceRecord', backref='attendance_type', lazy=True)
 
     def __repr__(self):
         return f'<AttendanceType {self.type}>'
 
 
+# (code, letter, name) of every attendance status; the attendance_status lookup table holds the same rows
+ATTENDANCE_STATUSES = (
+    (1, 'P', 'Present'),
+    (2, 'A', 'Absent'),
+    (3, 'L', 'Late'),
+    (4, 'E', 'Excused'),
+)
+ATTENDANCE_STATUS_LETTERS = {code: letter for code, letter, _ in ATTENDANCE_STATUSES}
+# Letters and full names, upper-cased, as older records and imports spell them
+ATTENDANCE_STATUS_CODES = {
+    **{letter: code for code, letter, _ in ATTENDANCE_STATUSES},
+    **{name.upper(): code for code, _, name in ATTENDANCE_STATUSES},
+}
+
+
+def attendance_status_code(status):
+    """Code for a status given as a letter or name in any case ('P', 'present'). Raises ValueError."""
+    try:
+        return ATTENDANCE_STATUS_CODES[(status or '').upper().strip()]
+    except KeyError:
+        raise ValueError(f"Invalid attendance status: {status!r}")
+
+
+class AttendanceStatus(db.Model):
+    __tablename__ = 'attendance_status'
+    code = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    letter = db.Column(db.String(1), nullable=False, unique=True)
+    name = db.Column(db.String(20), nullable=False)
+
+    def __repr__(self):
+        return f'<AttendanceStatus {self.letter}>'
+
+
+event.listen(
+    AttendanceStatus.__table__,
+    'after_create',
+    lambda target, connection, **kw: connection.execute(target.insert(), [
+        {'code': code, 'letter': letter, 'name': name} for code, letter, name in ATTENDANCE_STATUSES
+    ])
+)
+
+
 class AttendanceRecord(db.Model):
     __tablename__ = 'attendance_record'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     attendance_type_id = db.Column(db.Integer, db.ForeignKey('attendance_type.id'), nullable=False)
     event_date = db.Column(db.Date, nullable=False)
-    status = db.Column(db.String(20), nullable=False)  # e.g., 'present', 'absent', 'excused'
+    # The only stored status; the status property gives its letter (P, A, L or E)
+    status_code = db.Column(db.SmallInteger, db.ForeignKey('attendance_status.code'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # One record per member, date and meeting type; the attendance matrix upserts on this key
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'event_date', 'attendance_type_id', name='uq_attendance_record_user_date_type'),
+        # Date range reports counting statuses per member (PALE summary and detail)
+        db.Index('ix_attendance_record_date_status_user', 'event_date', 'status_code', 'user_id'),
+    )
+
+    @property
+    def status(self):
+        """Status letter for status_code; set status_code (see attendance_status_code) to change it."""
+        return ATTENDANCE_STATUS_LETTERS.get(self.status_code)
+
     def __repr__(self):
         return f'<AttendanceRecord {self.user_id} - {self.event_date}>'
 
 
+class AttendanceMonthlyCount(db.Model):
+    """
+    Attendance records per member, month, attendance type and status. Kept current by
+    app/attendance/rollup.py in the transaction that changes attendance; PALE reports read
+    whole months from here. rebuild_attendance_rollup.py recomputes it from scratch.
+    """
+    __tablename__ = 'attendance_monthly_count'
+    month = db.Column(db.Date, primary_key=True)  # First day of the event month
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    attendance_type_id = db.Column(db.Integer, db.ForeignKey('attendance_type.id', ondelete='CASCADE'), primary_key=True)
+    status_code = db.Column(db.SmallInteger, db.ForeignKey('attendance_status.code'), primary_key=True)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<AttendanceMonthlyCount {self.month} {self.user_id} {self.status_code}>'
+
+
+class AttendanceRule(db.Model):
+    """
+    An attendance requirement such as "no more than 3 absences per 6 months": at most
+    max_count records with status_code in the window_months before the evaluation date,
+    optionally for one attendance type. Evaluated by app/attendance/rules.py.
+    """
+    __tablename__ = 'attendance_rule'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(128), nullable=False)
+    status_code = db.Column(db.SmallInteger, db.ForeignKey('attendance_status.code'), nullable=False)
+    max_count = db.Column(db.Integer, nullable=False)
+    window_months = db.Column(db.Integer, nullable=False)
+    attendance_type_id = db.Column(db.Integer, db.ForeignKey('attendance_type.id', ondelete='CASCADE'), nullable=True)  # None: every type
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    attendance_type = db.relationship('AttendanceType')
+
+    def __repr__(self):
+        return f'<AttendanceRule {self.name}>'
+
+
+class AttendanceAlert(db.Model):
+    """A member breaking an attendance rule; open until a later evaluation finds the member back within it."""
+    __tablename__ = 'attendance_alert'
+    id = db.Column(db.Integer, primary_key=True)
+    rule_id = db.Column(db.Integer, db.ForeignKey('attendance_rule.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    window_start = db.Column(db.Date, nullable=False)
+    window_end = db.Column(db.Date, nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    resolved_at = db.Column(db.DateTime, nullable=True)
+    rule = db.relationship('AttendanceRule')
+    user = db.relationship('User')
+
+    __table_args__ = (
+        # At most one open alert per rule and member
+        db.Index('uq_attendance_alert_open', 'rule_id', 'user_id', unique=True,
+                 postgresql_where=db.text('resolved_at IS NULL'), sqlite_where=db.text('resolved_at IS NULL')),
+    )
+
+    def __repr__(self):
+        return f'<AttendanceAlert {self.rule_id} {self.user_id}>'
+
+
 class DuesType(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     dues_type = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_xid = db.Column(db.BigInteger)
     dues_records = db.relationship('DuesRecord', backref='dues_type', lazy=True)
 
 
@@ -136,6 +275,190 @@ class DuesRecord(db.Model):
     document_number = db.Column(db.String(255))
     payment_received_date = db.Column(db.Date)
 
+    # One record per member, dues type and due date; dues generation upserts on this key
+    __table_args__ = (
+        db.UniqueConstraint('member_id', 'dues_type_id', 'due_date', name='uq_dues_record_member_type_date'),
+        # Keyset pagination of the dues ledger views (app/dues/pagination.py)
+        db.Index('ix_dues_record_due_date_member', 'due_date', 'member_id', 'id'),
+        db.Index('ix_dues_record_member_due_date', 'member_id', 'due_date', 'id'),
+    )
+
+
+# Open dues sort before paid ones in the dues ledger; app/dues/pagination.py orders by this exact
+# expression so the index below serves its keyset pages (the literal 0 keeps the SQL identical)
+DUES_RECORD_PAID = func.coalesce(DuesRecord.amount_paid, literal_column('0')) >= DuesRecord.dues_amount
+db.Index('ix_dues_record_paid_due_date_member', DUES_RECORD_PAID, DuesRecord.due_date, DuesRecord.member_id, DuesRecord.id)
+
+
+class DuesMemberBalance(db.Model):
+    """
+    Balance and aging per member and dues type. app/dues/balances.py rewrites a member's rows
+    in the transaction that changes their dues records; the aging buckets are measured
+    against as_of, which the daily run_dues_schedules.py rebuild moves forward.
+    """
+    __tablename__ = 'dues_member_balance'
+    member_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    dues_type_id = db.Column(db.Integer, db.ForeignKey('dues_type.id', ondelete='CASCADE'), primary_key=True)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+    total_due = db.Column(db.Float, nullable=False, default=0.0)
+    total_paid = db.Column(db.Float, nullable=False, default=0.0)
+    balance = db.Column(db.Float, nullable=False, default=0.0)
+    not_due = db.Column(db.Float, nullable=False, default=0.0)
+    days_0_30 = db.Column(db.Float, nullable=False, default=0.0)
+    days_31_60 = db.Column(db.Float, nullable=False, default=0.0)
+    days_61_90 = db.Column(db.Float, nullable=False, default=0.0)
+    days_over_90 = db.Column(db.Float, nullable=False, default=0.0)
+    oldest_open_due_date = db.Column(db.Date)
+    as_of = db.Column(db.Date, nullable=False)
+
+    # The aging report reads only members who owe something, largest balance first
+    __table_args__ = (
+        db.Index('ix_dues_member_balance_open', 'balance', postgresql_where=db.text('balance > 0')),
+    )
+
+    def __repr__(self):
+        return f'<DuesMemberBalance {self.member_id} {self.dues_type_id} {self.balance}>'
+
+
+
+class DuesPayment(db.Model):
+    """
+    Ledger of individual payments (and corrections, as negative amounts) against a dues record.
+    DuesRecord.amount_paid is the running total of these rows, kept current by app/dues/ledger.py.
+    """
+    __tablename__ = 'dues_payment'
+    id = db.Column(db.Integer, primary_key=True)
+    dues_record_id = db.Column(db.Integer, db.ForeignKey('dues_record.id', ondelete='CASCADE'), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    payment_date = db.Column(db.Date, nullable=False)
+    document_number = db.Column(db.String(255))
+    recorded_by_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    dues_record = db.relationship('DuesRecord', backref=db.backref('payments', lazy=True, cascade='all, delete-orphan', passive_deletes=True))
+
+    __table_args__ = (
+        db.Index('ix_dues_payment_record_date', 'dues_record_id', 'payment_date'),
+        # Statement imports look up hand-recorded check payments by date
+        db.Index('ix_dues_payment_document_date', 'payment_date', postgresql_where=db.text('document_number IS NOT NULL')),
+    )
+
+    def __repr__(self):
+        return f'<DuesPayment {self.dues_record_id} {self.amount}>'
+
+
+class BankStatementLine(db.Model):
+    """
+    Bank statement credit from a reconciliation import. Lines the import matched are stored as
+    'matched'; the rest wait as 'pending' until a treasurer matches them by hand or ignores them.
+    """
+    __tablename__ = 'bank_statement_line'
+    id = db.Column(db.Integer, primary_key=True)
+    import_id = db.Column(db.String(32), nullable=False)  # One id per uploaded statement
+    source_file = db.Column(db.String(255))
+    line_number = db.Column(db.Integer, nullable=False)
+    posted_date = db.Column(db.Date, nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    reference = db.Column(db.String(255))  # Check or transfer reference, compared with DuesRecord.document_number
+    transaction_id = db.Column(db.String(255))  # The bank's own id for the transaction (OFX FITID), when it gives one
+    payer_name = db.Column(db.String(255))
+    description = db.Column(db.String(255))
+    status = db.Column(db.String(16), default='pending', nullable=False)  # pending, matched or ignored
+    dues_record_id = db.Column(db.Integer, db.ForeignKey('dues_record.id', ondelete='SET NULL'), nullable=True)  # First record paid
+    imported_by_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    resolved_by_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    resolved_at = db.Column(db.DateTime, nullable=True)
+
+    dues_record = db.relationship('DuesRecord')
+
+    # Imports look up earlier lines by posted date and by bank transaction id to skip duplicates
+    __table_args__ = (
+        db.Index('ix_bank_statement_line_status', 'status', 'posted_date'),
+        db.Index('ix_bank_statement_line_posted_date', 'posted_date'),
+        db.Index('ix_bank_statement_line_transaction', 'transaction_id'),
+    )
+
+    def __repr__(self):
+        return f'<BankStatementLine {self.import_id}:{self.line_number} {self.amount}>'
+
+
+class DuesMonthlyKpi(db.Model):
+    """
+    Billed, collected and outstanding dues per due month and dues type (each tenant has its
+    own database, so rows are per tenant). Kept current by app/dues/kpis.py as dues are
+    generated, edited and paid; rebuild_dues_kpis.py recomputes it from scratch.
+    """
+    __tablename__ = 'dues_monthly_kpi'
+    month = db.Column(db.Date, primary_key=True)  # First day of the due month
+    dues_type_id = db.Column(db.Integer, db.ForeignKey('dues_type.id', ondelete='CASCADE'), primary_key=True)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+    billed = db.Column(db.Float, nullable=False, default=0.0)
+    collected = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DuesMonthlyKpi {self.month} {self.dues_type_id}>'
+
+
+class DuesReminder(db.Model):
+    """
+    Outbox of dues reminder emails. run_dues_reminders.py queues at most one reminder per
+    member every REMINDER_MIN_INTERVAL_DAYS from the open-balance summary and drains pending rows over SMTP,
+    retrying failures with backoff until MAIL_MAX_ATTEMPTS.
+    """
+    __tablename__ = 'dues_reminder'
+    id = db.Column(db.Integer, primary_key=True)
+    member_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    reminder_date = db.Column(db.Date, nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    balance = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(16), default='pending', nullable=False)  # pending, sent or failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    member = db.relationship('User')
+
+    __table_args__ = (
+        db.UniqueConstraint('member_id', 'reminder_date', name='uq_dues_reminder_member_date'),
+        db.Index('ix_dues_reminder_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f'<DuesReminder {self.member_id} {self.reminder_date} {self.status}>'
+
+
+class DuesSchedule(db.Model):
+    """
+    Recurring dues definition materialised into DuesRecords by run_dues_schedules.py.
+    frequency is monthly, quarterly, annual or anniversary (yearly on each member's member_anniversary).
+    """
+    __tablename__ = 'dues_schedule'
+    id = db.Column(db.Integer, primary_key=True)
+    dues_type_id = db.Column(db.Integer, db.ForeignKey('dues_type.id'), nullable=False)
+    membership_type_id = db.Column(db.Integer, db.ForeignKey('membership_type.id'), nullable=True)  # None = every membership type
+    frequency = db.Column(db.String(16), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    day_of_month = db.Column(db.Integer, default=1, nullable=False)  # monthly and quarterly schedules
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=True)
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    # Checkpoint: every due date up to and including this one has been materialised
+    generated_through = db.Column(db.Date, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    dues_type = db.relationship('DuesType', backref='schedules')
+    membership_type = db.relationship('MembershipType', backref='dues_schedules')
+
+    def __repr__(self):
+        return f'<DuesSchedule {self.id} {self.frequency} {self.amount}>'
+
 
 class ReferralType(db.Model):
     __tablename__ = 'referral_type'
@@ -148,6 +471,9 @@ class ReferralType(db.Model):
     allows_closed_date = db.Column(db.Boolean, default=True)  # False for "Subscription" type
     is_active = db.Column(db.Boolean, default=True)
     sort_order = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_xid = db.Column(db.BigInteger)
     referral_records = db.relationship('ReferralRecord', backref='referral_type', lazy=True)
 
     def __repr__(self):
@@ -195,3 +521,96 @@ class ReferralRecord(db.Model):
 
     def __repr__(self):
         return f'<ReferralRecord {self.id} - {self.referrer_id} -> {self.referred_id or self.referred_name}>'
+
+
+class DeletedRecord(db.Model):
+    """Tombstone left behind when a synced row is deleted, so delta sync clients can drop it."""
+    __tablename__ = 'deleted_record'
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(64), nullable=False)
+    record_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    change_xid = db.Column(db.BigInteger)
+
+    # Delta sync pages through tombstones in (change_xid, id) order
+    __table_args__ = (db.Index('ix_deleted_record_change_xid_id', 'change_xid', 'id'),)
+
+    def __repr__(self):
+        return f'<DeletedRecord {self.table_name} {self.record_id}>'
+
+
+# Delta sync (app/members/sync.py) reads changes to these tables by the id of the transaction that
+# made them. Triggers keep it in the database so every write counts, not just ORM ones: inserts and
+# updates stamp change_xid, deletes leave a deleted_record tombstone. Requires PostgreSQL 13+.
+SYNCED_TABLES = ('user', 'membership_type', 'attendance_type', 'dues_type', 'referral_type')
+
+SYNC_TRIGGER_FUNCTIONS = DDL("""
+CREATE OR REPLACE FUNCTION sync_mark_change() RETURNS trigger AS $$
+BEGIN
+    NEW.change_xid := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_record_delete() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_record (table_name, record_id, deleted_at, change_xid)
+    VALUES (TG_TABLE_NAME, OLD.id, now() at time zone 'utc', pg_current_xact_id()::text::bigint);
+    RETURN OLD;
+END $$ LANGUAGE plpgsql;
+""")
+
+SYNC_TRIGGERS = DDL("""
+CREATE TRIGGER sync_change BEFORE INSERT OR UPDATE ON %(fullname)s
+    FOR EACH ROW EXECUTE FUNCTION sync_mark_change();
+CREATE TRIGGER sync_delete AFTER DELETE ON %(fullname)s
+    FOR EACH ROW EXECUTE FUNCTION sync_record_delete();
+""")
+
+event.listen(db.Model.metadata, 'before_create', SYNC_TRIGGER_FUNCTIONS.execute_if(dialect='postgresql'))
+for _table_name in SYNCED_TABLES:
+    event.listen(db.Model.metadata.tables[_table_name], 'after_create', SYNC_TRIGGERS.execute_if(dialect='postgresql'))
+
+
+class MemberAuditLog(db.Model):
+    """
+    Append-only column-level history of changes to members and their permissions.
+    Written by the flush hook in app/members/audit.py; on Postgres the table is
+    range-partitioned by month on occurred_at so old months can be dropped outright.
+    """
+    __tablename__ = 'member_audit_log'
+    id = db.Column(db.BigInteger, db.Identity(), primary_key=True)
+    occurred_at = db.Column(db.DateTime, primary_key=True, default=datetime.utcnow)
+    table_name = db.Column(db.String(64), nullable=False)
+    record_id = db.Column(db.Integer, nullable=False)
+    # No foreign keys: history must outlive deleted members
+    member_id = db.Column(db.Integer, nullable=False)
+    actor_id = db.Column(db.Integer, nullable=True)
+    action = db.Column(db.String(10), nullable=False)  # insert, update, delete
+    changes = db.Column(db.JSON, nullable=False)  # {column: [old, new]}
+
+    __table_args__ = (
+        db.Index('ix_member_audit_log_member', 'member_id', 'occurred_at'),
+        db.Index('ix_member_audit_log_actor', 'actor_id', 'occurred_at'),
+        {'postgresql_partition_by': 'RANGE (occurred_at)'},
+    )
+
+    def __repr__(self):
+        return f'<MemberAuditLog {self.table_name} {self.record_id} {self.action}>'
+
+
+# Catch-all partition so writes never fail; maintain_audit_partitions.py creates the monthly ones ahead of time
+event.listen(
+    MemberAuditLog.__table__,
+    'after_create',
+    DDL('CREATE TABLE IF NOT EXISTS member_audit_log_default PARTITION OF member_audit_log DEFAULT').execute_if(dialect='postgresql')
+)
+
+
+def _partition_new_audit_log(target, connection, **kw):
+    """A new audit log starts with this month's and the next few months' partitions, not only the default one."""
+    if connection.dialect.name == 'postgresql':
+        from app.members.audit import create_audit_partitions
+        create_audit_partitions(connection)
+
+
+event.listen(MemberAuditLog.__table__, 'after_create', _partition_new_audit_log)
@@ -0,0 +1,56 @@
+# app/monthly_rollups.py
+
+from datetime import date
+from sqlalchemy.orm import attributes
+from app.commit_hooks import WHOLE_TABLE_KEY, CommitKeyTracker, lock_keys
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def months_between(first, last):
+    months = []
+    month = month_start(first)
+    while month <= last:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def lock_months(s, table_name, months):
+    """
+    Lock the months of a rollup table before recounting them (see lock_keys), so two saves
+    into one month cannot overwrite each other's count; rebuilds of the table wait for them.
+    """
+    lock_keys(s, table_name, [WHOLE_TABLE_KEY], shared=True)
+    lock_keys(s, table_name, [month.year * 12 + month.month for month in months])
+
+
+def lock_whole_rollup(s, table_name):
+    """Lock a rollup table against every month refresh, for a full rebuild."""
+    lock_keys(s, table_name, [WHOLE_TABLE_KEY])
+
+
+class MonthlyRollupTracker(CommitKeyTracker):
+    """
+    Keeps a per-month rollup table current inside the writing transaction: a CommitKeyTracker
+    whose keys are the months of model's date_attribute (old and new). Core writes call
+    mark(session, dates).
+    """
+
+    def __init__(self, session_key, model, date_attribute, refresh):
+        self.date_attribute = date_attribute
+        super().__init__(session_key, model, self._dates, refresh)
+
+    def mark(self, s, dates):
+        """Queue the months of dates for a refresh when the session commits (for Core writes)."""
+        super().mark(s, (month_start(day) for day in dates if day))
+
+    def _dates(self, obj):
+        # A row moved to another month leaves its old month behind
+        return [getattr(obj, self.date_attribute)] + list(attributes.get_history(obj, self.date_attribute).deleted or ())
@@ -0,0 +1,198 @@
+# app/pdf_jobs.py
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from flask import current_app, jsonify, redirect, render_template, request, send_file, url_for
+
+logger = logging.getLogger(__name__)
+
+# A job marker older than this with no PDF or error next to it belongs to a worker that died
+PDF_JOB_TIMEOUT_SECONDS = 600
+
+_JOB_ID = re.compile(r'^[a-z_]+-[0-9a-f]{64}$')
+
+_executor = None
+_executor_lock = threading.Lock()
+_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def pdf_stylesheet():
+    """ReportLab's sample stylesheet, built once per process instead of on every report."""
+    from reportlab.lib.styles import getSampleStyleSheet
+    return getSampleStyleSheet()
+
+
+def _pool():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=current_app.config['PDF_WORKERS'], thread_name_prefix='pdf')
+        return _executor
+
+
+def pdf_job_id(tenant_id, report, params, data_version):
+    """
+    Job id for one rendering of report. Identical parameters against unchanged data give the
+    same id, so the id doubles as the cache key and any gunicorn worker can serve the result.
+    """
+    key = json.dumps([tenant_id, report, params, data_version], sort_keys=True, default=str)
+    return f"{report}-{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+
+def _job_path(tenant_id, job_id, suffix):
+    if not _JOB_ID.match(job_id) or tenant_id not in current_app.config['TENANT_DATABASES']:
+        raise ValueError(f"Invalid PDF job id: {job_id}")
+    return os.path.join(current_app.config['PDF_CACHE_DIR'], tenant_id, f"{job_id}.{suffix}")
+
+
+def _check_report(job_id, reports):
+    """Only serve jobs of the reports the calling blueprint renders (the id starts with the report name)."""
+    if job_id.split('-', 1)[0] not in reports:
+        raise ValueError(f"PDF job {job_id} is not one of {', '.join(reports)}")
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def _evict(cache_dir, max_bytes):
+    """Delete the least recently used PDFs until the cache fits in max_bytes."""
+    with _cache_lock:
+        files = []
+        for root, _, names in os.walk(cache_dir):
+            for name in names:
+                if name.endswith('.pdf'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+def _run_job(app, tenant_id, job_id, render, args):
+    with app.app_context():
+        pdf_path = _job_path(tenant_id, job_id, 'pdf')
+        try:
+            _write_atomic(pdf_path, render(*args))
+        except ImportError:
+            _write_atomic(_job_path(tenant_id, job_id, 'err'), b"PDF generation requires reportlab library. Please install it first.")
+        except Exception as e:
+            logger.error(f"PDF job {job_id} failed for tenant {tenant_id}: {str(e)}")
+            _write_atomic(_job_path(tenant_id, job_id, 'err'), b"An error occurred while generating the report.")
+        finally:
+            try:
+                os.remove(_job_path(tenant_id, job_id, 'job'))
+            except FileNotFoundError:
+                pass
+        _evict(app.config['PDF_CACHE_DIR'], app.config['PDF_CACHE_MAX_BYTES'])
+
+
+def pdf_job_status(tenant_id, job_id):
+    """Return (status, error) where status is 'ready', 'running', 'failed' or None for an unknown job."""
+    if os.path.exists(_job_path(tenant_id, job_id, 'pdf')):
+        return 'ready', None
+    err_path = _job_path(tenant_id, job_id, 'err')
+    if os.path.exists(err_path):
+        with open(err_path, 'rb') as f:
+            return 'failed', f.read().decode('utf-8')
+    try:
+        started = os.path.getmtime(_job_path(tenant_id, job_id, 'job'))
+    except FileNotFoundError:
+        return None, None
+    if time.time() - started > PDF_JOB_TIMEOUT_SECONDS:
+        return 'failed', "The report took too long to generate. Please try again."
+    return 'running', None
+
+
+def start_pdf_job(tenant_id, job_id, render, *args):
+    """
+    Queue render(*args) -> PDF bytes on the background pool unless the result is already cached
+    or being rendered. Failed jobs are retried. Returns the job status after queueing.
+    """
+    status, _ = pdf_job_status(tenant_id, job_id)
+    if status in ('ready', 'running'):
+        return status
+
+    try:
+        os.remove(_job_path(tenant_id, job_id, 'err'))
+    except FileNotFoundError:
+        pass
+    _write_atomic(_job_path(tenant_id, job_id, 'job'), str(os.getpid()).encode('utf-8'))
+    _pool().submit(_run_job, current_app._get_current_object(), tenant_id, job_id, render, args)
+    return 'running'
+
+
+def pdf_job_urls(tenant_id, job_id, blueprint):
+    return (url_for(f'{blueprint}.pdf_job', tenant_id=tenant_id, job_id=job_id),
+            url_for(f'{blueprint}.pdf_job_download', tenant_id=tenant_id, job_id=job_id))
+
+
+def pdf_job_response(tenant_id, job_id, blueprint, tenant_display_name):
+    """
+    Answer a PDF request: cached reports are downloaded straight away, otherwise JSON clients
+    get 202 with the poll and download URLs and browsers get a page that polls until it is ready.
+    """
+    status, error = pdf_job_status(tenant_id, job_id)
+    poll_url, download_url = pdf_job_urls(tenant_id, job_id, blueprint)
+    if status == 'ready':
+        return redirect(download_url)
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'job_id': job_id, 'status': status, 'error': error,
+                        'poll_url': poll_url, 'download_url': download_url}), 202
+    return render_template('report_job.html',
+                           tenant_id=tenant_id,
+                           tenant_display_name=tenant_display_name,
+                           job_id=job_id,
+                           poll_url=poll_url,
+                           download_url=download_url)
+
+
+def pdf_job_status_response(tenant_id, job_id, blueprint, reports):
+    """JSON status for the poll URL; jobs of reports outside reports are not found."""
+    try:
+        _check_report(job_id, reports)
+        status, error = pdf_job_status(tenant_id, job_id)
+    except ValueError:
+        status, error = None, None
+    if status is None:
+        return jsonify({'error': 'Report job not found'}), 404
+    poll_url, download_url = pdf_job_urls(tenant_id, job_id, blueprint)
+    return jsonify({'job_id': job_id, 'status': status, 'error': error,
+                    'poll_url': poll_url, 'download_url': download_url})
+
+
+def send_pdf_job(tenant_id, job_id, reports):
+    """Send a finished PDF of one of reports, or None if it is not (or no longer) cached."""
+    try:
+        _check_report(job_id, reports)
+        path = _job_path(tenant_id, job_id, 'pdf')
+        # Downloads count as use for the least-recently-used eviction
+        os.utime(path)
+    except (ValueError, FileNotFoundError):
+        return None
+    report = job_id.split('-', 1)[0]
+    return send_file(path, mimetype='application/pdf', as_attachment=True,
+                     download_name=f"{report}_{time.strftime('%Y%m%d_%H%M%S')}.pdf")
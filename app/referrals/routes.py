@@ -4,7 +4,9 @@ from config import Config
 from database import get_tenant_db_session
 from app.models import User, ReferralRecord, ReferralType
 from datetime import date, datetime
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import aliased, joinedload
+from app.members.directory import get_member_directory
+from app.utils import STREAM_BATCH_SIZE, csv_download
 from . import referrals_bp
 
 logger = logging.getLogger(__name__)
@@ -25,7 +27,7 @@ def add_referral(tenant_id):
         referral_types = s.query(ReferralType).filter_by(is_active=True).order_by(ReferralType.sort_order).all()
 
         # Get all active users for member selection (for "In Group" referrals)
-        all_users = s.query(User).filter_by(is_active=True).order_by(User.first_name, User.last_name).all()
+        all_users = get_member_directory(s, tenant_id).entries(active_only=True, order_by='first_name')
 
         # Get prior referrals for subscription type dropdown
         prior_referrals = s.query(ReferralRecord).options(
@@ -321,6 +323,28 @@ def close_referral(tenant_id, referral_id):
         return jsonify({'success': False, 'message': 'Failed to close referral'})
 
 
+def _visible_referrer_id(can_manage_referrals, selected_user_id, current_user_id):
+    """Referrer whose referrals may be listed, or None for all referrals"""
+    if can_manage_referrals:
+        # Privileged users can see all referrals or filter by specific referrer
+        return selected_user_id or None
+    # Non-privileged users see only their own referrals
+    return current_user_id
+
+
+def _filter_referrals(query, referrer_id, start_date, end_date):
+    """Apply the referral history filters to a query over ReferralRecord"""
+    if referrer_id:
+        query = query.filter(ReferralRecord.referrer_id == referrer_id)
+
+    # Apply date range filter
+    if start_date:
+        query = query.filter(ReferralRecord.date_referred >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        query = query.filter(ReferralRecord.date_referred <= datetime.combine(end_date, datetime.max.time()))
+    return query
+
+
 @referrals_bp.route('/<tenant_id>/history')
 def referral_history(tenant_id):
     if 'user_id' not in session or session['tenant_id'] != tenant_id:
@@ -360,7 +384,7 @@ def referral_history(tenant_id):
 
         if can_manage_referrals:
             # Get all users for dropdown
-            all_users = s.query(User).order_by(User.last_name, User.first_name).all()
+            all_users = get_member_directory(s, tenant_id).entries()
 
             if selected_user_id:
                 selected_user = s.query(User).filter_by(id=selected_user_id).first()
@@ -373,21 +397,8 @@ def referral_history(tenant_id):
             joinedload(ReferralRecord.verified_by)
         )
 
-        if can_manage_referrals and selected_user_id:
-            # Privileged users can filter by specific referrer
-            query = query.filter_by(referrer_id=selected_user_id)
-        elif can_manage_referrals:
-            # Privileged users can see all referrals
-            pass
-        else:
-            # Non-privileged users see only their own referrals
-            query = query.filter_by(referrer_id=current_user_id)
-
-        # Apply date range filter
-        if start_date:
-            query = query.filter(ReferralRecord.date_referred >= datetime.combine(start_date, datetime.min.time()))
-        if end_date:
-            query = query.filter(ReferralRecord.date_referred <= datetime.combine(end_date, datetime.max.time()))
+        referrer_id = _visible_referrer_id(can_manage_referrals, selected_user_id, current_user_id)
+        query = _filter_referrals(query, referrer_id, start_date, end_date)
 
         # Get referrals
         all_referrals = query.order_by(ReferralRecord.date_referred.desc()).all()
@@ -411,6 +422,106 @@ def referral_history(tenant_id):
                              end_date=end_date_str)
 
 
+def referral_history_csv_rows(s, tenant_name, referrer_id, start_date, end_date):
+    """CSV rows for the referral history export, read as column tuples from a server-side cursor"""
+    referrer = aliased(User)
+    referred = aliased(User)
+    verifier = aliased(User)
+    query = s.query(
+        ReferralRecord.date_referred,
+        ReferralType.type_name,
+        referrer.first_name,
+        referrer.last_name,
+        referred.first_name,
+        referred.last_name,
+        ReferralRecord.referred_name,
+        ReferralRecord.referral_level,
+        ReferralRecord.referral_value,
+        ReferralRecord.closed_date,
+        ReferralRecord.is_verified,
+        verifier.first_name,
+        verifier.last_name,
+        ReferralRecord.verified_date
+    ).select_from(ReferralRecord).join(
+        ReferralType, ReferralRecord.referral_type_id == ReferralType.id
+    ).join(
+        referrer, ReferralRecord.referrer_id == referrer.id
+    ).outerjoin(
+        referred, ReferralRecord.referred_id == referred.id
+    ).outerjoin(
+        verifier, ReferralRecord.verified_by_id == verifier.id
+    )
+    query = _filter_referrals(query, referrer_id, start_date, end_date).order_by(
+        ReferralRecord.date_referred.desc(), ReferralRecord.id.desc()
+    )
+
+    yield [tenant_name]
+    yield ['Referral History']
+    if start_date or end_date:
+        date_range = ''
+        if start_date:
+            date_range += f'From {start_date}'
+        if end_date:
+            date_range += f' To {end_date}'
+        yield [date_range]
+    yield [f'{datetime.now().strftime("%Y-%m-%d %H:%M:%S")}']
+    yield []
+
+    yield ['Date Referred', 'Type', 'Referrer', 'Referred', 'Level', 'Value', 'Closed Date', 'Verified', 'Verified By', 'Verified Date']
+
+    total_records = 0
+    total_value = 0.0
+    for (date_referred, type_name, referrer_first, referrer_last, referred_first, referred_last, referred_name,
+         level, value, closed_date, is_verified, verifier_first, verifier_last, verified_date) in query.yield_per(STREAM_BATCH_SIZE):
+        yield [
+            date_referred.strftime('%Y-%m-%d'),
+            type_name,
+            f"{referrer_first or ''} {referrer_last or ''}".strip(),
+            f"{referred_first or ''} {referred_last or ''}".strip() or (referred_name or ''),
+            level,
+            f"${value:.2f}" if value is not None else '',
+            closed_date.strftime('%Y-%m-%d') if closed_date else '',
+            'Yes' if is_verified else 'No',
+            f"{verifier_first or ''} {verifier_last or ''}".strip(),
+            verified_date.strftime('%Y-%m-%d') if verified_date else ''
+        ]
+        total_records += 1
+        total_value += value or 0
+
+    yield []
+    yield [f'Total Referrals: {total_records}, Value: ${total_value:.2f}']
+
+
+@referrals_bp.route('/<tenant_id>/history/export')
+def referral_history_csv(tenant_id):
+    """Stream the referral history, with the same filters and visibility as the history page, as CSV"""
+    if 'user_id' not in session or session['tenant_id'] != tenant_id:
+        flash("You must be logged in to view this page.", "danger")
+        return redirect(url_for('auth.login', tenant_id=tenant_id))
+
+    tenant_display_name = Config.TENANT_DISPLAY_NAMES.get(tenant_id, tenant_id.capitalize())
+
+    start_date = None
+    end_date = None
+    try:
+        if request.args.get('start_date'):
+            start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date()
+        if request.args.get('end_date'):
+            end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date()
+    except ValueError:
+        flash("Invalid date format. Please use YYYY-MM-DD.", "danger")
+        return redirect(url_for('referrals.referral_history', tenant_id=tenant_id))
+
+    can_manage_referrals = session.get('user_permissions', {}).get('can_edit_referrals', False)
+    referrer_id = _visible_referrer_id(can_manage_referrals, request.args.get('user_id'), session['user_id'])
+
+    def rows():
+        with get_tenant_db_session(tenant_id) as s:
+            yield from referral_history_csv_rows(s, tenant_display_name, referrer_id, start_date, end_date)
+
+    return csv_download(rows(), f'referral_history_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
+
+
 @referrals_bp.route('/<tenant_id>/get_referral_types')
 def get_referral_types(tenant_id):
     """AJAX endpoint to get referral type details"""
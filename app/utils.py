@@ -1,9 +1,16 @@
 # app/utils.py
 
-from flask import request
+import csv
+from io import StringIO
+from flask import Response, request, stream_with_context
 from config import Config
 from datetime import datetime, timezone, timedelta
 
+# Rows fetched per round trip when streaming exports from a server-side cursor
+STREAM_BATCH_SIZE = 1000
+# Characters of CSV text buffered before a chunk is sent to the client
+CSV_CHUNK_SIZE = 64 * 1024
+
 def infer_tenant_from_hostname():
     current_hostname = request.host.split(':')[0]
 
@@ -36,3 +43,32 @@ def utc_to_local(utc_dt):
     # Convert to local time
     local_dt = utc_dt.astimezone(local_tz)
     return local_dt
+
+
+def iter_csv(rows, chunk_size=CSV_CHUNK_SIZE):
+    """
+    Encode an iterable of CSV rows lazily. Only one chunk of text is held at a time,
+    so memory stays flat however many rows the iterable produces.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def csv_download(rows, filename):
+    """
+    Streamed CSV attachment. rows is consumed while the response is sent, so a generator
+    that needs the database must open its own session (the view's session is gone by then).
+    """
+    return Response(
+        stream_with_context(iter_csv(rows)),
+        mimetype='text/csv',
+        headers={'Content-disposition': f'attachment; filename={filename}'}
+    )
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark for attendance history date navigation: the old per-request probe queries
+(exists for date, most recent date, has previous, has next, step to next/previous date and
+re-check) versus the cached event date index in app/attendance/dates.py (bisect lookups).
+
+Seeds ten years of weekly meetings for --members members inside a transaction on the
+chosen tenant database and rolls everything back at the end. Requires PostgreSQL.
+
+Usage:
+  python3 benchmark_attendance_navigation.py [--tenant tenant1] [--members 50] [--years 10] [--requests 500]
+"""
+
+import sys
+import os
+import argparse
+import random
+import time
+import uuid
+from datetime import date, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+
+# Benchmark meetings are dated from here on so they never mix with real attendance
+BENCH_START_DATE = date(2990, 1, 6)
+
+
+def _seed(s, members, years):
+    from app.models import User, AttendanceType, AttendanceRecord, attendance_status_code
+
+    tag = uuid.uuid4().hex[:8]
+    s.execute(User.__table__.insert(), [
+        {'first_name': f'Bench{i}', 'last_name': tag, 'email': f'bench-{tag}-{i}@example.invalid', 'is_active': True}
+        for i in range(members)
+    ])
+    attendance_type = AttendanceType(type=f'Benchmark {tag}', description='benchmark', is_active=True)
+    s.add(attendance_type)
+    s.flush()
+    member_ids = [row[0] for row in s.query(User.id).filter(User.last_name == tag)]
+    meeting_dates = [BENCH_START_DATE + timedelta(weeks=week) for week in range(years * 52)]
+    for meeting_date in meeting_dates:
+        rows = []
+        for member_id in member_ids:
+            status = 'P' if (member_id + meeting_date.toordinal()) % 4 else 'A'
+            rows.append({'user_id': member_id, 'attendance_type_id': attendance_type.id, 'event_date': meeting_date,
+                         'status_code': attendance_status_code(status)})
+        s.execute(AttendanceRecord.__table__.insert(), rows)
+    s.flush()
+    return member_ids, meeting_dates
+
+
+def _legacy_navigation(s, selected_date, action, user_id=None):
+    """The probe queries the history page used to issue for one request."""
+    from app.models import AttendanceRecord
+
+    def scoped(query):
+        return query.filter(AttendanceRecord.user_id == user_id) if user_id else query
+
+    event_date = AttendanceRecord.event_date
+    if not action and not scoped(s.query(AttendanceRecord).filter(event_date == selected_date)).first():
+        latest = scoped(s.query(event_date)).order_by(event_date.desc()).first()
+        if latest:
+            selected_date = latest[0]
+    has_prev = scoped(s.query(event_date).filter(event_date < selected_date)).first() is not None
+    has_next = scoped(s.query(event_date).filter(event_date > selected_date)).first() is not None
+    if action == 'next':
+        found = scoped(s.query(event_date).filter(event_date > selected_date)).order_by(event_date.asc()).first()
+        if found:
+            selected_date = found[0]
+            has_prev = True
+            has_next = scoped(s.query(event_date).filter(event_date > selected_date)).first() is not None
+    elif action == 'prev':
+        found = scoped(s.query(event_date).filter(event_date < selected_date)).order_by(event_date.desc()).first()
+        if found:
+            selected_date = found[0]
+            has_next = True
+            has_prev = scoped(s.query(event_date).filter(event_date < selected_date)).first() is not None
+    return selected_date, has_prev, has_next
+
+
+def _indexed_navigation(s, tenant_id, selected_date, action, user_id=None):
+    from app.attendance.dates import get_event_date_index
+
+    index = get_event_date_index(s, tenant_id)
+    dates = index.for_user(s, user_id) if user_id else index.all
+    if not action and selected_date not in dates:
+        selected_date = dates.most_recent() or selected_date
+    if action == 'next':
+        selected_date = dates.next(selected_date) or selected_date
+    elif action == 'prev':
+        selected_date = dates.previous(selected_date) or selected_date
+    return selected_date, dates.previous(selected_date) is not None, dates.next(selected_date) is not None
+
+
+def run_benchmark(tenant_id, members, years, requests):
+    app = create_app()
+
+    with app.app_context():
+        from database import get_tenant_db_session
+        from app.attendance.dates import invalidate_event_date_index
+
+        with get_tenant_db_session(tenant_id) as s:
+            try:
+                member_ids, meeting_dates = _seed(s, members, years)
+                print(f"Seeded {len(meeting_dates)} weekly meetings x {members} members on tenant {tenant_id}")
+
+                rng = random.Random(42)
+                workload = [(rng.choice(meeting_dates) + timedelta(days=rng.choice((0, 0, 3))),
+                             rng.choice((None, 'next', 'prev')),
+                             rng.choice((None, rng.choice(member_ids))))
+                            for _ in range(requests)]
+
+                started = time.perf_counter()
+                legacy = [_legacy_navigation(s, *request) for request in workload]
+                legacy_elapsed = time.perf_counter() - started
+
+                invalidate_event_date_index(tenant_id)
+                started = time.perf_counter()
+                indexed = [_indexed_navigation(s, tenant_id, *request) for request in workload]
+                indexed_elapsed = time.perf_counter() - started
+
+                mismatches = sum(1 for a, b in zip(legacy, indexed) if a != b)
+                print(f"{'probe queries':<22} {legacy_elapsed:8.3f}s  {legacy_elapsed / requests * 1000:8.3f} ms/request")
+                print(f"{'bisect on cached index':<22} {indexed_elapsed:8.3f}s  {indexed_elapsed / requests * 1000:8.3f} ms/request"
+                      f"  (includes building the index)")
+                print(f"Speedup: {legacy_elapsed / indexed_elapsed:.1f}x, {mismatches} differing answers")
+            finally:
+                s.rollback()
+                invalidate_event_date_index(tenant_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark attendance history date navigation')
+    parser.add_argument('--tenant', default=Config.SUPERADMIN_TENANT_ID, help='Tenant database to benchmark against')
+    parser.add_argument('--members', type=int, default=50, help='Members attending each meeting')
+    parser.add_argument('--years', type=int, default=10, help='Years of weekly meetings to seed')
+    parser.add_argument('--requests', type=int, default=500, help='Navigation requests to simulate')
+    args = parser.parse_args()
+
+    run_benchmark(args.tenant, args.members, args.years, args.requests)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
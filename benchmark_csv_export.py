@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for CSV exports: the old approach (load ORM objects, build the whole
+file in a StringIO) versus the streamed export in app/dues/routes.py (column tuples
+from a server-side cursor, written out chunk by chunk).
+
+Peak Python memory is measured with tracemalloc for each row count. The streamed peak
+should stay flat as the row count grows; the old approach grows with it.
+
+Seeds synthetic dues records inside a transaction on the chosen tenant database and rolls
+everything back at the end, so no benchmark data is left behind. Requires PostgreSQL.
+
+Usage:
+  python3 benchmark_csv_export.py [--tenant tenant1] [--rows 10000 50000 100000]
+"""
+
+import sys
+import os
+import argparse
+import csv
+import time
+import tracemalloc
+import uuid
+from datetime import date
+from io import StringIO
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+
+# Benchmark rows are dated here so the report's date filter selects only them
+BENCH_DUE_DATE = date(2999, 1, 1)
+
+
+def _seed(s, rows):
+    from app.models import User, DuesType, DuesRecord
+
+    tag = uuid.uuid4().hex[:8]
+    s.execute(User.__table__.insert(), [
+        {'first_name': f'Bench{i}', 'last_name': tag, 'email': f'bench-{tag}-{i}@example.invalid',
+         'is_active': True}
+        for i in range(rows)
+    ])
+    dues_type = DuesType(dues_type=f'Benchmark {tag}', description='benchmark', is_active=True)
+    s.add(dues_type)
+    s.flush()
+    member_ids = [row[0] for row in s.query(User.id).filter(User.last_name == tag)]
+    s.execute(DuesRecord.__table__.insert(), [
+        {'member_id': member_id, 'dues_amount': 100.0, 'dues_type_id': dues_type.id, 'due_date': BENCH_DUE_DATE,
+         'date_dues_generated': date.today(), 'amount_paid': float(i % 3) * 50}
+        for i, member_id in enumerate(member_ids)
+    ])
+    s.flush()
+
+
+def _legacy_export(s):
+    """The pre-streaming implementation: every ORM object loaded, the whole file built in memory."""
+    from sqlalchemy.orm import joinedload
+    from app.models import DuesRecord
+
+    records = s.query(DuesRecord).options(
+        joinedload(DuesRecord.member), joinedload(DuesRecord.dues_type)
+    ).filter(DuesRecord.due_date == BENCH_DUE_DATE).all()
+
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Member Name', 'Dues Type', 'Due Date', 'Amount Due', 'Amount Paid', 'Payment Date'])
+    for record in records:
+        writer.writerow([
+            f"{record.member.first_name} {record.member.last_name}",
+            record.dues_type.dues_type,
+            record.due_date.strftime('%Y-%m-%d'),
+            f"${record.dues_amount:.2f}",
+            f"${(record.amount_paid or 0):.2f}",
+            record.payment_received_date.strftime('%Y-%m-%d') if record.payment_received_date else ''
+        ])
+    return len(output.getvalue())
+
+
+def _streamed_export(s):
+    """Consume the streamed export the way the response would, discarding each chunk once sent."""
+    from app.dues.routes import paid_report_csv_rows
+    from app.utils import iter_csv
+
+    size = 0
+    for chunk in iter_csv(paid_report_csv_rows(s, 'Benchmark', BENCH_DUE_DATE, BENCH_DUE_DATE)):
+        size += len(chunk)
+    return size
+
+
+def _measured(label, s, fn):
+    s.expunge_all()
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn(s)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed:8.3f}s  peak {peak / (1024 * 1024):8.2f} MiB  ({size} chars)")
+    return peak
+
+
+def run_benchmark(tenant_id, row_counts):
+    app = create_app()
+
+    with app.app_context():
+        from database import get_tenant_db_session
+
+        for rows in row_counts:
+            with get_tenant_db_session(tenant_id) as s:
+                try:
+                    _seed(s, rows)
+                    print(f"Exporting {rows} dues records on tenant {tenant_id}")
+                    _measured("ORM objects + StringIO", s, _legacy_export)
+                    _measured("streamed column tuples", s, _streamed_export)
+                finally:
+                    s.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CSV export memory use')
+    parser.add_argument('--tenant', default=Config.SUPERADMIN_TENANT_ID, help='Tenant database to benchmark against')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000, 100000],
+                        help='Row counts to export')
+    args = parser.parse_args()
+
+    run_benchmark(args.tenant, args.rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
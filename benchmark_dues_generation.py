@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark for dues generation: the old per-member lookup loop versus the single
+INSERT ... ON CONFLICT statement in app/dues/generation.py.
+
+Seeds synthetic members inside a transaction on the chosen tenant database and rolls
+everything back at the end, so no benchmark data is left behind. Requires PostgreSQL.
+
+Usage:
+  python3 benchmark_dues_generation.py [--tenant tenant1] [--members 10000]
+"""
+
+import sys
+import os
+import argparse
+import time
+import uuid
+from datetime import date
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+
+
+def _seed(s, members):
+    from app.models import User, DuesType
+
+    tag = uuid.uuid4().hex[:8]
+    s.execute(User.__table__.insert(), [
+        {'first_name': f'Bench{i}', 'last_name': tag, 'email': f'bench-{tag}-{i}@example.invalid',
+         'is_active': True}
+        for i in range(members)
+    ])
+    dues_type = DuesType(dues_type=f'Benchmark {tag}', description='benchmark', is_active=True)
+    s.add(dues_type)
+    s.flush()
+    member_ids = [row[0] for row in s.query(User.id).filter(User.last_name == tag)]
+    return member_ids, dues_type.id
+
+
+def _legacy_generate(s, member_ids, dues_type_id, amount_due, due_date):
+    """The pre-upsert implementation: one lookup per selected member."""
+    from app.models import User, DuesRecord
+
+    selected = set(member_ids)
+    created = 0
+    for user in s.query(User).filter_by(is_active=True).order_by(User.first_name, User.last_name).all():
+        if user.id not in selected:
+            continue
+        existing = s.query(DuesRecord).filter_by(member_id=user.id, dues_type_id=dues_type_id, due_date=due_date).first()
+        if existing:
+            existing.dues_amount = amount_due
+            existing.date_dues_generated = date.today()
+        else:
+            s.add(DuesRecord(member_id=user.id, dues_amount=amount_due, dues_type_id=dues_type_id,
+                             due_date=due_date, date_dues_generated=date.today()))
+            created += 1
+    s.flush()
+    return created
+
+
+def _timed(label, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<40} {elapsed:8.3f}s  {result}")
+    return elapsed
+
+
+def run_benchmark(tenant_id, members):
+    app = create_app()
+
+    with app.app_context():
+        from database import get_tenant_db_session
+        from app.dues.generation import generate_dues_records
+
+        with get_tenant_db_session(tenant_id) as s:
+            try:
+                member_ids, dues_type_id = _seed(s, members)
+                due_date = date(date.today().year + 1, 1, 1)
+                print(f"Generating dues for {len(member_ids)} members on tenant {tenant_id}")
+
+                savepoint = s.begin_nested()
+                _timed("per-member loop (create)", lambda: _legacy_generate(s, member_ids, dues_type_id, 100.0, due_date))
+                _timed("per-member loop (update)", lambda: _legacy_generate(s, member_ids, dues_type_id, 110.0, due_date))
+                savepoint.rollback()
+
+                _timed("INSERT ... ON CONFLICT (create)", lambda: generate_dues_records(s, member_ids, dues_type_id, 100.0, due_date))
+                _timed("INSERT ... ON CONFLICT (update)", lambda: generate_dues_records(s, member_ids, dues_type_id, 110.0, due_date))
+            finally:
+                s.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dues generation strategies')
+    parser.add_argument('--tenant', default=Config.SUPERADMIN_TENANT_ID, help='Tenant database to benchmark against')
+    parser.add_argument('--members', type=int, default=10000, help='Number of synthetic members')
+    args = parser.parse_args()
+
+    run_benchmark(args.tenant, args.members)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
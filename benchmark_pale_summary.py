@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the PALE summary: the old approach (load every AttendanceRecord in range as an
+ORM object and count upper-cased statuses in Python, per-record logging left out) versus the
+COUNT(*) FILTER aggregate in app/attendance/routes.py (generate_pale_summary), which reads whole
+months from the monthly attendance rollup and only the partial edge months from raw records.
+
+Seeds --records attendance records spread over --members members inside a transaction on the
+chosen tenant database, rebuilds the rollup, and rolls everything back at the end. Requires PostgreSQL.
+
+Usage:
+  python3 benchmark_pale_summary.py [--tenant tenant1] [--members 500] [--records 1000000]
+"""
+
+import sys
+import os
+import argparse
+import time
+import uuid
+from datetime import date, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+
+# Benchmark meetings are dated from here on so they never mix with real attendance
+BENCH_START_DATE = date(2990, 1, 6)
+SEED_BATCH_SIZE = 10000
+
+
+def _seed(s, members, records):
+    from app.models import User, AttendanceType, AttendanceRecord, ATTENDANCE_STATUSES
+
+    tag = uuid.uuid4().hex[:8]
+    s.execute(User.__table__.insert(), [
+        {'first_name': f'Bench{i}', 'last_name': tag, 'email': f'bench-{tag}-{i}@example.invalid', 'is_active': True}
+        for i in range(members)
+    ])
+    attendance_type = AttendanceType(type=f'Benchmark {tag}', description='benchmark', is_active=True)
+    s.add(attendance_type)
+    s.flush()
+    member_ids = [row[0] for row in s.query(User.id).filter(User.last_name == tag)]
+
+    meetings = -(-records // members)
+    batch = []
+    for position in range(records):
+        member_id = member_ids[position % members]
+        meeting = position // members
+        code, letter, _ = ATTENDANCE_STATUSES[(member_id + meeting) % len(ATTENDANCE_STATUSES)]
+        batch.append({'user_id': member_id, 'attendance_type_id': attendance_type.id,
+                      'event_date': BENCH_START_DATE + timedelta(days=meeting),
+                      'status': letter, 'status_code': code})
+        if len(batch) == SEED_BATCH_SIZE:
+            s.execute(AttendanceRecord.__table__.insert(), batch)
+            batch = []
+    if batch:
+        s.execute(AttendanceRecord.__table__.insert(), batch)
+    s.flush()
+    return BENCH_START_DATE, BENCH_START_DATE + timedelta(days=meetings - 1)
+
+
+def _legacy_summary(s, start_date, end_date):
+    """The per-record counting generate_pale_summary used to do."""
+    from app.models import User, AttendanceRecord
+
+    members = s.query(User).filter_by(is_active=True).order_by(User.last_name, User.first_name).all()
+    counts = {member.id: {'P': 0, 'A': 0, 'L': 0, 'E': 0} for member in members}
+    records = s.query(AttendanceRecord).join(User).filter(
+        AttendanceRecord.event_date >= start_date, AttendanceRecord.event_date <= end_date, User.is_active == True
+    ).all()
+    for record in records:
+        if record.user_id in counts:
+            status = record.status.upper().strip()
+            code = {'PRESENT': 'P', 'ABSENT': 'A', 'LATE': 'L', 'EXCUSED': 'E'}.get(status, status)
+            if code in counts[record.user_id]:
+                counts[record.user_id][code] += 1
+    return {member_id: (c['P'], c['A'], c['L'], c['E']) for member_id, c in counts.items()}
+
+
+def _aggregate_summary(s, start_date, end_date):
+    from app.attendance.routes import pale_counts_query
+
+    return {row.id: (row.present_count, row.absent_count, row.late_count, row.excused_count)
+            for row in pale_counts_query(s, start_date, end_date, None)}
+
+
+def run_benchmark(tenant_id, members, records):
+    app = create_app()
+
+    with app.app_context():
+        from database import get_tenant_db_session
+        from app.attendance.rollup import rebuild_rollup
+
+        with get_tenant_db_session(tenant_id) as s:
+            try:
+                started = time.perf_counter()
+                start_date, end_date = _seed(s, members, records)
+                print(f"Seeded {records} attendance records for {members} members on tenant {tenant_id} "
+                      f"in {time.perf_counter() - started:.1f}s")
+                started = time.perf_counter()
+                rollup_rows = rebuild_rollup(s)
+                print(f"Rebuilt the attendance rollup ({rollup_rows} rows) in {time.perf_counter() - started:.1f}s")
+                # Start mid-month so both partial edge months are read from raw records
+                start_date += timedelta(days=10)
+
+                started = time.perf_counter()
+                legacy = _legacy_summary(s, start_date, end_date)
+                legacy_elapsed = time.perf_counter() - started
+                s.expunge_all()
+
+                started = time.perf_counter()
+                aggregate = _aggregate_summary(s, start_date, end_date)
+                aggregate_elapsed = time.perf_counter() - started
+
+                mismatches = sum(1 for member_id, counts in legacy.items() if aggregate.get(member_id) != counts)
+                print(f"{'ORM objects + Python':<22} {legacy_elapsed:8.3f}s")
+                print(f"{'rollup + edge months':<22} {aggregate_elapsed:8.3f}s")
+                print(f"Speedup: {legacy_elapsed / aggregate_elapsed:.1f}x, {mismatches} members with differing counts")
+            finally:
+                s.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the PALE attendance summary')
+    parser.add_argument('--tenant', default=Config.SUPERADMIN_TENANT_ID, help='Tenant database to benchmark against')
+    parser.add_argument('--members', type=int, default=500, help='Members to spread the records over')
+    parser.add_argument('--records', type=int, default=1000000, help='Attendance records to seed')
+    args = parser.parse_args()
+
+    run_benchmark(args.tenant, args.members, args.records)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
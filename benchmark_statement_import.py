@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark for bank statement imports (app/dues/reconciliation.py).
+
+Seeds one open dues record per synthetic member, writes a CSV statement of --lines
+credits (a mix of lines matching by document number, by member name and amount, and
+lines that match nothing), then times parsing, matching and posting the whole file.
+Peak Python memory is reported with tracemalloc.
+
+Everything runs inside a transaction on the chosen tenant database and is rolled back
+at the end, so no benchmark data is left behind. Requires PostgreSQL.
+
+Usage:
+  python3 benchmark_statement_import.py [--tenant tenant1] [--lines 50000]
+"""
+
+import sys
+import os
+import argparse
+import csv
+import io
+import time
+import tracemalloc
+import uuid
+from datetime import date
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+
+BENCH_DUE_DATE = date(2999, 1, 1)
+
+
+def _seed(s, members):
+    from app.models import User, DuesType, DuesRecord
+
+    tag = uuid.uuid4().hex[:8]
+    s.execute(User.__table__.insert(), [
+        {'first_name': f'Bench{i}', 'last_name': tag, 'email': f'bench-{tag}-{i}@example.invalid',
+         'is_active': True}
+        for i in range(members)
+    ])
+    dues_type = DuesType(dues_type=f'Benchmark {tag}', description='benchmark', is_active=True)
+    s.add(dues_type)
+    s.flush()
+    member_ids = [row[0] for row in s.query(User.id).filter(User.last_name == tag).order_by(User.id)]
+    s.execute(DuesRecord.__table__.insert(), [
+        {'member_id': member_id, 'dues_amount': 100.0 + i % 50, 'dues_type_id': dues_type.id, 'due_date': BENCH_DUE_DATE,
+         'date_dues_generated': date.today(), 'amount_paid': 0.0, 'document_number': f'BENCH-{tag}-{i}'}
+        for i, member_id in enumerate(member_ids)
+    ])
+    s.flush()
+    return tag
+
+
+def _statement(tag, lines):
+    """CSV statement bytes: a third match by reference, a third by name and amount, a third match nothing."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Date', 'Amount', 'Reference', 'Name', 'Description'])
+    for i in range(lines):
+        amount = f"{100.0 + i % 50:.2f}"
+        if i % 3 == 0:
+            writer.writerow(['2999-01-02', amount, f'BENCH-{tag}-{i}', '', 'Check deposit'])
+        elif i % 3 == 1:
+            writer.writerow(['01/02/2999', amount, '', f'{tag} Bench{i}', 'Transfer'])
+        else:
+            writer.writerow(['2999-01-02', '12.34', f'UNKNOWN-{i}', f'Stranger {i}', 'Unidentified credit'])
+    return output.getvalue().encode('utf-8')
+
+
+def run_benchmark(tenant_id, lines):
+    app = create_app()
+
+    with app.app_context():
+        from database import get_tenant_db_session
+        from app.dues.reconciliation import import_statement, new_import
+
+        with get_tenant_db_session(tenant_id) as s:
+            try:
+                tag = _seed(s, lines)
+                data = _statement(tag, lines)
+                print(f"Importing a {lines}-line statement ({len(data) / (1024 * 1024):.1f} MiB) on tenant {tenant_id}")
+
+                tracemalloc.start()
+                started = time.perf_counter()
+                result, statement_lines = new_import(io.BytesIO(data), 'benchmark.csv')
+                import_statement(s, statement_lines, result, source_file='benchmark.csv')
+                s.flush()
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                print(f"Matched:   {result.matched} (${result.matched_amount:.2f})")
+                print(f"Unmatched: {result.unmatched} (${result.unmatched_amount:.2f})")
+                print(f"Skipped:   {result.skipped}, duplicates: {result.duplicates}")
+                print(f"Elapsed:   {elapsed:.3f}s ({lines / elapsed:.0f} lines/s), peak {peak / (1024 * 1024):.2f} MiB")
+            finally:
+                s.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bank statement import and reconciliation')
+    parser.add_argument('--tenant', default=Config.SUPERADMIN_TENANT_ID, help='Tenant database to benchmark against')
+    parser.add_argument('--lines', type=int, default=50000, help='Number of statement lines to import')
+    args = parser.parse_args()
+
+    run_benchmark(args.tenant, args.lines)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 # config.py
 
 import os
+import tempfile
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'a_very_secret_key_for_development'
@@ -36,3 +37,21 @@ class Config:
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
+
+    # Background PDF rendering: finished reports are cached on disk and evicted oldest-first past the size limit
+    PDF_CACHE_DIR = os.environ.get('PDF_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'unfc_pdf_cache'))
+    PDF_CACHE_MAX_BYTES = int(os.environ.get('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    PDF_WORKERS = int(os.environ.get('PDF_WORKERS', 2))
+
+    # Outgoing mail for dues reminders (run_dues_reminders.py); one SMTP connection is reused per batch
+    MAIL_SERVER = os.environ.get('MAIL_SERVER', 'localhost')
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', 25))
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS') == '1'
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'dues@localhost')
+    MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE', 100))
+    MAIL_MAX_PER_SECOND = float(os.environ.get('MAIL_MAX_PER_SECOND', 10))
+    MAIL_MAX_ATTEMPTS = int(os.environ.get('MAIL_MAX_ATTEMPTS', 5))
+    # A member with an open balance is reminded at most once per this many days, however often cron runs
+    REMINDER_MIN_INTERVAL_DAYS = int(os.environ.get('REMINDER_MIN_INTERVAL_DAYS', 7))
@@ -39,7 +39,8 @@ def init_db_for_tenant(app, tenant_id):
             db_url = get_tenant_db_url(tenant_id)
             engine = create_engine(db_url)
             _tenant_engines[tenant_id] = engine
-            _tenant_session_factories[tenant_id] = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+            # Tag each session with its tenant so ORM event hooks (cache invalidation, auditing) know which tenant changed
+            _tenant_session_factories[tenant_id] = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine, info={'tenant_id': tenant_id}))
 
         # Use the engine to create all tables for the tenant's database
         print(f"Ensuring tables for tenant '{tenant_id}' at {get_tenant_db_url(tenant_id)}...")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Batch generator for per-member dues statements (see app/dues/statements.py).
+Writes one PDF per member with open dues (open items, payments received and balance)
+into a zip file or a folder, rendering on a process pool across all cores.
+
+Usage:
+  python3 generate_dues_statements.py [--tenant tenant1] [--output statements] [--zip]
+                                      [--as-of YYYY-MM-DD] [--since YYYY-MM-DD]
+                                      [--member 12 --member 34] [--workers 4]
+"""
+
+import sys
+import os
+import argparse
+import logging
+import time
+from datetime import date, datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def generate_dues_statements(tenant_ids, output, as_zip=False, as_of=None, since=None, member_ids=None, workers=None):
+    """Write statements for the given tenants. Returns (statements written, failed)."""
+
+    app = create_app()
+    as_of = as_of or date.today()
+    total = 0
+    failed = False
+    started = time.perf_counter()
+
+    with app.app_context():
+        from database import get_tenant_db_session
+        from app.dues.statements import load_member_statements, write_statements
+
+        for tenant_id in tenant_ids:
+            tenant_name = Config.TENANT_DISPLAY_NAMES.get(tenant_id, tenant_id.capitalize())
+            target = os.path.join(output, f"{tenant_id}_statements_{as_of.strftime('%Y%m%d')}")
+            if as_zip:
+                target += '.zip'
+            try:
+                load_started = time.perf_counter()
+                with get_tenant_db_session(tenant_id) as s:
+                    statements = load_member_statements(s, as_of, since, member_ids)
+                logger.info(f"{tenant_id}: loaded {len(statements)} statements in {time.perf_counter() - load_started:.2f}s")
+                count, elapsed = write_statements(tenant_name, statements, target, as_of, workers)
+            except ImportError:
+                logger.error("PDF generation requires reportlab library. Please install it first.")
+                return total, True
+            except Exception as e:
+                logger.error(f"Error generating dues statements for {tenant_id}: {str(e)}")
+                failed = True
+                continue
+
+            total += count
+            logger.info(f"{tenant_id}: {count} statements written to {target} in {elapsed:.2f}s "
+                        f"({count / elapsed if elapsed else 0:.1f} statements/s)")
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Generated {total} dues statements in {elapsed:.2f}s "
+                f"({total / elapsed if elapsed else 0:.1f} statements/s)")
+    return total, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate per-member dues statement PDFs')
+    parser.add_argument('--tenant', help='Only generate statements for this tenant')
+    parser.add_argument('--output', default='statements', help='Directory to write statements into')
+    parser.add_argument('--zip', action='store_true', help='Write one zip file per tenant instead of a folder')
+    parser.add_argument('--as-of', help='Statement date; dues falling due after it are left out (default: today)')
+    parser.add_argument('--since', help='List payments received from this date (default: January 1 of the statement year)')
+    parser.add_argument('--member', type=int, action='append', help='Only this member (repeatable); included even with no open balance')
+    parser.add_argument('--workers', type=int, help='Rendering processes (default: one per CPU core)')
+    args = parser.parse_args()
+
+    as_of = datetime.strptime(args.as_of, '%Y-%m-%d').date() if args.as_of else None
+    since = datetime.strptime(args.since, '%Y-%m-%d').date() if args.since else None
+    tenant_ids = [args.tenant] if args.tenant else list(Config.TENANT_DATABASES.keys())
+
+    _, failed = generate_dues_statements(tenant_ids, args.output, args.zip, as_of, since, args.member, args.workers)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Maintenance script for the monthly member_audit_log partitions.
+Creates partitions for the coming months (and for past months whose rows fell into the
+default partition) and drops months past the retention window, which removes old history
+instantly instead of with a large DELETE.
+Run it from cron at least once a month.
+
+Usage:
+  python3 maintain_audit_partitions.py [--months-ahead 3] [--retention-months 24]
+"""
+
+import sys
+import os
+import argparse
+import logging
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def maintain_audit_partitions(months_ahead, retention_months):
+    """Create upcoming and drop expired audit log partitions for all tenants."""
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines
+        from app.members.audit import create_audit_partitions, drop_expired_audit_partitions
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            engine = _tenant_engines[tenant_id]
+            if engine.dialect.name != 'postgresql':
+                logger.info(f"Skipping {tenant_id}: audit log partitioning requires PostgreSQL")
+                continue
+
+            with engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    # Expired rows go first, so no partition is created for them from the default one
+                    dropped = drop_expired_audit_partitions(conn, retention_months)
+                    created = create_audit_partitions(conn, months_ahead)
+                    trans.commit()
+                    logger.info(f"{tenant_id}: created {created or 'no'} partitions, dropped {dropped or 'no'} partitions")
+                except Exception as e:
+                    trans.rollback()
+                    logger.error(f"Error maintaining audit partitions for {tenant_id}: {str(e)}")
+                    raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create and expire monthly member audit log partitions')
+    parser.add_argument('--months-ahead', type=int, default=3, help='Months of partitions to create ahead of today')
+    parser.add_argument('--retention-months', type=int, default=24, help='Months of history to keep')
+    args = parser.parse_args()
+
+    maintain_audit_partitions(args.months_ahead, args.retention_months)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
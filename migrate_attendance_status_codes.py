@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Migration script to move attendance statuses onto the attendance_status lookup table.
+Creates and seeds attendance_status, fills the new attendance_record.status_code column
+from the old free-text status column, makes status_code NOT NULL with a foreign key, adds
+the (event_date, status_code, user_id) report index and drops the status column, so the
+code is the only stored status. Run it before deploying code without the status column.
+Stops without changes if a tenant has statuses that match no code; safe to rerun.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+FOREIGN_KEY_NAME = 'fk_attendance_record_status_code'
+INDEX_NAME = 'ix_attendance_record_date_status_user'
+
+
+def migrate_attendance_status_codes():
+    """Normalise attendance statuses into status codes for all tenants."""
+
+    from app.models import ATTENDANCE_STATUSES, ATTENDANCE_STATUS_CODES
+
+    print("Migrating attendance statuses to status codes...")
+
+    app = create_app()
+    # Every accepted spelling with the code it normalises to
+    spellings = [{'spelling': spelling, 'code': code} for spelling, code in ATTENDANCE_STATUS_CODES.items()]
+
+    with app.app_context():
+        from database import _tenant_engines
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Migrating attendance statuses for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            with engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    conn.execute(text("""
+                        CREATE TABLE IF NOT EXISTS attendance_status (
+                            code SMALLINT PRIMARY KEY,
+                            letter VARCHAR(1) NOT NULL UNIQUE,
+                            name VARCHAR(20) NOT NULL
+                        )
+                    """))
+                    conn.execute(text(
+                        "INSERT INTO attendance_status (code, letter, name) VALUES (:code, :letter, :name) "
+                        "ON CONFLICT (code) DO NOTHING"
+                    ), [{'code': code, 'letter': letter, 'name': name} for code, letter, name in ATTENDANCE_STATUSES])
+
+                    # A rerun after the status column has been dropped only checks the constraints
+                    has_status = conn.execute(text(
+                        "SELECT 1 FROM information_schema.columns "
+                        "WHERE table_name = 'attendance_record' AND column_name = 'status'"
+                    )).scalar()
+                    if has_status:
+                        unknown = conn.execute(text(
+                            "SELECT status, count(*) FROM attendance_record "
+                            "WHERE upper(trim(status)) <> ALL(:spellings) GROUP BY status"
+                        ), {'spellings': list(ATTENDANCE_STATUS_CODES)}).fetchall()
+                        if unknown:
+                            listed = ', '.join(f"{status!r} ({count})" for status, count in unknown)
+                            raise ValueError(f"Unrecognised attendance statuses, fix or delete these records first: {listed}")
+
+                        conn.execute(text(
+                            "ALTER TABLE attendance_record ADD COLUMN IF NOT EXISTS status_code SMALLINT"
+                        ))
+                        conn.execute(text("""
+                            CREATE TEMPORARY TABLE attendance_status_spelling (
+                                spelling VARCHAR(20) PRIMARY KEY, code SMALLINT
+                            ) ON COMMIT DROP
+                        """))
+                        conn.execute(text(
+                            "INSERT INTO attendance_status_spelling VALUES (:spelling, :code)"
+                        ), spellings)
+                        updated = conn.execute(text("""
+                            UPDATE attendance_record a
+                            SET status_code = m.code
+                            FROM attendance_status_spelling m
+                            WHERE upper(trim(a.status)) = m.spelling
+                              AND a.status_code IS DISTINCT FROM m.code
+                        """)).rowcount
+                        print(f"  Set the status code of {updated} attendance records")
+
+                    conn.execute(text("ALTER TABLE attendance_record ALTER COLUMN status_code SET NOT NULL"))
+                    exists = conn.execute(text(
+                        "SELECT 1 FROM pg_constraint WHERE conname = :name"
+                    ), {'name': FOREIGN_KEY_NAME}).scalar()
+                    if not exists:
+                        conn.execute(text(
+                            f"ALTER TABLE attendance_record ADD CONSTRAINT {FOREIGN_KEY_NAME} "
+                            f"FOREIGN KEY (status_code) REFERENCES attendance_status (code)"
+                        ))
+                    conn.execute(text(
+                        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON attendance_record (event_date, status_code, user_id)"
+                    ))
+                    if has_status:
+                        conn.execute(text("ALTER TABLE attendance_record DROP COLUMN status"))
+                        print("  Dropped attendance_record.status")
+                    conn.execute(text("ANALYZE attendance_record"))
+                    trans.commit()
+                    print(f"  Successfully migrated attendance statuses for {tenant_id}")
+                except Exception as e:
+                    trans.rollback()
+                    print(f"  Error migrating attendance statuses for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Attendance status code migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_attendance_status_codes()
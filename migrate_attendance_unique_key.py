@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Migration script to add a unique key on attendance_record (user_id, event_date, attendance_type_id).
+Duplicate records are collapsed first: the most recently updated record of each group is kept.
+The attendance matrix save relies on this constraint for INSERT ... ON CONFLICT.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+CONSTRAINT_NAME = 'uq_attendance_record_user_date_type'
+
+
+def migrate_attendance_unique_key():
+    """Collapse duplicate attendance records and add the unique key for all tenants."""
+
+    print("Adding attendance record unique key...")
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Adding attendance record unique key for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            with engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    exists = conn.execute(text(
+                        "SELECT 1 FROM pg_constraint WHERE conname = :name"
+                    ), {'name': CONSTRAINT_NAME}).scalar()
+                    if exists:
+                        print(f"  Unique key already present for {tenant_id}")
+                        trans.commit()
+                        continue
+
+                    # The last save wins: keep the latest status of each duplicate group
+                    deleted = conn.execute(text("""
+                        DELETE FROM attendance_record a
+                        USING (
+                            SELECT id,
+                                   row_number() OVER (
+                                       PARTITION BY user_id, event_date, attendance_type_id
+                                       ORDER BY updated_at DESC NULLS LAST, id DESC
+                                   ) AS position
+                            FROM attendance_record
+                        ) ranked
+                        WHERE a.id = ranked.id
+                          AND ranked.position > 1
+                    """)).rowcount
+                    print(f"  Deleted {deleted} duplicate attendance records")
+
+                    conn.execute(text(
+                        f"ALTER TABLE attendance_record ADD CONSTRAINT {CONSTRAINT_NAME} "
+                        f"UNIQUE (user_id, event_date, attendance_type_id)"
+                    ))
+                    trans.commit()
+                    print(f"  Successfully added attendance record unique key for {tenant_id}")
+                except Exception as e:
+                    trans.rollback()
+                    print(f"  Error adding attendance record unique key for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Attendance record unique key migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_attendance_unique_key()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Migration script for duplicate detection in bank statement imports (app/dues/reconciliation.py):
+adds bank_statement_line.transaction_id and the indexes imports use to look up earlier lines
+by posted date and transaction id, and hand-recorded check payments by date. Indexes are built
+CONCURRENTLY so dues stay writable.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+INDEXES = (
+    ('ix_bank_statement_line_posted_date', 'bank_statement_line (posted_date)'),
+    ('ix_bank_statement_line_transaction', 'bank_statement_line (transaction_id)'),
+    ('ix_dues_payment_document_date', 'dues_payment (payment_date) WHERE document_number IS NOT NULL'),
+)
+
+
+def migrate_bank_statement_dedupe():
+    """Add the transaction id column and duplicate lookup indexes for all tenants."""
+
+    print("Adding bank statement duplicate detection...")
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Adding bank statement duplicate detection for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+            with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                try:
+                    conn.execute(text("ALTER TABLE bank_statement_line ADD COLUMN IF NOT EXISTS transaction_id VARCHAR(255)"))
+                    for name, definition in INDEXES:
+                        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+                    print(f"  Successfully added bank statement duplicate detection for {tenant_id}")
+                except Exception as e:
+                    print(f"  Error adding bank statement duplicate detection for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Bank statement duplicate detection migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_bank_statement_dedupe()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Migration script to add created_at/updated_at change tracking for the member delta sync API.
+Adds the columns to the user and lookup tables, backfills existing rows and indexes user changes.
+The deleted_record tombstone table is created by the application on startup.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+TRACKED_TABLES = ['"user"', 'membership_type', 'attendance_type', 'dues_type', 'referral_type']
+
+
+def migrate_change_tracking():
+    """Add change timestamps to member and lookup tables for all tenants."""
+
+    print("Adding change tracking columns...")
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Adding change tracking for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            with engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    for table in TRACKED_TABLES:
+                        print(f"  Adding created_at/updated_at to {table}")
+                        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS created_at TIMESTAMP"))
+                        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP"))
+                        conn.execute(text(f"UPDATE {table} SET created_at = (now() at time zone 'utc') WHERE created_at IS NULL"))
+                        conn.execute(text(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL"))
+
+                    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_user_updated_at_id ON "user" (updated_at, id)'))
+                    trans.commit()
+                    print(f"  Successfully added change tracking for {tenant_id}")
+                except Exception as e:
+                    trans.rollback()
+                    print(f"  Error adding change tracking for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Change tracking migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_change_tracking()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Migration script to drop attendance_rule_state. Attendance rules (app/attendance/rules.py)
+recount each window from attendance_record whenever they are evaluated, so the stored
+per-member counts were never read.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+
+def migrate_drop_attendance_rule_state():
+    """Drop the unused attendance rule state table for all tenants."""
+
+    print("Dropping attendance rule state...")
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Dropping attendance rule state for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            with engine.begin() as conn:
+                try:
+                    conn.execute(text("DROP TABLE IF EXISTS attendance_rule_state"))
+                    print(f"  Successfully dropped attendance rule state for {tenant_id}")
+                except Exception as e:
+                    print(f"  Error dropping attendance rule state for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Attendance rule state migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_drop_attendance_rule_state()
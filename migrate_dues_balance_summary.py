@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Migration script to build dues_member_balance: per-member, per-dues-type balances with
+0-30/31-60/61-90/90+ day aging buckets, maintained by app/dues/balances.py.
+Drops the dues_balance_summary materialized view earlier versions refreshed on every write.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+
+def migrate_dues_balance_summary():
+    """Create and populate the member balance table for all tenants."""
+
+    print("Building dues member balances...")
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines
+        from sqlalchemy.orm import Session
+        from app.models import DuesMemberBalance
+        from app.dues.balances import rebuild_balances
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Building dues member balances for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            with Session(bind=engine) as s:
+                try:
+                    s.execute(text("DROP MATERIALIZED VIEW IF EXISTS dues_balance_summary"))
+                    DuesMemberBalance.__table__.create(bind=s.connection(), checkfirst=True)
+                    rows = rebuild_balances(s)
+                    s.commit()
+                    print(f"  Wrote {rows} balance rows for {tenant_id}")
+                except Exception as e:
+                    s.rollback()
+                    print(f"  Error building dues member balances for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Dues member balance migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_dues_balance_summary()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the composite indexes behind keyset pagination of the dues ledger
+views (app/dues/pagination.py). Indexes are built CONCURRENTLY so dues stay writable.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+INDEXES = (
+    ('ix_dues_record_due_date_member', 'due_date, member_id, id'),
+    ('ix_dues_record_member_due_date', 'member_id, due_date, id'),
+    # Must match DUES_RECORD_PAID in app/models.py, the leading key of the 'ledger' ordering
+    ('ix_dues_record_paid_due_date_member', '(coalesce(amount_paid, 0) >= dues_amount), due_date, member_id, id'),
+)
+
+
+def migrate_dues_ledger_indexes():
+    """Create the dues ledger pagination indexes for all tenants."""
+
+    print("Adding dues ledger indexes...")
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Adding dues ledger indexes for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+            with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                try:
+                    for name, columns in INDEXES:
+                        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON dues_record ({columns})"))
+                    conn.execute(text("ANALYZE dues_record"))
+                    print(f"  Successfully added dues ledger indexes for {tenant_id}")
+                except Exception as e:
+                    print(f"  Error adding dues ledger indexes for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Dues ledger index migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_dues_ledger_indexes()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Migration script to seed the dues_payment ledger from existing dues records.
+Each record with a non-zero amount_paid gets one opening ledger entry, so the ledger
+total matches amount_paid. The dues_payment table is created by the application on startup.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+
+def migrate_dues_payment_ledger():
+    """Backfill opening ledger entries for all tenants."""
+
+    print("Seeding dues payment ledger...")
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Seeding dues payment ledger for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            with engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    seeded = conn.execute(text("""
+                        INSERT INTO dues_payment (dues_record_id, amount, payment_date, document_number, created_at)
+                        SELECT d.id, d.amount_paid, coalesce(d.payment_received_date, d.date_dues_generated),
+                               d.document_number, (now() at time zone 'utc')
+                        FROM dues_record d
+                        WHERE coalesce(d.amount_paid, 0) <> 0
+                          AND NOT EXISTS (SELECT 1 FROM dues_payment p WHERE p.dues_record_id = d.id)
+                    """)).rowcount
+                    trans.commit()
+                    print(f"  Seeded {seeded} opening ledger entries for {tenant_id}")
+                except Exception as e:
+                    trans.rollback()
+                    print(f"  Error seeding dues payment ledger for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Dues payment ledger migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_dues_payment_ledger()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Migration script to add a unique key on dues_record (member_id, dues_type_id, due_date).
+Duplicate records are merged first: payments are summed onto the oldest record and the rest deleted.
+Dues generation relies on this constraint for INSERT ... ON CONFLICT.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+CONSTRAINT_NAME = 'uq_dues_record_member_type_date'
+
+
+def migrate_dues_unique_key():
+    """Merge duplicate dues records and add the unique key for all tenants."""
+
+    print("Adding dues record unique key...")
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Adding dues record unique key for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            with engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    exists = conn.execute(text(
+                        "SELECT 1 FROM pg_constraint WHERE conname = :name"
+                    ), {'name': CONSTRAINT_NAME}).scalar()
+                    if exists:
+                        print(f"  Unique key already present for {tenant_id}")
+                        trans.commit()
+                        continue
+
+                    # Keep the oldest record of each duplicate group, carrying over all payments
+                    merged = conn.execute(text("""
+                        WITH dup AS (
+                            SELECT min(id) AS keep_id,
+                                   sum(coalesce(amount_paid, 0)) AS total_paid,
+                                   max(payment_received_date) AS last_paid,
+                                   max(document_number) AS any_document
+                            FROM dues_record
+                            GROUP BY member_id, dues_type_id, due_date
+                            HAVING count(*) > 1
+                        )
+                        UPDATE dues_record d
+                        SET amount_paid = dup.total_paid,
+                            payment_received_date = coalesce(dup.last_paid, d.payment_received_date),
+                            document_number = coalesce(d.document_number, dup.any_document)
+                        FROM dup
+                        WHERE d.id = dup.keep_id
+                    """)).rowcount
+                    deleted = conn.execute(text("""
+                        DELETE FROM dues_record d
+                        USING dues_record keep
+                        WHERE d.member_id = keep.member_id
+                          AND d.dues_type_id = keep.dues_type_id
+                          AND d.due_date = keep.due_date
+                          AND d.id > keep.id
+                    """)).rowcount
+                    print(f"  Merged {merged} duplicate groups, deleted {deleted} duplicate records")
+
+                    conn.execute(text(
+                        f"ALTER TABLE dues_record ADD CONSTRAINT {CONSTRAINT_NAME} "
+                        f"UNIQUE (member_id, dues_type_id, due_date)"
+                    ))
+                    trans.commit()
+                    print(f"  Successfully added dues record unique key for {tenant_id}")
+                except Exception as e:
+                    trans.rollback()
+                    print(f"  Error adding dues record unique key for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Dues record unique key migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_dues_unique_key()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Migration script to add a pg_trgm index for the member typeahead search.
+The indexed expression must match member_search_expression() in app/members/search.py.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+SEARCH_EXPRESSION = "lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || coalesce(email, ''))"
+
+
+def migrate_member_search_index():
+    """Create the pg_trgm extension and the member search index for all tenants."""
+
+    print("Adding member search index...")
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Adding member search index for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            with engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                    conn.execute(text(
+                        f'CREATE INDEX IF NOT EXISTS ix_user_search_trgm ON "user" '
+                        f'USING gin (({SEARCH_EXPRESSION}) gin_trgm_ops)'
+                    ))
+                    # Prefix lookups on short queries
+                    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_user_first_name_lower ON "user" (lower(first_name) text_pattern_ops)'))
+                    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_user_last_name_lower ON "user" (lower(last_name) text_pattern_ops)'))
+                    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_user_email_lower ON "user" (lower(email) text_pattern_ops)'))
+                    trans.commit()
+                    print(f"  Successfully added member search index for {tenant_id}")
+                except Exception as e:
+                    trans.rollback()
+                    print(f"  Error adding member search index for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Member search index migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_member_search_index()
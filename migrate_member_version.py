@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the version_id column used for optimistic concurrency on member edits.
+Existing rows start at version 1; SQLAlchemy increments it on every UPDATE.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+
+def migrate_member_version():
+    """Add the version_id column to the user table for all tenants."""
+
+    print("Adding member version column...")
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Adding member version column for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            with engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    conn.execute(text('ALTER TABLE "user" ADD COLUMN IF NOT EXISTS version_id INTEGER NOT NULL DEFAULT 1'))
+                    trans.commit()
+                    print(f"  Successfully added member version column for {tenant_id}")
+                except Exception as e:
+                    trans.rollback()
+                    print(f"  Error adding member version column for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Member version migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_member_version()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Migration script to move the member delta sync from updated_at timestamps to transaction ids.
+Adds change_xid to the synced tables and to deleted_record, backfills it, installs the triggers
+that keep it current and record deletions (see SYNCED_TABLES in app/models.py), and replaces
+the (updated_at, id) sync index. Clients holding an old cursor do one full sync afterwards.
+Requires PostgreSQL 13 or later.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+from sqlalchemy import text
+
+CURRENT_XID = "pg_current_xact_id()::text::bigint"
+
+
+def migrate_sync_change_xid():
+    """Add transaction id change tracking and its triggers for all tenants."""
+
+    print("Adding sync change tracking by transaction id...")
+
+    app = create_app()
+
+    with app.app_context():
+        from database import _tenant_engines, db
+        from app.models import SYNCED_TABLES, SYNC_TRIGGER_FUNCTIONS, SYNC_TRIGGERS
+
+        for tenant_id in Config.TENANT_DATABASES.keys():
+            print(f"Adding sync change tracking for tenant: {tenant_id}")
+            engine = _tenant_engines[tenant_id]
+
+            with engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    conn.execute(SYNC_TRIGGER_FUNCTIONS)
+
+                    # Backfill before the triggers exist; existing tombstones are stamped as well
+                    for table_name in SYNCED_TABLES + ('deleted_record',):
+                        print(f"  Adding change_xid to {table_name}")
+                        conn.execute(text(f'ALTER TABLE "{table_name}" ADD COLUMN IF NOT EXISTS change_xid BIGINT'))
+                        conn.execute(text(f'UPDATE "{table_name}" SET change_xid = {CURRENT_XID} WHERE change_xid IS NULL'))
+
+                    for table_name in SYNCED_TABLES:
+                        print(f"  Installing sync triggers on {table_name}")
+                        conn.execute(text(f'DROP TRIGGER IF EXISTS sync_change ON "{table_name}"'))
+                        conn.execute(text(f'DROP TRIGGER IF EXISTS sync_delete ON "{table_name}"'))
+                        conn.execute(SYNC_TRIGGERS.against(db.Model.metadata.tables[table_name]))
+
+                    conn.execute(text('DROP INDEX IF EXISTS ix_user_updated_at_id'))
+                    conn.execute(text('DROP INDEX IF EXISTS ix_deleted_record_deleted_at'))
+                    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_user_change_xid_id ON "user" (change_xid, id)'))
+                    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_deleted_record_change_xid_id ON deleted_record (change_xid, id)'))
+                    trans.commit()
+                    print(f"  Successfully added sync change tracking for {tenant_id}")
+                except Exception as e:
+                    trans.rollback()
+                    print(f"  Error adding sync change tracking for {tenant_id}: {str(e)}")
+                    raise
+
+    print("Sync change tracking migration completed successfully!")
+
+
+if __name__ == "__main__":
+    migrate_sync_change_xid()
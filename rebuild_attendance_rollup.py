@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Rebuild the monthly attendance rollup (attendance_monthly_count, see app/attendance/rollup.py)
+from attendance_record. The table is kept current as attendance is saved; run this once
+after deploying it, and again after any bulk change made outside the application.
+
+Usage:
+  python3 rebuild_attendance_rollup.py [--tenant tenant1]
+"""
+
+import sys
+import os
+import argparse
+import logging
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rebuild_attendance_rollup(tenant_ids):
+    """Rebuild the rollup for the given tenants. Returns True if any tenant failed."""
+
+    app = create_app()
+    failed = False
+
+    with app.app_context():
+        from database import get_tenant_db_session
+        from app.attendance.rollup import rebuild_rollup
+
+        for tenant_id in tenant_ids:
+            started = time.perf_counter()
+            try:
+                with get_tenant_db_session(tenant_id) as s:
+                    rows = rebuild_rollup(s)
+                    s.commit()
+            except Exception as e:
+                logger.error(f"Error rebuilding the attendance rollup for {tenant_id}: {str(e)}")
+                failed = True
+                continue
+            logger.info(f"{tenant_id}: {rows} month, member, type and status rows in {time.perf_counter() - started:.2f}s")
+
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the monthly attendance rollup')
+    parser.add_argument('--tenant', help='Only rebuild this tenant')
+    args = parser.parse_args()
+
+    tenant_ids = [args.tenant] if args.tenant else list(Config.TENANT_DATABASES.keys())
+    return 1 if rebuild_attendance_rollup(tenant_ids) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Fully re-evaluate the attendance rules (see app/attendance/rules.py) of every tenant: recount
+each rule's rolling window for all members and open or resolve alerts. Saving attendance only
+re-evaluates the members it touched, so run this daily (windows move on even when nobody
+saves) and after any bulk change made outside the application.
+
+Tenants are separate databases and the work is almost all database time, so they are
+recomputed in parallel on a thread pool, each worker with its own session.
+
+Usage:
+  python3 recompute_attendance_rules.py [--tenant tenant1] [--workers 4] [--as-of 2024-06-30]
+"""
+
+import sys
+import os
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+
+
+def _recompute_tenant(app, tenant_id, as_of):
+    with app.app_context():
+        from database import get_tenant_db_session
+        from app.attendance.rules import recompute_rules
+
+        started = time.perf_counter()
+        try:
+            with get_tenant_db_session(tenant_id) as s:
+                opened, resolved = recompute_rules(s, as_of)
+                s.commit()
+        except Exception as e:
+            logger.error(f"Error recomputing attendance rules for {tenant_id}: {str(e)}")
+            return False
+        logger.info(f"{tenant_id}: {opened} alerts opened, {resolved} resolved in {time.perf_counter() - started:.2f}s")
+        return True
+
+
+def recompute_attendance_rules(tenant_ids, workers=DEFAULT_WORKERS, as_of=None):
+    """Recompute the rules of the given tenants. Returns True if any tenant failed."""
+
+    app = create_app()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tenant_ids)))) as pool:
+        results = list(pool.map(lambda tenant_id: _recompute_tenant(app, tenant_id, as_of), tenant_ids))
+    return not all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-evaluate attendance rules and open or resolve their alerts')
+    parser.add_argument('--tenant', help='Only recompute this tenant')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Tenants recomputed at once')
+    parser.add_argument('--as-of', help='Evaluate the windows ending on this date (YYYY-MM-DD, default today)')
+    args = parser.parse_args()
+
+    as_of = datetime.strptime(args.as_of, '%Y-%m-%d').date() if args.as_of else None
+    tenant_ids = [args.tenant] if args.tenant else list(Config.TENANT_DATABASES.keys())
+    return 1 if recompute_attendance_rules(tenant_ids, args.workers, as_of) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Dues reminder outbox runner (see DuesReminder and app/dues/reminders.py).
+Queues one reminder per member with an open balance, then drains the outbox over SMTP
+in batches (one connection per batch, rate limited, failed sends retried with backoff).
+Safe to run from cron: a member is queued at most once every REMINDER_MIN_INTERVAL_DAYS and sent
+rows are never resent.
+
+To try it against a local SMTP sink that just prints messages:
+  python3 -m aiosmtpd -n -l localhost:8025
+  python3 run_dues_reminders.py --tenant tenant1 --smtp-server localhost --smtp-port 8025
+
+Usage:
+  python3 run_dues_reminders.py [--tenant tenant1] [--queue-only | --send-only]
+                                [--min-balance 0.01] [--rate 10] [--smtp-server host] [--smtp-port 25]
+"""
+
+import sys
+import os
+import argparse
+import logging
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def run_dues_reminders(tenant_ids, queue=True, send=True, min_balance=0.01, rate=None, smtp_server=None, smtp_port=None):
+    """Queue and/or send reminders for the given tenants. Returns (queued, sent, failed)."""
+
+    app = create_app()
+    if smtp_server:
+        app.config['MAIL_SERVER'] = smtp_server
+    if smtp_port:
+        app.config['MAIL_PORT'] = smtp_port
+    total_queued = total_sent = total_failed = 0
+
+    with app.app_context():
+        from database import get_tenant_db_session
+        from app.dues.reminders import drain_outbox, queue_reminders
+
+        for tenant_id in tenant_ids:
+            tenant_name = Config.TENANT_DISPLAY_NAMES.get(tenant_id, tenant_id.capitalize())
+            try:
+                with get_tenant_db_session(tenant_id) as s:
+                    if queue:
+                        queued = queue_reminders(s, tenant_name, min_balance=min_balance)
+                        total_queued += queued
+                        logger.info(f"{tenant_id}: queued {queued} reminders")
+                    if send:
+                        sent, failed, elapsed = drain_outbox(s, max_per_second=rate)
+                        total_sent += sent
+                        total_failed += failed
+                        logger.info(f"{tenant_id}: sent {sent} reminders, {failed} failed, in {elapsed:.2f}s "
+                                    f"({sent / elapsed if elapsed else 0:.1f} messages/s)")
+            except Exception as e:
+                logger.error(f"Error running dues reminders for {tenant_id}: {str(e)}")
+                total_failed += 1
+
+    logger.info(f"Queued {total_queued}, sent {total_sent}, failed {total_failed} dues reminders")
+    return total_queued, total_sent, total_failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Queue and send dues balance reminders')
+    parser.add_argument('--tenant', help='Only run reminders for this tenant')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--queue-only', action='store_true', help='Fill the outbox without sending')
+    mode.add_argument('--send-only', action='store_true', help='Send what is already in the outbox')
+    parser.add_argument('--min-balance', type=float, default=0.01, help='Smallest open balance that gets a reminder')
+    parser.add_argument('--rate', type=float, help='Maximum messages per second (default: MAIL_MAX_PER_SECOND, 0 for no limit)')
+    parser.add_argument('--smtp-server', help='Override MAIL_SERVER')
+    parser.add_argument('--smtp-port', type=int, help='Override MAIL_PORT')
+    args = parser.parse_args()
+
+    tenant_ids = [args.tenant] if args.tenant else list(Config.TENANT_DATABASES.keys())
+    _, _, failed = run_dues_reminders(tenant_ids, not args.send_only, not args.queue_only, args.min_balance,
+                                      args.rate, args.smtp_server, args.smtp_port)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Runner for recurring dues schedules (see DuesSchedule and app/dues/schedules.py).
+Materialises every DuesRecord owed up to --as-of for all tenants. Safe to run from cron
+as often as you like: reruns and restarts after a crash never create duplicate records.
+
+Usage:
+  python3 run_dues_schedules.py [--as-of YYYY-MM-DD] [--tenant tenant1] [--batch-size 2000]
+"""
+
+import sys
+import os
+import argparse
+import logging
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def run_dues_schedules(tenant_ids, as_of=None, batch_size=None):
+    """Run all active dues schedules for the given tenants. Returns the total records created."""
+
+    app = create_app()
+    total_created = 0
+    failed = False
+    started = time.perf_counter()
+
+    with app.app_context():
+        from database import get_tenant_db_session
+        from app.dues.schedules import run_due_schedules, DEFAULT_BATCH_SIZE
+
+        for tenant_id in tenant_ids:
+            tenant_started = time.perf_counter()
+            try:
+                with get_tenant_db_session(tenant_id) as s:
+                    results = run_due_schedules(s, as_of, batch_size or DEFAULT_BATCH_SIZE)
+            except Exception as e:
+                logger.error(f"Error running dues schedules for {tenant_id}: {str(e)}")
+                failed = True
+                continue
+
+            created = sum(count for count in results.values() if count)
+            failed = failed or any(count is None for count in results.values())
+            elapsed = time.perf_counter() - tenant_started
+            total_created += created
+            logger.info(f"{tenant_id}: {len(results)} schedules, {created} records in {elapsed:.2f}s "
+                        f"({created / elapsed if elapsed else 0:.0f} rows/s)")
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Created {total_created} dues records in {elapsed:.2f}s "
+                f"({total_created / elapsed if elapsed else 0:.0f} rows/s)")
+    return total_created, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Materialise dues records from recurring dues schedules')
+    parser.add_argument('--as-of', help='Generate dues falling due up to this date (default: today)')
+    parser.add_argument('--tenant', help='Only run schedules for this tenant')
+    parser.add_argument('--batch-size', type=int, help='Members per INSERT batch')
+    args = parser.parse_args()
+
+    as_of = datetime.strptime(args.as_of, '%Y-%m-%d').date() if args.as_of else None
+    tenant_ids = [args.tenant] if args.tenant else list(Config.TENANT_DATABASES.keys())
+
+    _, failed = run_dues_schedules(tenant_ids, as_of, args.batch_size)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the attendance heatmap matrix (app/attendance/matrix.py): the per-member figures
+computed over the status grid and how season_matrix builds the grid from records.
+Runs on a throwaway SQLite database; skipped without numpy.
+"""
+
+import sys
+import os
+from datetime import date, datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+np = pytest.importorskip('numpy')
+
+from app.models import User, AttendanceType, AttendanceStatus, AttendanceRecord, ATTENDANCE_STATUS_CODES
+from app.attendance.matrix import BEFORE_JOINING, NO_RECORD, _member_figures, season_matrix
+
+P, A, L, E = (ATTENDANCE_STATUS_CODES[letter] for letter in 'PALE')
+N, B = NO_RECORD, BEFORE_JOINING
+MONDAY = date(2026, 1, 5)
+
+
+def _figures(rows, trailing=3):
+    rate, streak, trailing_rate = _member_figures(np.array(rows, dtype=np.int8), trailing)
+    return [None if value != value else round(float(value), 3) for value in rate], streak.tolist(), \
+        [None if value != value else round(float(value), 3) for value in trailing_rate]
+
+
+def test_member_figures_rates_and_absence_streaks():
+    rates, streaks, trailing = _figures([
+        [P, A, A, L, N, N, N, P],  # no record counts as missed
+        [P, E, A, E, A, P, E, L],  # excused meetings are not counted and end a streak
+    ])
+    assert rates == [0.375, 0.6]
+    assert streaks == [3, 1]
+    assert trailing == [0.333, 1.0]
+
+
+def test_member_figures_skip_meetings_before_joining():
+    rates, streaks, trailing = _figures([
+        [B, B, B, B, B, P, A, P],
+        [B, B, B, B, B, B, B, B],
+        [E, E, E, E, E, E, E, E],
+    ])
+    assert rates == [0.667, None, None]
+    assert streaks == [1, 0, 0]
+    assert trailing == [0.667, None, None]
+
+
+def test_member_figures_without_meetings():
+    rates, streaks, trailing = _figures(np.zeros((2, 0)))
+    assert (rates, streaks, trailing) == ([None, None], [0, 0], [None, None])
+
+
+@pytest.fixture
+def s(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'attendance.db'}")
+    tables = [model.__table__ for model in (User, AttendanceType, AttendanceStatus, AttendanceRecord)]
+    User.metadata.create_all(engine, tables=tables)
+    with Session(engine) as session:
+        # Core inserts keep the member audit and change hooks out of the way
+        session.execute(User.__table__.insert(), [
+            {'id': 1, 'first_name': 'Ann', 'last_name': 'Able', 'email': 'a@example.com', 'is_active': True,
+             'created_at': datetime(2020, 1, 1), 'version_id': 1},
+            {'id': 2, 'first_name': 'Bea', 'last_name': 'Best', 'email': 'b@example.com', 'is_active': True,
+             'created_at': datetime(2026, 1, 15), 'version_id': 1},
+            {'id': 3, 'first_name': 'Cal', 'last_name': 'Cole', 'email': 'c@example.com', 'is_active': True,
+             'created_at': datetime(2020, 1, 1), 'version_id': 1},
+            {'id': 4, 'first_name': 'Dan', 'last_name': 'Dorm', 'email': 'd@example.com', 'is_active': False,
+             'created_at': datetime(2020, 1, 1), 'version_id': 1},
+        ])
+        session.execute(AttendanceType.__table__.insert(), [{'id': 1, 'type': 'Meeting'}, {'id': 2, 'type': 'Board'}])
+        weeks = [MONDAY + timedelta(weeks=week) for week in range(4)]
+        records = [(1, 1, weeks[0], A), (1, 2, weeks[0], L), (1, 1, weeks[1], P), (1, 1, weeks[2], A),
+                   (1, 1, weeks[3], P), (2, 1, weeks[2], P), (4, 1, weeks[3], P)]
+        session.execute(AttendanceRecord.__table__.insert(), [
+            {'user_id': user_id, 'attendance_type_id': type_id, 'event_date': day, 'status_code': code}
+            for user_id, type_id, day, code in records
+        ])
+        yield session
+    engine.dispose()
+
+
+def test_season_matrix_lists_every_active_member(s):
+    matrix = season_matrix(s, MONDAY, MONDAY + timedelta(weeks=4), trailing=2)
+    assert matrix.member_ids == [1, 2, 3]
+    assert len(matrix.dates) == 4
+    # Late at one meeting beats absent at another the same day; Bea joined in week 2;
+    # Cal has no records at all and missed every meeting
+    assert matrix.status_rows() == ['LPAP', '  P.', '....']
+    assert matrix.to_json()['members'][1]['attendance_rate'] == 0.5
+    assert matrix.to_json()['members'][2]['longest_absence_streak'] == 4
+
+
+def test_season_matrix_for_one_attendance_type(s):
+    matrix = season_matrix(s, MONDAY, MONDAY + timedelta(weeks=4), attendance_type_id=2)
+    assert len(matrix.dates) == 1
+    assert matrix.status_rows() == ['L', ' ', '.']
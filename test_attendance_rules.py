@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for attendance rule evaluation (app/attendance/rules.py): the rolling window bounds and
+opening and resolving alerts as members break and return within a rule.
+Runs on a throwaway SQLite database.
+"""
+
+import sys
+import os
+from datetime import date
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import (User, AttendanceType, AttendanceStatus, AttendanceRecord, AttendanceRule, AttendanceAlert,
+                        attendance_status_code)
+from app.attendance.rules import window_start, evaluate_rule
+
+AS_OF = date(2026, 6, 30)
+
+
+@pytest.fixture
+def s(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rules.db'}")
+    tables = [model.__table__ for model in
+              (User, AttendanceType, AttendanceStatus, AttendanceRecord, AttendanceRule, AttendanceAlert)]
+    User.metadata.create_all(engine, tables=tables)
+    with Session(engine) as session:
+        # Core inserts keep the member audit, change and rule hooks out of the way
+        session.execute(User.__table__.insert(), [
+            {'id': i, 'first_name': 'M', 'last_name': str(i), 'email': f'm{i}@example.com', 'version_id': 1,
+             'is_active': i != 3}
+            for i in (1, 2, 3)
+        ])
+        session.execute(AttendanceType.__table__.insert(), [{'id': 1, 'type': 'Meeting'}, {'id': 2, 'type': 'Social'}])
+        session.execute(AttendanceRule.__table__.insert(), [{
+            'id': 1, 'name': 'Absences', 'status_code': attendance_status_code('A'), 'max_count': 1,
+            'window_months': 3, 'attendance_type_id': None, 'is_active': True
+        }])
+        yield session
+    engine.dispose()
+
+
+def _absences(s, user_id, *days, attendance_type_id=1):
+    s.execute(AttendanceRecord.__table__.insert(), [
+        {'user_id': user_id, 'attendance_type_id': attendance_type_id, 'event_date': day,
+         'status_code': attendance_status_code('A')}
+        for day in days
+    ])
+
+
+def _open_alerts(s):
+    return {(alert.user_id, alert.count) for alert in s.query(AttendanceAlert).filter(AttendanceAlert.resolved_at.is_(None))}
+
+
+@pytest.mark.parametrize('as_of, months, start', [
+    (date(2026, 6, 15), 3, date(2026, 3, 15)),
+    (date(2026, 2, 10), 6, date(2025, 8, 10)),
+    (date(2026, 1, 31), 12, date(2025, 1, 31)),
+    # Shorter months clamp to their last day
+    (date(2026, 5, 31), 3, date(2026, 2, 28)),
+    (date(2028, 5, 31), 3, date(2028, 2, 29)),
+    (date(2026, 7, 31), 1, date(2026, 6, 30)),
+])
+def test_window_start(as_of, months, start):
+    assert window_start(as_of, months) == start
+
+
+def test_evaluate_rule_opens_alerts_over_the_limit(s):
+    rule = s.get(AttendanceRule, 1)
+    # The window is (2026-03-30, 2026-06-30]: the absence on its first day does not count
+    _absences(s, 1, date(2026, 3, 30), date(2026, 4, 6), date(2026, 6, 30))
+    _absences(s, 2, date(2026, 3, 30), date(2026, 5, 4))
+    # Inactive members never break a rule
+    _absences(s, 3, date(2026, 4, 6), date(2026, 5, 4))
+
+    assert evaluate_rule(s, rule, AS_OF) == (1, 0)
+    assert _open_alerts(s) == {(1, 2)}
+    # Evaluating again keeps the one open alert
+    assert evaluate_rule(s, rule, AS_OF) == (0, 0)
+    assert s.query(AttendanceAlert).count() == 1
+
+
+def test_evaluate_rule_resolves_alerts_back_within_the_limit(s):
+    rule = s.get(AttendanceRule, 1)
+    _absences(s, 1, date(2026, 4, 6), date(2026, 5, 4))
+    assert evaluate_rule(s, rule, AS_OF) == (1, 0)
+
+    # A month later the April absence has left the window
+    assert evaluate_rule(s, rule, date(2026, 7, 31)) == (0, 1)
+    assert _open_alerts(s) == set()
+    assert s.query(AttendanceAlert).one().resolved_at is not None
+
+
+def test_evaluate_rule_for_one_attendance_type_and_given_members(s):
+    rule = s.get(AttendanceRule, 1)
+    rule.attendance_type_id = 2
+    _absences(s, 1, date(2026, 4, 6), date(2026, 5, 4))
+    _absences(s, 1, date(2026, 4, 11), attendance_type_id=2)
+    _absences(s, 2, date(2026, 4, 11), date(2026, 5, 9), attendance_type_id=2)
+
+    assert evaluate_rule(s, rule, AS_OF, user_ids={1}) == (0, 0)
+    assert evaluate_rule(s, rule, AS_OF, user_ids={1, 2}) == (1, 0)
+    assert _open_alerts(s) == {(2, 2)}
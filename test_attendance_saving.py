@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for saving attendance from the matrix page (app/attendance/saving.py): validating the
+JSON change list and the created/updated/unchanged counts of the upsert.
+Runs on a throwaway SQLite database.
+"""
+
+import sys
+import os
+from datetime import date
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import User, AttendanceType, AttendanceStatus, AttendanceRecord
+from app.attendance.saving import parse_changes, upsert_attendance
+
+MEETING = date(2026, 3, 2)
+
+
+@pytest.fixture
+def s(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'attendance.db'}")
+    tables = [model.__table__ for model in (User, AttendanceType, AttendanceStatus, AttendanceRecord)]
+    User.metadata.create_all(engine, tables=tables)
+    with Session(engine) as session:
+        # Core inserts keep the member audit and change hooks out of the way
+        session.execute(User.__table__.insert(), [
+            {'id': i, 'first_name': 'M', 'last_name': str(i), 'email': f'm{i}@example.com', 'version_id': 1}
+            for i in (1, 2, 3)
+        ])
+        session.execute(AttendanceType.__table__.insert(), [{'id': 1, 'type': 'Meeting'}])
+        yield session
+    engine.dispose()
+
+
+def _cell(user_id, status, attendance_type_id=1):
+    return {'user_id': user_id, 'attendance_type_id': attendance_type_id, 'event_date': MEETING, 'status': status}
+
+
+def test_parse_changes_converts_json_cells():
+    assert parse_changes([{'user_id': '3', 'attendance_type_id': 1, 'event_date': '2026-03-02', 'status': 'L'}]) == [
+        _cell(3, 'L')
+    ]
+    assert parse_changes([]) == []
+
+
+@pytest.mark.parametrize('changes', [
+    {'user_id': 1},
+    [{'user_id': 1, 'attendance_type_id': 1, 'event_date': '2026-03-02'}],
+    [{'user_id': 'x', 'attendance_type_id': 1, 'event_date': '2026-03-02', 'status': 'P'}],
+    [{'user_id': 1, 'attendance_type_id': 1, 'event_date': '03/02/2026', 'status': 'P'}],
+    [{'user_id': 1, 'attendance_type_id': 1, 'event_date': '2026-03-02', 'status': 'X'}],
+    [None],
+])
+def test_parse_changes_rejects_malformed_payloads(changes):
+    with pytest.raises(ValueError):
+        parse_changes(changes)
+
+
+def test_upsert_counts_created_updated_and_unchanged(s):
+    assert upsert_attendance(s, [_cell(1, 'P'), _cell(2, 'A'), _cell(99, 'P')]) == (2, 0, 0)
+    assert upsert_attendance(s, [_cell(1, 'P'), _cell(2, 'late'), _cell(3, 'E')]) == (1, 1, 1)
+    statuses = {record.user_id: (record.status, record.status_code) for record in s.query(AttendanceRecord)}
+    assert statuses == {1: ('P', 1), 2: ('L', 3), 3: ('E', 4)}
+
+
+def test_upsert_keeps_the_last_of_repeated_cells(s):
+    assert upsert_attendance(s, [_cell(1, 'P'), _cell(1, 'A')]) == (1, 0, 0)
+    assert s.query(AttendanceRecord).one().status == 'A'
+
+
+def test_unknown_attendance_type_is_rejected_before_writing(s):
+    with pytest.raises(ValueError, match='Unknown attendance type: 7'):
+        upsert_attendance(s, [_cell(1, 'P'), _cell(2, 'P', attendance_type_id=7)])
+    assert s.query(AttendanceRecord).count() == 0
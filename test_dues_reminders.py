@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the dues reminder sender (app/dues/reminders.py): per-message SMTP failures and
+the delivery state written back for a batch. Runs on a throwaway SQLite database with a fake
+SMTP connection.
+"""
+
+import sys
+import os
+import smtplib
+from datetime import date, datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import User, DuesReminder
+from app.dues.reminders import _recently_reminded, send_batch
+
+
+class FakeSMTP:
+    """Raises the exception mapped to a recipient, delivers everything else."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.delivered = []
+
+    def send_message(self, message):
+        error = self.errors.get(message['To'])
+        if error:
+            raise error
+        self.delivered.append(message['To'])
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def s(tmp_path):
+    app = Flask(__name__)
+    app.config.update(MAIL_BATCH_SIZE=10, MAIL_MAX_ATTEMPTS=3, MAIL_DEFAULT_SENDER='dues@example.com',
+                      MAIL_SERVER='localhost', MAIL_PORT=25)
+    engine = create_engine(f"sqlite:///{tmp_path / 'reminders.db'}")
+    User.metadata.create_all(engine, tables=[User.__table__, DuesReminder.__table__])
+    with app.app_context(), Session(engine) as session:
+        session.execute(User.__table__.insert(), [
+            {'id': i, 'first_name': 'M', 'last_name': str(i), 'email': f'm{i}@example.com', 'version_id': 1}
+            for i in range(1, 5)
+        ])
+        session.execute(DuesReminder.__table__.insert(), [
+            {'id': i, 'member_id': i, 'reminder_date': date(2026, 1, 1), 'email': f'm{i}@example.com',
+             'subject': 'Dues', 'body': 'Please pay', 'balance': 10.0, 'status': 'pending', 'attempts': 0,
+             'next_attempt_at': datetime(2026, 1, 1)}
+            for i in range(1, 5)
+        ])
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def _states(s):
+    return {r.id: (r.status, r.attempts) for r in s.query(DuesReminder).order_by(DuesReminder.id)}
+
+
+def test_any_smtp_error_fails_only_its_own_row(s):
+    smtp = FakeSMTP({
+        'm2@example.com': smtplib.SMTPNotSupportedError('SMTPUTF8 not supported'),
+        'm3@example.com': smtplib.SMTPRecipientsRefused({'m3@example.com': (550, b'No such user')}),
+    })
+    assert send_batch(s, lambda config: smtp) == (2, 2)
+    assert smtp.delivered == ['m1@example.com', 'm4@example.com']
+    assert _states(s) == {1: ('sent', 1), 2: ('pending', 1), 3: ('failed', 1), 4: ('sent', 1)}
+
+
+def test_sent_rows_are_recorded_when_an_unexpected_error_escapes(s):
+    smtp = FakeSMTP({'m2@example.com': RuntimeError('template blew up')})
+    with pytest.raises(RuntimeError):
+        send_batch(s, lambda config: smtp)
+    s.expire_all()
+    # Row 1 is not resent; rows 2-4 were never recorded and are claimed again next batch
+    assert _states(s) == {1: ('sent', 1), 2: ('pending', 0), 3: ('pending', 0), 4: ('pending', 0)}
+
+
+def test_recent_reminders_hold_back_the_next_one_but_failed_ones_do_not(s):
+    s.query(DuesReminder).filter_by(id=2).update({'status': 'failed'})
+    assert _recently_reminded(s, [1, 2, 3], since=date(2026, 1, 1)) == {1, 3}
+    assert _recently_reminded(s, [1, 2, 3], since=date(2026, 1, 2)) == set()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for app/members/updates.py: typed conversion of submitted demographics values and the
+optimistic-concurrency path that turns a concurrent edit into a 409 on the PATCH endpoint.
+Runs on a throwaway SQLite database; no tenant database is needed.
+"""
+
+import sys
+import os
+from datetime import date
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import Column, Date, Integer, String, create_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from app.members.updates import ConcurrentUpdateError, apply_changes, coerce_form_values, commit_changes
+
+Base = declarative_base()
+
+
+class Member(Base):
+    __tablename__ = 'member'
+    id = Column(Integer, primary_key=True)
+    first_name = Column(String(20))
+    membership_type_id = Column(Integer)
+    joined_on = Column(Date)
+    version_id = Column(Integer, nullable=False, default=1)
+    __mapper_args__ = {'version_id_col': version_id}
+
+
+FIELDS = ['first_name', 'membership_type_id', 'joined_on']
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    # A file database so the two sessions use separate connections
+    engine = create_engine(f"sqlite:///{tmp_path / 'members.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as s:
+        s.add(Member(id=1, first_name='Alice', membership_type_id=3))
+        s.commit()
+    first, second = Session(), Session()
+    yield first, second
+    first.close()
+    second.close()
+    engine.dispose()
+
+
+def test_coerce_converts_json_and_form_values():
+    assert coerce_form_values(Member, {'membership_type_id': '3', 'joined_on': '2024-05-01'}, FIELDS) == {
+        'membership_type_id': 3, 'joined_on': date(2024, 5, 1)
+    }
+    assert coerce_form_values(Member, {'membership_type_id': 3, 'first_name': 'Bo'}, FIELDS) == {
+        'membership_type_id': 3, 'first_name': 'Bo'
+    }
+    assert coerce_form_values(Member, {'membership_type_id': '', 'joined_on': ''}, FIELDS) == {
+        'membership_type_id': None, 'joined_on': None
+    }
+    assert coerce_form_values(Member, {'other': 'x'}, FIELDS) == {}
+
+
+@pytest.mark.parametrize('values', [
+    {'membership_type_id': 'three'},
+    {'membership_type_id': True},
+    {'membership_type_id': 3.5},
+    {'joined_on': '05/01/2024'},
+    {'first_name': 42},
+    {'first_name': 'x' * 21},
+])
+def test_coerce_rejects_invalid_values(values):
+    with pytest.raises(ValueError, match=next(iter(values))):
+        coerce_form_values(Member, values, FIELDS)
+
+
+def test_string_integer_matching_current_value_is_unchanged(sessions):
+    s, _ = sessions
+    member = s.get(Member, 1)
+    assert apply_changes(member, coerce_form_values(Member, {'membership_type_id': '3'}, FIELDS)) == {}
+
+
+def test_stale_version_raises_before_writing(sessions):
+    s, _ = sessions
+    member = s.get(Member, 1)
+    with pytest.raises(ConcurrentUpdateError):
+        apply_changes(member, {'first_name': 'Bo'}, expected_version=member.version_id + 1)
+    assert member.first_name == 'Alice'
+
+
+def test_concurrent_commit_raises_concurrent_update_error(sessions):
+    first, second = sessions
+    mine, theirs = first.get(Member, 1), second.get(Member, 1)
+
+    apply_changes(theirs, {'first_name': 'Carol'}, expected_version=1)
+    commit_changes(second, theirs)
+
+    # Our copy still says version 1, so the check passes but the UPDATE matches no row
+    apply_changes(mine, {'first_name': 'Bo'}, expected_version=1)
+    with pytest.raises(ConcurrentUpdateError):
+        commit_changes(first, mine)
+
+    first.expire_all()
+    assert first.get(Member, 1).first_name == 'Carol'
+    assert first.get(Member, 1).version_id == 2
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for bank statement reconciliation (app/dues/reconciliation.py): matching credits to open
+dues and skipping lines that were already imported. Runs on a throwaway SQLite database.
+"""
+
+import sys
+import os
+import io
+from datetime import date
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import User, DuesType, DuesRecord, DuesPayment, BankStatementLine
+from app.dues.reconciliation import import_statement, new_import
+
+DUE = date(2026, 1, 1)
+POSTED = date(2026, 1, 15)
+
+
+@pytest.fixture
+def s(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'dues.db'}")
+    tables = [model.__table__ for model in (User, DuesType, DuesRecord, DuesPayment, BankStatementLine)]
+    User.metadata.create_all(engine, tables=tables)
+    with Session(engine) as session:
+        # Core inserts keep the member audit and change hooks out of the way
+        session.execute(User.__table__.insert(), [
+            {'id': 1, 'first_name': 'Alice', 'last_name': 'Smith', 'email': 'a@example.com', 'version_id': 1},
+            {'id': 2, 'first_name': 'Bob', 'last_name': 'Jones', 'email': 'b@example.com', 'version_id': 1},
+            {'id': 3, 'first_name': 'Bob', 'last_name': 'Jones', 'email': 'b2@example.com', 'version_id': 1},
+        ])
+        session.execute(DuesType.__table__.insert(), [{'id': 1, 'dues_type': 'Annual'}])
+        session.execute(DuesRecord.__table__.insert(), [
+            {'id': 10, 'member_id': 1, 'dues_type_id': 1, 'dues_amount': 50.0, 'amount_paid': 0.0,
+             'due_date': DUE, 'date_dues_generated': DUE, 'document_number': 'INV-0042'},
+            {'id': 11, 'member_id': 1, 'dues_type_id': 1, 'dues_amount': 25.0, 'amount_paid': 0.0,
+             'due_date': date(2026, 2, 1), 'date_dues_generated': DUE, 'document_number': None},
+            {'id': 20, 'member_id': 2, 'dues_type_id': 1, 'dues_amount': 30.0, 'amount_paid': 0.0,
+             'due_date': DUE, 'date_dues_generated': DUE, 'document_number': None},
+            {'id': 30, 'member_id': 3, 'dues_type_id': 1, 'dues_amount': 30.0, 'amount_paid': 0.0,
+             'due_date': DUE, 'date_dues_generated': DUE, 'document_number': None},
+        ])
+        yield session
+    engine.dispose()
+
+
+def _import(s, text, filename='statement.csv'):
+    result, lines = new_import(io.BytesIO(text.encode('utf-8')), filename)
+    return import_statement(s, lines, result, source_file=filename)
+
+
+def _paid(s, record_id):
+    return s.query(DuesRecord.amount_paid).filter_by(id=record_id).scalar()
+
+
+def test_matches_by_reference_then_by_name_and_amount(s):
+    result = _import(s, "Date,Amount,Reference,Name\n"
+                        "2026-01-15,50.00,inv 42,\n"
+                        "2026-01-15,25.00,,Alice Smith\n")
+    assert (result.matched, result.unmatched, result.duplicates) == (2, 0, 0)
+    assert _paid(s, 10) == 50.0 and _paid(s, 11) == 25.0
+
+
+def test_amount_settling_all_open_records_is_split_across_them(s):
+    result = _import(s, "Date,Amount,Name\n2026-01-15,75.00,Smith Alice\n")
+    assert result.matched == 1
+    assert _paid(s, 10) == 50.0 and _paid(s, 11) == 25.0
+
+
+def test_ambiguous_or_unknown_payer_goes_to_review(s):
+    result = _import(s, "Date,Amount,Name\n2026-01-15,30.00,Bob Jones\n2026-01-15,30.00,Carol King\n")
+    assert (result.matched, result.unmatched) == (0, 2)
+    assert s.query(BankStatementLine).filter_by(status='pending').count() == 2
+
+
+def test_identical_same_day_lines_are_both_kept_and_reimport_skips_both(s):
+    statement = "Date,Amount,Name\n2026-01-15,10.00,Someone Else\n2026-01-15,10.00,Someone Else\n"
+    first = _import(s, statement)
+    assert (first.unmatched, first.duplicates) == (2, 0)
+
+    again = _import(s, statement)
+    assert (again.unmatched, again.duplicates) == (0, 2)
+
+    # A later statement overlapping the first with one more identical line keeps only the new one
+    overlapping = _import(s, statement + "2026-01-15,10.00,Someone Else\n")
+    assert (overlapping.unmatched, overlapping.duplicates) == (1, 2)
+
+
+def test_lines_without_name_or_reference_do_not_collide(s):
+    result = _import(s, "Date,Amount\n2026-01-15,5.00\n2026-01-15,5.00\n2026-01-15,7.00\n")
+    assert (result.unmatched, result.duplicates) == (3, 0)
+
+
+def test_bank_transaction_ids_decide_duplicates(s):
+    ofx = ("<OFX><BANKTRANLIST>"
+           "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260115<TRNAMT>10.00<FITID>A1<NAME>Someone Else</STMTTRN>"
+           "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20260115<TRNAMT>10.00<FITID>A2<NAME>Someone Else</STMTTRN>"
+           "</BANKTRANLIST></OFX>\n")
+    first = _import(s, ofx, 'statement.ofx')
+    assert (first.unmatched, first.duplicates) == (2, 0)
+    assert {line.transaction_id for line in s.query(BankStatementLine)} == {'A1', 'A2'}
+
+    again = _import(s, ofx.replace('A2', 'A3'), 'statement.ofx')
+    assert (again.unmatched, again.duplicates) == (1, 1)
+
+
+def test_check_payment_recorded_by_hand_is_not_posted_again(s):
+    s.execute(DuesPayment.__table__.insert(), [
+        {'dues_record_id': 10, 'amount': 50.0, 'payment_date': POSTED, 'document_number': 'CHK-0099'}
+    ])
+    result = _import(s, "Date,Amount,Check Number\n2026-01-15,50.00,chk 99\n2026-01-16,50.00,chk 99\n")
+    assert (result.duplicates, result.unmatched) == (1, 1)
+
+
+def test_debits_and_bad_lines_are_skipped(s):
+    result = _import(s, "Date,Amount,Name\n2026-01-15,-20.00,Alice Smith\nnot a date,5.00,Alice Smith\n")
+    assert (result.skipped, result.matched, result.unmatched) == (2, 0, 0)
+    assert len(result.errors) == 2